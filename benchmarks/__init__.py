@@ -0,0 +1 @@
+"""Performance benchmarks for the Instructor Assistant.  Run a benchmark with 'python -m benchmarks.<name>'."""
@@ -0,0 +1,90 @@
+"""Time of normalizing a roster's date of birth column: the column pass of 'normalize_dates' against parsing every
+row on its own, and pandas.to_datetime for reference if pandas is installed.
+
+    python -m benchmarks.bench_dates --rows 100000
+
+The column mixes datetime cells, dd/mm/yyyy, dd-mm-yy and ISO text, excel serial numbers and 1% values that are not
+dates.
+"""
+
+import argparse
+import datetime
+import importlib.util
+import random
+import time
+
+from instructor_assistant.dates import normalize_dates, parse_date
+
+TODAY = datetime.date(2024, 1, 1)
+
+
+def birth_date_column(rows: int, seed: int = 0) -> list:
+    rng = random.Random(seed)
+    values = []
+    for n in range(rows):
+        date = datetime.datetime(1950, 1, 1) + datetime.timedelta(days=rng.randrange(25000))
+        kind = n % 5
+        if rng.random() < 0.01:
+            values.append(rng.choice(("", "unknown", "31/02/1990", "1990")))
+        elif kind == 0:
+            values.append(date)
+        elif kind == 1:
+            values.append(date.strftime("%d/%m/%Y"))
+        elif kind == 2:
+            values.append(date.strftime("%d-%m-%y"))
+        elif kind == 3:
+            values.append(date.strftime("%Y-%m-%d 00:00:00"))
+        else:
+            values.append((date.date() - datetime.date(1899, 12, 30)).days)
+    return values
+
+
+def per_row(values: list) -> list:
+    dates = []
+    for value in values:
+        try:
+            dates.append(parse_date(value, TODAY))
+        except ValueError:
+            dates.append(value)
+    return dates
+
+
+def pandas_to_datetime(values: list):
+    import pandas
+
+    return pandas.to_datetime(pandas.Series([str(value) for value in values]), dayfirst=True, errors="coerce",
+                              format="mixed")
+
+
+def best_time(function, values: list, repeat: int) -> float:
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function(values)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=100000, help="rows in the column")
+    parser.add_argument("--repeat", type=int, default=3, help="runs per method, the best is kept")
+    args = parser.parse_args()
+
+    values = birth_date_column(args.rows)
+    methods = [("column", lambda column: normalize_dates(column, TODAY)), ("per row", per_row)]
+    if importlib.util.find_spec("pandas") is not None:
+        import pandas  # noqa: F401 --- loaded before timing
+        methods.append(("pandas", pandas_to_datetime))
+
+    _, errors = normalize_dates(values, TODAY)
+    print(f"{args.rows} rows, {len(errors)} not dates")
+    print(f"{'method':<10}{'seconds':>10}{'us/row':>10}")
+    for name, function in methods:
+        seconds = best_time(function, values, args.repeat)
+        print(f"{name:<10}{seconds:>10.3f}{seconds / args.rows * 1e6:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,51 @@
+"""Time of finding duplicate divers in synthetic rosters, to check it grows linearly with the roster size.
+
+    python -m benchmarks.bench_duplicates --sizes 10000 20000 40000
+
+Every roster has '--duplicates' percent extra entries copied from other students: half exact copies, half near
+copies (first and last name swapped, email removed).  Time per student should stay about the same as the roster grows.
+"""
+
+import argparse
+import dataclasses
+import random
+import time
+
+from benchmarks.synthetic import roster_rows
+from instructor_assistant.duplicates import find_duplicates
+from instructor_assistant.students import Student
+
+
+def roster_with_duplicates(students: int, percent: float, seed: int = 0) -> list:
+    rng = random.Random(seed)
+    roster = [Student(**row) for row in roster_rows(students, seed)]
+    for n in range(int(students * percent / 100)):
+        student = rng.choice(roster[:students])
+        if n % 2:
+            student = dataclasses.replace(student, first_name=student.last_name, last_name=student.first_name,
+                                          email="")
+        roster.insert(rng.randrange(len(roster) + 1), student)
+    return roster
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10000, 20000, 40000], help="roster sizes")
+    parser.add_argument("--duplicates", type=float, default=5, help="percent of duplicate entries added")
+    parser.add_argument("--repeat", type=int, default=3, help="runs per size, the best is kept")
+    args = parser.parse_args()
+
+    print(f"{'students':>9}{'found':>8}{'seconds':>10}{'us/student':>12}")
+    for size in args.sizes:
+        roster = roster_with_duplicates(size, args.duplicates)
+        best = None
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            duplicates = find_duplicates(roster)
+            elapsed = time.perf_counter() - start
+            best = elapsed if best is None else min(best, elapsed)
+        print(f"{len(roster):>9}{len(duplicates):>8}{best:>10.3f}{best / len(roster) * 1e6:>12.1f}")
+
+
+if __name__ == "__main__":
+    main()
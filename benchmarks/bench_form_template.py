@@ -0,0 +1,57 @@
+"""Per-form cost of filling the 'Record_and_Referral_Form' before and after caching the parsed template.
+
+    python -m benchmarks.bench_form_template --forms 50
+"""
+
+import argparse
+import io
+import json
+import os
+import time
+
+from fillpdf import fillpdfs
+
+from instructor_assistant.form_template import FillpdfTemplate
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+STUDENT_AND_REFERRAL_FORM = os.path.join(ROOT, "assets", "Record_and_Referral_Form.pdf")
+PDF_FORM_FIELDS = os.path.join(ROOT, "config", "pdf_form_fields.json")
+
+
+def per_form_ms(function, forms: int) -> float:
+    start = time.perf_counter()
+    for n in range(forms):
+        function(n)
+    return (time.perf_counter() - start) / forms * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--forms", type=int, default=20, help="forms filled per measurement")
+    args = parser.parse_args()
+
+    with open(PDF_FORM_FIELDS) as data:
+        fields = json.load(data)
+
+    def fill_fields(n):
+        return dict(fields, **{"Student Name": f"Student {n}", "CW 1": n % 28 + 1})
+
+    template = FillpdfTemplate(STUDENT_AND_REFERRAL_FORM)
+    results = {
+        "reset fields: fillpdfs.get_form_fields": per_form_ms(
+            lambda n: fillpdfs.get_form_fields(STUDENT_AND_REFERRAL_FORM), args.forms),
+        "reset fields: FillpdfTemplate.fields": per_form_ms(lambda n: template.fields(), args.forms),
+        "fill: fillpdfs.write_fillable_pdf": per_form_ms(
+            lambda n: fillpdfs.write_fillable_pdf(STUDENT_AND_REFERRAL_FORM, io.BytesIO(), fill_fields(n)),
+            args.forms),
+        "fill: FillpdfTemplate.write": per_form_ms(
+            lambda n: template.write(io.BytesIO(), fill_fields(n)), args.forms),
+    }
+
+    width = max(len(name) for name in results)
+    for name, ms in results.items():
+        print(f"{name:<{width}}  {ms:8.2f} ms/form")
+
+
+if __name__ == "__main__":
+    main()
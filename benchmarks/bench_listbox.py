@@ -0,0 +1,88 @@
+"""Time to fill a Tk listbox with a roster and the longest time the event loop is blocked meanwhile: a row at a
+time as rows are parsed, against pages inserted with one call each from 'after' callbacks.  Needs a display.
+
+    python -m benchmarks.bench_listbox --students 10000
+
+    per row  one 'insert' per student, 'update_idletasks' every 250 rows, as the import did
+    pages    one 'insert' per '--page' students, the next page from an 'after' callback, as courses are listed now
+
+The longest stall is the longest time between two ticks of a 10 ms 'after' timer, the longest the window could not
+answer a click.
+"""
+
+import argparse
+import time
+import tkinter
+
+TICK_MS = 10
+
+
+class StallMeter:
+    """Longest time between two ticks of an 'after' timer"""
+
+    def __init__(self, root):
+        self.root = root
+        self.longest = 0
+        self.last = time.perf_counter()
+        self.running = True
+        self.tick()
+
+    def tick(self):
+        now = time.perf_counter()
+        self.longest = max(self.longest, now - self.last)
+        self.last = now
+        if self.running:
+            self.root.after(TICK_MS, self.tick)
+
+
+def per_row(root, listbox, names: list, page: int, done):
+    for row, name in enumerate(names, start=1):
+        listbox.insert("end", name)
+        if row % 250 == 0:
+            root.update_idletasks()
+    done()
+
+
+def pages(root, listbox, names: list, page: int, done, start: int = 0):
+    listbox.insert("end", *names[start:start + page])
+    if start + page < len(names):
+        root.after(1, pages, root, listbox, names, page, done, start + page)
+    else:
+        done()
+
+
+def measure(fill, students: int, page: int) -> tuple:
+    root = tkinter.Tk()
+    listbox = tkinter.Listbox(root)
+    listbox.pack()
+    root.update()
+    names = [f"Student {n} Diver{n // 100}" for n in range(students)]
+    result = {}
+
+    def done():
+        result["seconds"] = time.perf_counter() - start
+        meter.running = False
+        root.after(TICK_MS * 2, root.quit)
+
+    meter = StallMeter(root)
+    start = time.perf_counter()
+    root.after(0, fill, root, listbox, names, page, done)
+    root.mainloop()
+    root.destroy()
+    return result["seconds"], meter.longest
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--students", type=int, default=10000, help="rows listed")
+    parser.add_argument("--page", type=int, default=1000, help="rows per insert call for 'pages'")
+    args = parser.parse_args()
+
+    print(f"{'method':<10}{'seconds':>10}{'longest stall ms':>18}")
+    for name, fill in (("per row", per_row), ("pages", pages)):
+        seconds, stall = measure(fill, args.students, args.page)
+        print(f"{name:<10}{seconds:>10.3f}{stall * 1000:>18.1f}")
+
+
+if __name__ == "__main__":
+    main()
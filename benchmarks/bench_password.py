@@ -0,0 +1,66 @@
+"""Time of checking an instructor password with each password KDF and cost, to choose the '[password]' settings.
+
+    python -m benchmarks.bench_password
+    python -m benchmarks.bench_password --kdf scrypt --n 16384 32768 65536
+
+Every Set Instructor that asks for the password waits this long, once per unlock session.  Around 50-250 ms is
+barely noticed and makes guessing a password from a copied 'instructor_data.json' slow.
+"""
+
+import argparse
+import statistics
+import time
+
+from instructor_assistant.instructors import (KDF_DEFAULTS, KDF_LEGACY, KDF_PBKDF2, KDF_SCRYPT, derive_key,
+                                              hash_password, verify_password)
+
+PASSWORD = "correct horse battery staple"
+
+
+def legacy_record(password: str) -> dict:
+    """A password saved before the KDF was configurable"""
+    return {"Salt": "f4368abca1e3a7c08181", "Hash": derive_key(KDF_LEGACY, {}, "f4368abca1e3a7c08181", password)}
+
+
+def settings(args) -> list:
+    """Return (label, password record) for every KDF and cost to time"""
+    records = []
+    if args.kdf in (KDF_LEGACY, "all"):
+        records.append((KDF_LEGACY, legacy_record(PASSWORD)))
+    if args.kdf in (KDF_PBKDF2, "all"):
+        for iterations in args.iterations:
+            records.append((f"{KDF_PBKDF2} iterations={iterations}",
+                            hash_password(PASSWORD, KDF_PBKDF2, {"iterations": iterations})))
+    if args.kdf in (KDF_SCRYPT, "all"):
+        for n in args.n:
+            records.append((f"{KDF_SCRYPT} n={n} r={args.r} p={args.p}",
+                            hash_password(PASSWORD, KDF_SCRYPT, {"n": n, "r": args.r, "p": args.p})))
+    return records
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--kdf", choices=[KDF_SCRYPT, KDF_PBKDF2, KDF_LEGACY, "all"], default="all")
+    parser.add_argument("--n", type=int, nargs="+", default=[2 ** 13, KDF_DEFAULTS[KDF_SCRYPT]["n"], 2 ** 15, 2 ** 16],
+                        help="scrypt costs (powers of two)")
+    parser.add_argument("--r", type=int, default=KDF_DEFAULTS[KDF_SCRYPT]["r"], help="scrypt block size")
+    parser.add_argument("--p", type=int, default=KDF_DEFAULTS[KDF_SCRYPT]["p"], help="scrypt parallelism")
+    parser.add_argument("--iterations", type=int, nargs="+",
+                        default=[200000, KDF_DEFAULTS[KDF_PBKDF2]["iterations"], 1200000],
+                        help="PBKDF2 iteration counts")
+    parser.add_argument("--repeat", type=int, default=5, help="checks per setting, the median is reported")
+    args = parser.parse_args()
+
+    print(f"{'kdf':<40}{'median ms':>10}{'min ms':>10}")
+    for label, record in settings(args):
+        instructor = {"Password": record}
+        times = []
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            assert verify_password(instructor, PASSWORD)
+            times.append(time.perf_counter() - start)
+        print(f"{label:<40}{statistics.median(times) * 1000:>10.1f}{min(times) * 1000:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
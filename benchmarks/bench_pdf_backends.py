@@ -0,0 +1,63 @@
+"""Forms per second and peak RSS of each pdf fill backend.
+
+    python -m benchmarks.bench_pdf_backends --forms 100
+
+Each backend runs in its own process so the peak RSS of one does not hide the other.  Peak RSS needs the
+'resource' module and is reported as n/a on Windows.
+"""
+
+import argparse
+import io
+import json
+import multiprocessing
+import os
+import sys
+import time
+
+from instructor_assistant.form_template import BACKENDS, get_form_template
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+STUDENT_AND_REFERRAL_FORM = os.path.join(ROOT, "assets", "Record_and_Referral_Form.pdf")
+PDF_FORM_FIELDS = os.path.join(ROOT, "config", "pdf_form_fields.json")
+
+
+def peak_rss_mb():
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # --- kilobytes on Linux, bytes on macOS
+    return peak / 1024 ** 2 if sys.platform == "darwin" else peak / 1024
+
+
+def run_backend(backend: str, forms: int) -> dict:
+    with open(PDF_FORM_FIELDS) as data:
+        fields = json.load(data)
+    template = get_form_template(STUDENT_AND_REFERRAL_FORM, backend)
+
+    start = time.perf_counter()
+    for n in range(forms):
+        template.write(io.BytesIO(), dict(fields, **{"Student Name": f"Student {n}", "CW 1": n % 28 + 1,
+                                                     "Check Box20": "Yes"}))
+    elapsed = time.perf_counter() - start
+    return {"backend": backend, "forms_per_second": forms / elapsed, "peak_rss_mb": peak_rss_mb()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--forms", type=int, default=50, help="forms filled per backend")
+    args = parser.parse_args()
+
+    # --- a fresh process per backend
+    with multiprocessing.get_context("spawn").Pool(1, maxtasksperchild=1) as pool:
+        results = [pool.apply(run_backend, (backend, args.forms)) for backend in BACKENDS]
+
+    print(f"{'backend':<10}{'forms/s':>10}{'peak RSS':>12}")
+    for result in results:
+        rss = "n/a" if result["peak_rss_mb"] is None else f"{result['peak_rss_mb']:.1f} MB"
+        print(f"{result['backend']:<10}{result['forms_per_second']:>10.1f}{rss:>12}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,184 @@
+"""Time each stage of the form pipeline on synthetic rosters, without a display.
+
+    python -m benchmarks.bench_pipeline --sizes 10 1000 10000 --output results.json
+    python -m benchmarks.bench_pipeline --output new.json --compare results.json
+
+Stages, each timed over every student of the roster (best of '--repeat' runs):
+    roster_import     read_roster: excel roster -> Student
+    execute_template  calendar dates and switches of the dive template
+    set_date          dates and dive numbers onto the form fields
+    set_instructor    instructor block, initials and PADI numbers
+    select_student    StudentGroup lookup of the Student Diver list row selected, by its student ID
+    set_student       student information onto a copy of the course fields
+    template_parse    parse of the blank form (once per size, not per student)
+    generate_pdf      FormTemplate.write of the filled form, for the first '--pdf-forms' students only
+
+Results are written as JSON.  '--compare' prints the change of each stage's time per item against an earlier
+results file and exits with status 1 if any stage is slower than '--tolerance' times the earlier time.
+"""
+
+import argparse
+import datetime
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+
+from benchmarks.synthetic import write_roster
+from instructor_assistant.batch import student_record_fields
+from instructor_assistant.dive_template import calendar_dates, load_dive_templates, section_values
+from instructor_assistant.field_map import SECTIONS, FieldMap
+from instructor_assistant.form_template import BACKENDS, DEFAULT_BACKEND
+from instructor_assistant.instructors import load_instructors
+from instructor_assistant.roster import read_roster
+from instructor_assistant.students import StudentGroup
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CONFIG = os.path.join(ROOT, "config")
+STUDENT_AND_REFERRAL_FORM = os.path.join(ROOT, "assets", "Record_and_Referral_Form.pdf")
+TEMPLATE = "Example Template"
+DATE = datetime.date(2023, 6, 1)
+
+
+def best_time(function, repeat: int) -> float:
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def stage(seconds: float, items: int) -> dict:
+    return {"seconds": seconds, "items": items, "per_item_ms": seconds / items * 1000 if items else 0,
+            "items_per_second": items / seconds if seconds else 0}
+
+
+def run_size(students: int, workdir: str, repeat: int, pdf_forms: int, backend: str) -> dict:
+    roster_path = os.path.join(workdir, f"roster_{students}.xlsx")
+    write_roster(roster_path, students)
+
+    with open(os.path.join(CONFIG, "pdf_form_fields.json")) as data:
+        form_fields = json.load(data)
+    field_map = FieldMap.load(os.path.join(CONFIG, "field_map.json"))
+    template = load_dive_templates(os.path.join(CONFIG, "dive_template_data.json"))[TEMPLATE]
+    instructor = next(iter(load_instructors(os.path.join(CONFIG, "instructor_data.json")).values()))
+
+    results = {}
+    roster = read_roster(roster_path)
+    results["roster_import"] = stage(best_time(lambda: read_roster(roster_path), repeat), students)
+
+    # --- the Main UI maps the course onto the form for every student it generates
+    results["execute_template"] = stage(best_time(
+        lambda: [calendar_dates(template, DATE) for _ in roster], repeat), students)
+
+    values, selected = section_values(field_map, template, DATE)
+
+    def set_date():
+        for _ in roster:
+            fields = dict(form_fields)
+            for section in SECTIONS:
+                field_map.set_dates(fields, section, values[section])
+
+    def set_instructor():
+        for _ in roster:
+            fields = dict(form_fields)
+            field_map.set_instructor_details(fields, instructor, DATE)
+            for section in SECTIONS:
+                field_map.set_initials(fields, section, selected[section], instructor)
+
+    results["set_date"] = stage(best_time(set_date, repeat), students)
+    results["set_instructor"] = stage(best_time(set_instructor, repeat), students)
+    student_group = StudentGroup()
+    student_ids = [student_group.add(student) for student in roster]
+    results["select_student"] = stage(best_time(
+        lambda: [student_group.get(student_ids[row]) for row in range(students)], repeat), students)
+    results["set_student"] = stage(best_time(
+        lambda: [student_record_fields(form_fields, student) for student in roster], repeat), students)
+
+    template_class = BACKENDS[backend]
+    form_template = template_class(STUDENT_AND_REFERRAL_FORM)
+    results["template_parse"] = stage(best_time(lambda: template_class(STUDENT_AND_REFERRAL_FORM), repeat), 1)
+
+    forms = min(pdf_forms, students)
+    field_dicts = [student_record_fields(form_fields, student) for student in roster[:forms]]
+
+    def generate_pdf():
+        for n, fields in enumerate(field_dicts):
+            form_template.write(os.path.join(workdir, f"form_{n}.pdf"), fields)
+
+    results["generate_pdf"] = stage(best_time(generate_pdf, repeat), forms)
+    return results
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return ""
+
+
+def compare(results: dict, baseline: dict, tolerance: float) -> bool:
+    """Print the change of every stage against 'baseline' and return True if none is slower than 'tolerance'"""
+    ok = True
+    print(f"\n{'students':>9} {'stage':<17}{'before ms':>11}{'after ms':>11}{'change':>9}")
+    for size, stages in results["sizes"].items():
+        for name, result in stages.items():
+            before = baseline.get("sizes", {}).get(size, {}).get(name)
+            if not before or not before["per_item_ms"]:
+                continue
+            ratio = result["per_item_ms"] / before["per_item_ms"]
+            slower = ratio > tolerance
+            ok = ok and not slower
+            print(f"{size:>9} {name:<17}{before['per_item_ms']:>11.4f}{result['per_item_ms']:>11.4f}"
+                  f"{ratio - 1:>+9.0%}{'  SLOWER' if slower else ''}")
+    return ok
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 1000, 10000], help="roster sizes")
+    parser.add_argument("--repeat", type=int, default=3, help="runs per stage, the best is kept")
+    parser.add_argument("--pdf-forms", type=int, default=20, help="forms written by the generate_pdf stage")
+    parser.add_argument("--backend", choices=BACKENDS, default=DEFAULT_BACKEND, help="pdf fill backend")
+    parser.add_argument("--output", default="bench_pipeline.json", help="results file")
+    parser.add_argument("--compare", help="earlier results file to compare against")
+    parser.add_argument("--tolerance", type=float, default=1.25,
+                        help="slowest allowed time per item, as a multiple of the compared time")
+    args = parser.parse_args(argv)
+
+    results = {
+        "commit": git_commit(),
+        "timestamp": datetime.datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "backend": args.backend,
+        "repeat": args.repeat,
+        "sizes": {},
+    }
+    print(f"{'students':>9} {'stage':<17}{'seconds':>10}{'ms/item':>11}{'items/s':>12}")
+    with tempfile.TemporaryDirectory() as workdir:
+        for size in args.sizes:
+            stages = results["sizes"][str(size)] = run_size(size, workdir, args.repeat, args.pdf_forms, args.backend)
+            for name, result in stages.items():
+                print(f"{size:>9} {name:<17}{result['seconds']:>10.4f}{result['per_item_ms']:>11.4f}"
+                      f"{result['items_per_second']:>12.1f}")
+
+    with open(args.output, "w") as results_file:
+        json.dump(results, results_file, indent=4)
+    print(f"\nResults written to {args.output}")
+
+    if args.compare:
+        with open(args.compare) as baseline_file:
+            if not compare(results, json.load(baseline_file), args.tolerance):
+                return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
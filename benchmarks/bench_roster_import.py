@@ -0,0 +1,88 @@
+"""Time and peak memory of importing a roster: the previous pandas import against the streaming reader, and the
+streaming reader across roster formats.
+
+    python -m benchmarks.bench_roster_import --sizes 1000 10000
+    python -m benchmarks.bench_roster_import --sizes 10000 --formats xlsx csv jsonl parquet
+
+    pandas     read_excel -> to_dict(orient="records") -> Student, the whole roster held three times
+    streaming  'iter_roster', students counted as they arrive and not kept, as a consumer that stores them
+               elsewhere (the Student Diver list, a database) would see it
+    list       'read_roster', every Student kept
+
+The pandas import is run for excel rosters only, and every format after the first with 'list' only.  Parquet
+needs pyarrow and is skipped without it.  Peak memory is measured with tracemalloc in a separate run from the
+timing, and covers Python allocations only.
+"""
+
+import argparse
+import importlib.util
+import os
+import tempfile
+import time
+import tracemalloc
+
+from benchmarks.synthetic import write_roster
+from instructor_assistant.roster import STUDENT_COLUMNS, iter_roster, read_roster
+from instructor_assistant.students import Student
+
+
+def pandas_import(path: str) -> list:
+    import pandas
+
+    return [Student(**{column: info[column] for column in STUDENT_COLUMNS})
+            for info in pandas.read_excel(path).to_dict(orient="records")]
+
+
+def streaming_import(path: str) -> int:
+    return sum(1 for _ in iter_roster(path))
+
+
+def first_student_seconds(path: str) -> float:
+    start = time.perf_counter()
+    next(iter_roster(path))
+    return time.perf_counter() - start
+
+
+def measure(function, path: str) -> tuple:
+    start = time.perf_counter()
+    function(path)
+    seconds = time.perf_counter() - start
+
+    tracemalloc.start()
+    function(path)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return seconds, peak / 1024 ** 2
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000], help="roster sizes")
+    parser.add_argument("--formats", nargs="+", default=["xlsx", "csv", "jsonl", "parquet"],
+                        choices=["xlsx", "csv", "jsonl", "parquet"], help="roster formats")
+    args = parser.parse_args()
+    formats = [extension for extension in args.formats
+               if extension != "parquet" or importlib.util.find_spec("pyarrow") is not None]
+
+    # --- load pandas and openpyxl before timing
+    import pandas  # noqa: F401
+    import openpyxl  # noqa: F401
+
+    print(f"{'students':>9} {'format':<8}{'import':<10}{'seconds':>10}{'peak MB':>10}{'first row s':>13}")
+    with tempfile.TemporaryDirectory() as workdir:
+        for size in args.sizes:
+            for n, extension in enumerate(formats):
+                path = os.path.join(workdir, f"roster_{size}.{extension}")
+                write_roster(path, size)
+                imports = [("list", read_roster)]
+                if not n:
+                    imports[:0] = [("pandas", pandas_import)] if extension == "xlsx" else []
+                    imports[-1:-1] = [("streaming", streaming_import)]
+                for name, function in imports:
+                    seconds, peak = measure(function, path)
+                    first = f"{first_student_seconds(path):>13.4f}" if name != "pandas" else f"{'':>13}"
+                    print(f"{size:>9} {extension:<8}{name:<10}{seconds:>10.3f}{peak:>10.1f}{first}")
+
+
+if __name__ == "__main__":
+    main()
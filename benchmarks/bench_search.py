@@ -0,0 +1,45 @@
+"""Time of every keystroke of the Student Diver search box, for a course of synthetic students.
+
+    python -m benchmarks.bench_search --students 50000
+
+Each query is typed one letter at a time, searching after every letter as the search box does.  The slowest
+keystroke of each query should stay within a few milliseconds.
+"""
+
+import argparse
+import time
+
+from benchmarks.synthetic import roster_rows
+from instructor_assistant.search import StudentSearch
+from instructor_assistant.students import Student
+
+DEFAULT_QUERIES = ["c", "cor", "finn harbour", "atoll12", "email", "555-9", "555-988-0000", "zz"]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--students", type=int, default=50000, help="students in the course")
+    parser.add_argument("--queries", nargs="+", default=DEFAULT_QUERIES, help="queries typed")
+    args = parser.parse_args()
+
+    students = [Student(**row) for row in roster_rows(args.students)]
+    start = time.perf_counter()
+    search = StudentSearch()
+    for student_id, student in enumerate(students):
+        search.add(student_id, student)
+    print(f"index of {len(search)} students built in {time.perf_counter() - start:.2f} s")
+
+    print(f"{'query':<12}{'results':>9}{'slowest ms':>12}{'total ms':>10}")
+    for query in args.queries:
+        search.search("")
+        slowest = total = 0
+        for length in range(1, len(query) + 1):
+            start = time.perf_counter()
+            results = search.search(query[:length])
+            elapsed = time.perf_counter() - start
+            slowest, total = max(slowest, elapsed), total + elapsed
+        print(f"{query:<12}{len(results or ()):>9}{slowest * 1000:>12.2f}{total * 1000:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
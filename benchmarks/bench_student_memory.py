@@ -0,0 +1,70 @@
+"""Memory held by a roster of students once imported: the previous dataclass with a __dict__ per student against
+the __slots__ Student, alone and added to a StudentGroup.
+
+    python -m benchmarks.bench_student_memory --students 50000
+
+    dict       one dataclass with a __dict__ per student, as Student was before
+    slots      the __slots__ Student, in a list
+    group      the __slots__ Student in a StudentGroup, category strings (sex, city, province, country) shared and
+               the ID and name indexes included
+
+Students are read from a synthetic CSV roster, so every value is a new string as it is after an import.  Memory is
+what tracemalloc counts as still allocated once the roster is loaded, Python allocations only.
+"""
+
+import argparse
+import csv
+import dataclasses
+import os
+import tempfile
+import time
+import tracemalloc
+
+from benchmarks.synthetic import write_roster
+from instructor_assistant.students import STUDENT_FIELDS, Student, StudentGroup
+
+DictStudent = dataclasses.make_dataclass("DictStudent", STUDENT_FIELDS)
+
+
+def load_list(path: str, student_class) -> list:
+    with open(path, newline="", encoding="utf-8") as roster_file:
+        rows = csv.reader(roster_file)
+        next(rows)
+        return [student_class(*row) for row in rows]
+
+
+def load_group(path: str) -> StudentGroup:
+    group = StudentGroup()
+    for student in load_list(path, Student):
+        group.add(student)
+    return group
+
+
+def measure(function) -> tuple:
+    tracemalloc.start()
+    start = time.perf_counter()
+    students = function()
+    seconds = time.perf_counter() - start
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return len(students), seconds, current / 1024 ** 2
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--students", type=int, default=50000, help="roster size")
+    args = parser.parse_args()
+
+    print(f"{'students':>9} {'storage':<8}{'MB':>8}{'bytes/student':>15}{'seconds':>9}")
+    with tempfile.TemporaryDirectory() as workdir:
+        path = os.path.join(workdir, "roster.csv")
+        write_roster(path, args.students)
+        for name, function in (("dict", lambda: load_list(path, DictStudent)),
+                               ("slots", lambda: load_list(path, Student)),
+                               ("group", lambda: load_group(path))):
+            students, seconds, megabytes = measure(function)
+            print(f"{students:>9} {name:<8}{megabytes:>8.1f}{megabytes * 1024 ** 2 / students:>15.0f}{seconds:>9.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""Synthetic course rosters for the benchmarks."""
+
+import csv
+import datetime
+import json
+import os
+import random
+
+from instructor_assistant.roster import STUDENT_COLUMNS
+
+FIRST_NAMES = ("Ariel", "Ursula", "Flounder", "Sebastian", "Eric", "Marina", "Coral", "Finn", "Kai", "Nerissa")
+LAST_NAMES = ("Reef", "Kelp", "Wave", "Tide", "Shore", "Current", "Harbour", "Lagoon", "Atoll", "Bay")
+
+
+def roster_rows(students: int, seed: int = 0) -> list:
+    """Return 'students' roster rows (column -> value).  Names repeat, like a real roster with duplicate names,
+    and dates of birth are a mix of excel dates and dd/mm/yyyy text."""
+    rng = random.Random(seed)
+    rows = []
+    for n in range(students):
+        first_name, last_name = rng.choice(FIRST_NAMES), f"{rng.choice(LAST_NAMES)}{n // 100}"
+        date_of_birth = datetime.datetime(1960, 1, 1) + datetime.timedelta(days=rng.randrange(20000))
+        rows.append(dict(zip(STUDENT_COLUMNS, (
+            first_name,
+            last_name,
+            date_of_birth if n % 2 else date_of_birth.strftime("%d/%m/%Y"),
+            rng.choice(("male", "female")),
+            f"555-{rng.randrange(1000):03d}-{n % 10000:04d}",
+            f"{first_name.lower()}.{last_name.lower()}{n}@email.com",
+            f"{rng.randrange(1, 999)} Under the Sea Street",
+            "Atlantis",
+            "UW",
+            "H20 SEA",
+            "OCEAN",
+        ))))
+    return rows
+
+
+def text_value(value) -> str:
+    return value.strftime("%d/%m/%Y") if isinstance(value, datetime.datetime) else value
+
+
+def write_roster(path: str, students: int, seed: int = 0):
+    """Write a roster of 'students' synthetic students, in the format of the extension of 'path': .xlsx, .csv,
+    .jsonl or .parquet (needs pyarrow).  Text formats hold every date of birth as dd/mm/yyyy."""
+    rows = roster_rows(students, seed)
+    extension = os.path.splitext(path)[1].lower()
+    if extension == ".csv":
+        with open(path, "w", newline="", encoding="utf-8") as roster_file:
+            writer = csv.writer(roster_file)
+            writer.writerow(STUDENT_COLUMNS)
+            writer.writerows([text_value(row[column]) for column in STUDENT_COLUMNS] for row in rows)
+    elif extension == ".jsonl":
+        with open(path, "w", encoding="utf-8") as roster_file:
+            for row in rows:
+                roster_file.write(json.dumps({column: text_value(value) for column, value in row.items()}) + "\n")
+    elif extension == ".parquet":
+        import pyarrow
+        import pyarrow.parquet
+
+        pyarrow.parquet.write_table(pyarrow.table({column: [text_value(row[column]) for row in rows]
+                                                   for column in STUDENT_COLUMNS}), path)
+    else:
+        import pandas
+
+        pandas.DataFrame(rows, columns=list(STUDENT_COLUMNS)).to_excel(path, index=False)
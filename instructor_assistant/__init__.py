@@ -0,0 +1,5 @@
+"""Tk-free core of the Instructor Assistant.
+
+Everything in this package can run without a display so that the same student, form and batch logic is shared by
+the 'MainUI' desktop app and by background/batch tools.
+"""
@@ -0,0 +1,277 @@
+"""Generate a 'Record_and_Referral_Form' for every Student Diver of a course in one step."""
+
+import datetime
+import io
+import itertools
+import json
+import os
+import zipfile
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from dataclasses import dataclass
+
+from instructor_assistant.form_template import DEFAULT_BACKEND, FillpdfTemplate, get_form_template
+from instructor_assistant.forms import birth_date_parts, fields_hash, record_file_name, student_fields
+from instructor_assistant.jobs import Cancelled
+from instructor_assistant.record_cache import record_digest
+
+OUTPUT_FILES = "Separate PDFs"
+OUTPUT_COMBINED = "Single PDF"
+OUTPUT_ZIP = "ZIP Archive"
+OUTPUT_MODES = (OUTPUT_FILES, OUTPUT_COMBINED, OUTPUT_ZIP)
+
+MANIFEST_NAME = "manifest.json"
+
+
+@dataclass
+class BatchResult:
+    student_name: str
+    output_path: str
+    success: bool
+    error: str = ""
+    skipped: bool = False
+    cancelled: bool = False
+
+
+def fill_student_record(input_path: str, output_path: str, fields: dict, backend: str = DEFAULT_BACKEND) -> str:
+    """Write a single filled pdf.  Module level so it can run in a worker process, each worker parses the
+    template once."""
+    get_form_template(input_path, backend).write(output_path, fields)
+    return output_path
+
+
+def fill_student_record_bytes(input_path: str, fields: dict, backend: str = DEFAULT_BACKEND) -> bytes:
+    """Return a single filled pdf as bytes, without touching the disk"""
+    buffer = io.BytesIO()
+    get_form_template(input_path, backend).write(buffer, fields)
+    return buffer.getvalue()
+
+
+def student_record_fields(course_fields: dict, student) -> dict:
+    """Return an independent copy of the course 'fields' dictionary with the student's information applied.  Raises
+    ValueError if the student has no valid date of birth, rather than fill a form without it."""
+    birth_date_parts(student.date_of_birth)
+    fields = dict(course_fields)
+    fields.update(student_fields(student))
+    return fields
+
+
+def batch_jobs(course_fields: dict, students, save_path: str, date) -> list:
+    """Return (student name, output path, fields, error) for each student.  'fields' is None and 'error' is set if
+    the student's information can not be mapped onto the form."""
+    jobs = []
+    for student in students:
+        name = f"{student.first_name} {student.last_name}"
+        output_path = os.path.join(save_path, record_file_name(name, date))
+        try:
+            jobs.append((name, output_path, student_record_fields(course_fields, student), None))
+        except Exception as e:
+            jobs.append((name, output_path, None, e))
+    return jobs
+
+
+def run_jobs(function, jobs: list, processes=None, cancel=None):
+    """Call function(*args) for each (key, args) in 'jobs' and yield (key, result, error) as each call finishes.
+
+    processes: number of worker processes, None uses every CPU and 1 runs in the calling process.  At most two
+    calls per worker are queued at a time, so only that many results are held in memory however long 'jobs' is.
+    cancel: optional threading.Event.  Once set, calls that have not started yield a 'Cancelled' error and calls
+    already running are allowed to finish.
+    """
+    if processes == 1 or len(jobs) <= 1:
+        for key, args in jobs:
+            if cancel is not None and cancel.is_set():
+                yield key, None, Cancelled()
+                continue
+            try:
+                result = function(*args)
+            except Exception as e:
+                yield key, None, e
+            else:
+                yield key, result, None
+        return
+
+    window = 2 * (processes or os.cpu_count() or 1)
+    jobs = iter(jobs)
+    with ProcessPoolExecutor(max_workers=processes) as executor:
+        running = {}
+
+        def submit(count):
+            if cancel is not None and cancel.is_set():
+                return
+            for key, args in itertools.islice(jobs, count):
+                running[executor.submit(function, *args)] = key
+
+        submit(window)
+        while running:
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                key = running.pop(future)
+                try:
+                    result = future.result()
+                except Exception as e:
+                    yield key, None, e
+                else:
+                    yield key, result, None
+            if cancel is not None and cancel.is_set():
+                for future in [future for future in running if future.cancel()]:
+                    yield running.pop(future), None, Cancelled()
+            submit(len(done))
+
+    # --- never submitted
+    for key, _ in jobs:
+        yield key, None, Cancelled()
+
+
+def generate_batch(input_path: str, course_fields: dict, students, save_path: str, date,
+                   processes=None, progress=None, backend: str = DEFAULT_BACKEND, cache=None, force=False,
+                   cancel=None) -> list:
+    """Fill 'input_path' for every student and return a BatchResult per student, in roster order.
+
+    processes: number of worker processes, None uses every CPU and 1 fills in the calling process.
+    progress: optional callable(completed, total, result) called as each form finishes.
+    backend: pdf fill backend, see 'form_template.BACKENDS'.
+    cache: optional RecordCache.  Forms whose file already matches the student's fields and the template are
+        skipped, unless 'force' is True.
+    cancel: optional threading.Event, see 'run_jobs'.
+    """
+    jobs = batch_jobs(course_fields, students, save_path, date)
+    total = len(jobs)
+    results = [None] * total
+    digests = {}
+    completed = 0
+
+    def finish(index, error=None, skipped=False):
+        nonlocal completed
+        name, output_path, _, _ = jobs[index]
+        result = BatchResult(name, output_path, error is None, "" if error is None else str(error), skipped,
+                             isinstance(error, Cancelled))
+        if cache is not None and error is None and not skipped:
+            cache.record(output_path, digests[index])
+        results[index] = result
+        completed += 1
+        if progress is not None:
+            progress(completed, total, result)
+
+    for index, (_, _, _, error) in enumerate(jobs):
+        if error is not None:
+            finish(index, error)
+    pending = [(index, (input_path, output_path, fields, backend))
+               for index, (_, output_path, fields, error) in enumerate(jobs) if error is None]
+
+    if cache is not None:
+        template_hash = get_form_template(input_path, backend).hash
+        unchanged = set()
+        for index, (_, output_path, fields, _) in pending:
+            digests[index] = record_digest(fields, template_hash, backend)
+            if not force and cache.is_current(output_path, digests[index]):
+                unchanged.add(index)
+                finish(index, skipped=True)
+        pending = [job for job in pending if job[0] not in unchanged]
+
+    for index, _, error in run_jobs(fill_student_record, pending, processes, cancel):
+        finish(index, error)
+    if cache is not None:
+        cache.save()
+    return results
+
+
+def generate_zip(input_path: str, course_fields: dict, students, output_path: str, date,
+                 processes=None, progress=None, backend: str = DEFAULT_BACKEND, cancel=None) -> list:
+    """Fill 'input_path' for every student straight into the ZIP archive 'output_path' and return a BatchResult per
+    student, in roster order.
+
+    Each form is filled into an in-memory buffer and written to the archive as soon as it is ready, so no pdf is
+    saved on its own and memory use does not grow with the roster.  The archive ends with MANIFEST_NAME, listing
+    each student's file, generation time and 'fields_hash'.  If 'cancel' is set the archive keeps the forms
+    finished so far.
+    """
+    jobs = batch_jobs(course_fields, students, "", date)
+    total = len(jobs)
+    results = [None] * total
+    manifest = []
+    entry_names = set()
+    completed = 0
+
+    def finish(index, error=None):
+        nonlocal completed
+        result = BatchResult(jobs[index][0], output_path, error is None, "" if error is None else str(error),
+                             cancelled=isinstance(error, Cancelled))
+        results[index] = result
+        completed += 1
+        if progress is not None:
+            progress(completed, total, result)
+
+    with zipfile.ZipFile(output_path, "w", compression=zipfile.ZIP_DEFLATED) as archive:
+        for index, (_, _, _, error) in enumerate(jobs):
+            if error is not None:
+                finish(index, error)
+        pending = [(index, (input_path, fields, backend))
+                   for index, (_, _, fields, error) in enumerate(jobs) if error is None]
+
+        for index, pdf_bytes, error in run_jobs(fill_student_record_bytes, pending, processes, cancel):
+            if error is None:
+                name, file_name, fields, _ = jobs[index]
+                # --- two students with the same name get numbered entries
+                entry_name = file_name
+                copy = 1
+                while entry_name in entry_names:
+                    copy += 1
+                    entry_name = f"{os.path.splitext(file_name)[0]} ({copy}).pdf"
+                entry_names.add(entry_name)
+                archive.writestr(entry_name, pdf_bytes)
+                manifest.append({
+                    "student_name": name,
+                    "file": entry_name,
+                    "generated": datetime.datetime.now().isoformat(timespec="seconds"),
+                    "fields_hash": fields_hash(fields),
+                })
+            finish(index, error)
+
+        archive.writestr(MANIFEST_NAME, json.dumps(manifest, indent=4))
+    return results
+
+
+def generate_combined(input_path: str, course_fields: dict, students, output_path: str, progress=None,
+                      cancel=None) -> list:
+    """Fill 'input_path' for every student into the single pdf 'output_path', one copy of the form per student, and
+    return a BatchResult per student, in roster order.
+
+    Copies are added to the output document as they are filled and no single-student files are written.  The
+    combined pdf is always built with the fillpdf backend, whose copies share the form's page content.
+    progress: optional callable(completed, total, result) called as each student's copy is added.
+    cancel: optional threading.Event.  If it is set before the last copy is added no pdf is written.
+    """
+    total = len(students)
+    results = []
+
+    def report(result):
+        results.append(result)
+        if progress is not None:
+            progress(len(results), total, result)
+
+    def field_dicts():
+        for student in students:
+            if cancel is not None and cancel.is_set():
+                raise Cancelled()
+            name = f"{student.first_name} {student.last_name}"
+            try:
+                fields = student_record_fields(course_fields, student)
+            except Exception as e:
+                report(BatchResult(name, output_path, False, str(e)))
+                continue
+            yield fields
+            # --- resumed once the student's copy is added
+            report(BatchResult(name, output_path, True))
+
+    template = get_form_template(input_path, FillpdfTemplate.backend)
+    try:
+        template.write_combined(output_path, field_dicts())
+    except Exception as e:
+        cancelled = isinstance(e, Cancelled)
+        for result in results:
+            if result.success:
+                result.success, result.error, result.cancelled = False, str(e), cancelled
+        for student in students[len(results):]:
+            results.append(BatchResult(f"{student.first_name} {student.last_name}", output_path, False, str(e),
+                                       cancelled=cancelled))
+    return results
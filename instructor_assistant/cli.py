@@ -0,0 +1,156 @@
+"""Generate the 'Record_and_Referral_Form' of a whole course roster from the command line, without a display.
+
+    python -m instructor_assistant generate --roster roster.xlsx --template "Example Template"
+        --instructor "Example (pass:1234)" --out forms/
+
+The instructor password is read from the INSTRUCTOR_ASSISTANT_PASSWORD environment variable (see
+'--password-env'), or prompted for when run from a terminal.  Paths default to the 'config' and 'assets' folders
+of the current directory, as the Main UI does.
+"""
+
+import argparse
+import datetime
+import getpass
+import json
+import os
+import sys
+import time
+
+from instructor_assistant.batch import (OUTPUT_COMBINED, OUTPUT_FILES, OUTPUT_ZIP, generate_batch, generate_combined,
+                                        generate_zip)
+from instructor_assistant.dates import normalize_birth_dates
+from instructor_assistant.dive_template import load_dive_templates, template_fields
+from instructor_assistant.field_map import FieldMap
+from instructor_assistant.form_template import BACKENDS, DEFAULT_BACKEND
+from instructor_assistant.forms import combined_record_file_name
+from instructor_assistant.instructors import load_instructors, verify_password
+from instructor_assistant.record_cache import RecordCache
+from instructor_assistant.roster import DEFAULT_PROFILE, load_roster_profile
+from instructor_assistant.roster_cache import RosterCache
+
+PASSWORD_ENV = "INSTRUCTOR_ASSISTANT_PASSWORD"
+OUTPUTS = {"files": OUTPUT_FILES, "pdf": OUTPUT_COMBINED, "zip": OUTPUT_ZIP}
+
+
+def parse_date(text: str) -> datetime.date:
+    try:
+        return datetime.date.fromisoformat(text)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"'{text}' is not a YYYY-MM-DD date") from None
+
+
+def parse_dive_date(text: str) -> tuple:
+    code, _, date = text.partition("=")
+    if not code.isdigit() or not date:
+        raise argparse.ArgumentTypeError(f"'{text}' is not CODE=YYYY-MM-DD")
+    return int(code), parse_date(date)
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="python -m instructor_assistant",
+                                     description="Instructor Assistant batch tools")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    generate = commands.add_parser("generate", help="fill the Record and Referral Form for every student of a roster")
+    generate.add_argument("--roster", required=True, help="course roster: excel (.xlsx), CSV, JSON Lines or Parquet")
+    generate.add_argument("--roster-profile", default=DEFAULT_PROFILE,
+                          help="roster header-mapping profile from roster_profiles.json (default %(default)s)")
+    generate.add_argument("--template", required=True, help="dive template name")
+    generate.add_argument("--instructor", help="saved instructor name, leave out to skip the instructor fields")
+    generate.add_argument("--out", required=True, help="output folder")
+    generate.add_argument("--date", type=parse_date, default=datetime.date.today(),
+                          help="date of every calendar, the instructor sign off and the file names "
+                               "(YYYY-MM-DD, default today)")
+    generate.add_argument("--dive-date", type=parse_dive_date, action="append", default=[], metavar="CODE=DATE",
+                          help="date of one template calendar code (0 - 27), may be repeated")
+    generate.add_argument("--output", choices=OUTPUTS, default="files",
+                          help="separate pdf files, a single pdf or a ZIP archive (default files)")
+    generate.add_argument("--processes", type=int, default=0, help="worker processes, 0 uses every CPU")
+    generate.add_argument("--backend", choices=BACKENDS, default=DEFAULT_BACKEND, help="pdf fill backend")
+    generate.add_argument("--force", action="store_true", help="rewrite forms that are already up to date")
+    generate.add_argument("--password-env", default=PASSWORD_ENV,
+                          help=f"environment variable holding the instructor password (default {PASSWORD_ENV})")
+    generate.add_argument("--config", default="config", help="config folder (default ./config)")
+    generate.add_argument("--form", default=os.path.join("assets", "Record_and_Referral_Form.pdf"),
+                          help="blank Record and Referral Form pdf")
+    return parser
+
+
+def instructor_password(args) -> str:
+    password = os.environ.get(args.password_env)
+    if password is None and sys.stdin.isatty():
+        password = getpass.getpass(f"Password for {args.instructor}: ")
+    return password
+
+
+def generate(args, parser) -> int:
+    templates = load_dive_templates(os.path.join(args.config, "dive_template_data.json"))
+    if args.template not in templates:
+        parser.error(f"unknown template '{args.template}'. Choose from: {', '.join(templates)}")
+
+    instructor = None
+    if args.instructor is not None:
+        instructors = load_instructors(os.path.join(args.config, "instructor_data.json"))
+        if args.instructor not in instructors:
+            parser.error(f"unknown instructor '{args.instructor}'. Choose from: {', '.join(instructors)}")
+        instructor = instructors[args.instructor]
+        password = instructor_password(args)
+        if password is None:
+            parser.error(f"set {args.password_env} to the instructor password")
+        if not verify_password(instructor, password):
+            print("Wrong Password", file=sys.stderr)
+            return 1
+
+    field_map = FieldMap.load(os.path.join(args.config, "field_map.json"))
+    with open(os.path.join(args.config, "pdf_form_fields.json")) as data:
+        form_fields = json.load(data)
+    course_fields = template_fields(form_fields, field_map, templates[args.template], args.date,
+                                    dict(args.dive_date), instructor, args.date)
+
+    try:
+        profile = load_roster_profile(os.path.join(args.config, "roster_profiles.json"), args.roster_profile)
+        students = list(RosterCache(os.path.join(args.config, "roster_cache")).iter_roster(args.roster, profile))
+    except ValueError as e:
+        parser.error(str(e))
+    except KeyError as e:
+        parser.error(f"roster '{args.roster}' has no {e} column")
+    for error in normalize_birth_dates(students):
+        student = students[error.row]
+        print(f"Warning: {student.first_name} {student.last_name} (entry {error.row + 1}): {error.message}",
+              file=sys.stderr)
+    os.makedirs(args.out, exist_ok=True)
+    processes = args.processes or None
+    start = time.perf_counter()
+    output = OUTPUTS[args.output]
+    if output == OUTPUT_COMBINED:
+        results = generate_combined(args.form, course_fields, students,
+                                    os.path.join(args.out, combined_record_file_name(args.date)))
+    elif output == OUTPUT_ZIP:
+        results = generate_zip(args.form, course_fields, students,
+                               os.path.join(args.out, combined_record_file_name(args.date, "zip")), args.date,
+                               processes=processes, backend=args.backend)
+    else:
+        results = generate_batch(args.form, course_fields, students, args.out, args.date, processes=processes,
+                                 backend=args.backend,
+                                 cache=RecordCache(os.path.join(args.config, "generated_records.json")),
+                                 force=args.force)
+    seconds = time.perf_counter() - start
+
+    failed = [result for result in results if not result.success]
+    for result in failed:
+        print(f"{result.student_name}: {result.error}", file=sys.stderr)
+    generated = len(results) - len(failed) - sum(result.skipped for result in results)
+    print(f"{generated} generated, {sum(result.skipped for result in results)} unchanged, {len(failed)} failed "
+          f"of {len(results)} students in {seconds:.2f}s ({generated / seconds if seconds else 0:.1f} forms/s)")
+    return 1 if failed else 0
+
+
+def main(argv=None) -> int:
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    try:
+        if args.command == "generate":
+            return generate(args, parser)
+    except FileNotFoundError as e:
+        parser.error(f"{e.strerror}: '{e.filename}'")
+    return 2
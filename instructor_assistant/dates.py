@@ -0,0 +1,105 @@
+"""Dates of birth read from a roster, normalized to datetime.date once for the whole column at import.
+
+Rosters mix excel date cells (datetime), text in the form's dd/mm/yyyy order with '/', '-' or '.' separators and
+two or four digit years, ISO yyyy-mm-dd text (with or without a time, as CSV exports of date cells have), month names
+('21 Apr 1990', 'April 21, 1990') and excel serial day numbers.  Each distinct value is parsed once, so a column
+costs one dictionary lookup per row plus one parse per distinct date.
+"""
+
+import dataclasses
+import datetime
+import re
+
+DAY_FIRST = re.compile(r"(\d{1,2})[/.\-](\d{1,2})[/.\-](\d{4}|\d{2})")
+ISO = re.compile(r"(\d{4})-(\d{1,2})-(\d{1,2})(?:[T ]\d{1,2}:\d{2}(?::\d{2}(?:\.\d+)?)?)?")
+# --- serial day numbers as text have five digits (1927 onwards), so a year on its own is not read as one
+SERIAL = re.compile(r"\d{5}(?:\.0+)?")
+MONTH_NAME_FORMATS = ("%d %b %Y", "%d %B %Y", "%b %d %Y", "%B %d %Y", "%b %d, %Y", "%B %d, %Y")
+EXCEL_EPOCH = datetime.date(1899, 12, 30)
+EARLIEST_BIRTH_YEAR = 1900
+
+
+@dataclasses.dataclass
+class DateError:
+    row: int  # --- position of the student in the roster
+    value: object
+    message: str
+
+
+def parse_date(value, today: datetime.date):
+    """Return the datetime.date of 'value', or raise ValueError with the reason it is not a date of birth"""
+    if isinstance(value, datetime.datetime):
+        date = value.date()
+    elif isinstance(value, datetime.date):
+        date = value
+    elif isinstance(value, (int, float)) and not isinstance(value, bool):
+        date = excel_serial_date(value)
+    else:
+        text = str(value).strip()
+        if not text:
+            raise ValueError("no date of birth")
+        date = parse_text(text, today)
+    if date > today:
+        raise ValueError("date of birth is in the future")
+    if date.year < EARLIEST_BIRTH_YEAR:
+        raise ValueError(f"date of birth is before {EARLIEST_BIRTH_YEAR}")
+    return date
+
+
+def parse_text(text: str, today: datetime.date) -> datetime.date:
+    try:
+        if match := DAY_FIRST.fullmatch(text):
+            day, month, year = (int(part) for part in match.groups())
+            if len(match.group(3)) == 2:
+                # --- two digit years are the latest year that is not in the future
+                year += 2000 if year <= today.year % 100 else 1900
+            return datetime.date(year, month, day)
+        if match := ISO.fullmatch(text):
+            year, month, day = (int(part) for part in match.groups())
+            return datetime.date(year, month, day)
+    except ValueError:
+        raise ValueError(f"'{text}' is not a real date, dates are dd/mm/yyyy") from None
+    if SERIAL.fullmatch(text):
+        return excel_serial_date(float(text))
+    for date_format in MONTH_NAME_FORMATS:
+        try:
+            return datetime.datetime.strptime(text, date_format).date()
+        except ValueError:
+            pass
+    raise ValueError(f"'{text}' is not a dd/mm/yyyy date")
+
+
+def excel_serial_date(days) -> datetime.date:
+    try:
+        return EXCEL_EPOCH + datetime.timedelta(days=int(days))
+    except OverflowError:
+        raise ValueError(f"{days} is not an excel date") from None
+
+
+def normalize_dates(values, today: datetime.date = None) -> tuple:
+    """Return ([datetime.date, or the value itself where it is not a date], [DateError, ...]) for a column of
+    dates of birth"""
+    today = today or datetime.date.today()
+    parsed = {}  # --- distinct value -> (date, error message)
+    dates, errors = [], []
+    for row, value in enumerate(values):
+        key = (type(value), value)
+        if key not in parsed:
+            try:
+                parsed[key] = (parse_date(value, today), None)
+            except ValueError as e:
+                parsed[key] = (value, str(e))
+        date, message = parsed[key]
+        dates.append(date)
+        if message is not None:
+            errors.append(DateError(row, value, message))
+    return dates, errors
+
+
+def normalize_birth_dates(students: list, today: datetime.date = None) -> list:
+    """Replace the date_of_birth of every student of 'students' with its datetime.date, and return a DateError for
+    every student whose date of birth is not a date (those are left as they were)"""
+    dates, errors = normalize_dates([student.date_of_birth for student in students], today)
+    for student, date in zip(students, dates):
+        student.date_of_birth = date
+    return errors
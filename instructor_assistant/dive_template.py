@@ -0,0 +1,76 @@
+"""Dive templates ('config/dive_template_data.json') applied to a 'fields' dictionary without the Main UI.
+
+A template holds the Main UI inputs of a course:
+    calendar_entries  one code per calendar (Confined Water, Knowledge Development, then the Open Water dive and
+                      sign off calendars).  Code n copies the date of calendar n, "--" keeps the calendar's own date
+    switches          1/0 for every Main UI row, in 'field_map' row order
+    knowledge_quiz    Knowledge Development quiz/exam scores
+    dive_flex         Open Water Flexible Skill dive numbers
+    course_option     1/0 for rdp, erdpml and computer
+"""
+
+import itertools
+import json
+
+from instructor_assistant.field_map import SECTIONS
+
+COURSE_OPTIONS = ("rdp", "erdpml", "computer")
+NOT_SET = "--"
+
+
+def load_dive_templates(path: str) -> dict:
+    """Return the saved dive templates, template name -> template"""
+    with open(path, "r") as data_file:
+        return json.load(data_file)
+
+
+def calendar_dates(template: dict, default_date, dates: dict = None) -> list:
+    """Return the date of every calendar after the template is applied, as 'execute_template' sets the Main UI
+    calendars.  Calendars start at 'default_date', or dates[code] for the codes in 'dates'."""
+    calendars = [default_date] * len(template["calendar_entries"])
+    for code, date in (dates or {}).items():
+        calendars[code] = date
+    for index, code in enumerate(template["calendar_entries"]):
+        if code != NOT_SET:
+            calendars[index] = calendars[int(code)]
+    return calendars
+
+
+def section_values(field_map, template: dict, default_date, dates: dict = None) -> tuple:
+    """Return ({section: 'set_dates' values}, {section: row switched on}) for the template, the inputs 'set_date'
+    and 'set_instructor' read from the Main UI after 'execute_template'."""
+    calendars = iter(calendar_dates(template, default_date, dates))
+    dive_flex = iter(template["dive_flex"])
+    switches = iter(template["switches"])
+
+    values, selected = {}, {}
+    for section in SECTIONS:
+        rows = field_map.rows(section)
+        selected[section] = [switch != 0 for switch in itertools.islice(switches, len(rows))]
+        values[section] = []
+        for row, on in zip(rows, selected[section]):
+            value = next(calendars) if "date" in row else next(dive_flex, "")
+            values[section].append(None if not on else "" if value == NOT_SET else value)
+    return values, selected
+
+
+def template_fields(form_fields: dict, field_map, template: dict, default_date, dates: dict = None,
+                    instructor: dict = None, instructor_date=None) -> dict:
+    """Return a copy of 'form_fields' filled the way the Main UI fills it after 'Set Template', 'Set Date/Dive',
+    'Set Instructor' (if 'instructor' is given, dated 'instructor_date') and 'Generate PDF'."""
+    fields = dict(form_fields)
+    values, selected = section_values(field_map, template, default_date, dates)
+    for section in SECTIONS:
+        field_map.set_dates(fields, section, values[section])
+
+    if instructor is not None:
+        field_map.set_instructor_details(fields, instructor, instructor_date or default_date)
+        for section in SECTIONS:
+            field_map.set_initials(fields, section, selected[section], instructor)
+
+    field_map.set_course_options(fields, dict(zip(COURSE_OPTIONS, (option == 1 for option in
+                                                                   template["course_option"]))))
+    # --- knowledge review and video boxes start checked and are cleared for switched off rows
+    knowledge_development = selected["knowledge_development"]
+    field_map.set_knowledge_checks(fields, knowledge_development, knowledge_development, template["knowledge_quiz"])
+    return fields
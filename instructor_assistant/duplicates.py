@@ -0,0 +1,117 @@
+"""Find the same Student Diver entered twice in a roster, for example by two booking channels.
+
+Every student is indexed under a few normalized keys: the exact key (name, date of birth and email, 'student_key')
+and looser keys that catch near duplicates (name and date of birth, email and first name, phone and first name).
+A student that shares any key with an earlier one is a duplicate of it.  Each student is looked up once per key in a
+dictionary, so finding duplicates takes time linear in the roster size, with no pairwise comparison.
+"""
+
+import dataclasses
+import datetime
+import re
+import unicodedata
+
+from instructor_assistant.students import STUDENT_FIELDS, student_key
+
+EXACT_REASON = "same name, date of birth and email"
+
+
+@dataclasses.dataclass
+class Duplicate:
+    row: int  # --- position of the duplicate in the student list
+    original: int  # --- position of the first student it duplicates
+    exact: bool
+    reason: str
+
+
+def normalize_text(value) -> str:
+    """'  Zoë O'Brien ' -> 'zoe obrien'"""
+    text = unicodedata.normalize("NFKD", "" if value is None else str(value))
+    text = "".join(character for character in text if not unicodedata.combining(character))
+    return " ".join(re.sub(r"[^\w\s]", "", text.casefold()).split())
+
+
+def normalize_date(value) -> str:
+    """'1/4/1990', '01/04/1990 ' and datetime(1990, 4, 1) -> '1/4/1990'"""
+    if isinstance(value, (datetime.datetime, datetime.date)):
+        return f"{value.day}/{value.month}/{value.year}"
+    parts = re.findall(r"\d+", "" if value is None else str(value))
+    return "/".join(str(int(part)) for part in parts) if len(parts) == 3 else normalize_text(value)
+
+
+def normalize_email(value) -> str:
+    """' Jane.Diver+booking@Email.com' -> 'jane.diver@email.com'"""
+    email = str(value or "").strip().casefold()
+    local, at, domain = email.partition("@")
+    return f"{local.split('+')[0]}{at}{domain}"
+
+
+def match_keys(student) -> list:
+    """Return (key, reason) for the near duplicate keys of 'student' that it has values for"""
+    first_name = normalize_text(student.first_name)
+    name = " ".join(sorted(f"{first_name} {normalize_text(student.last_name)}".split()))
+    date_of_birth = normalize_date(student.date_of_birth)
+    email = normalize_email(student.email)
+    phone = re.sub(r"\D", "", str(student.phone or ""))[-10:]
+
+    keys = []
+    if name and date_of_birth:
+        # --- name words sorted, first and last name swapped still match
+        keys.append((f"name+dob:{name}|{date_of_birth}", "same name and date of birth"))
+    # --- a family can share one email or phone, so the first name has to match as well
+    if email and first_name:
+        keys.append((f"email+first:{email}|{first_name}", "same email and first name"))
+    if len(phone) >= 7 and first_name:
+        keys.append((f"phone+first:{phone}|{first_name}", "same phone and first name"))
+    return keys
+
+
+class DuplicateFinder:
+    """Hash index of the students seen so far.  'add' returns the Duplicate a new student is, or None."""
+
+    def __init__(self):
+        self.index = {}  # --- key -> position of the first student with it
+        self.count = 0
+
+    def add(self, student):
+        row, self.count = self.count, self.count + 1
+        exact = f"exact:{student_key(student)}"
+        keys = match_keys(student)
+        duplicate = None
+        if exact in self.index:
+            duplicate = Duplicate(row, self.index[exact], True, EXACT_REASON)
+        else:
+            for key, reason in keys:
+                if key in self.index:
+                    duplicate = Duplicate(row, self.index[key], False, reason)
+                    break
+        # --- a duplicate's keys lead to its original, so a third entry of the same diver matches the first
+        original = row if duplicate is None else duplicate.original
+        for key in [exact] + [key for key, _ in keys]:
+            self.index.setdefault(key, original)
+        return duplicate
+
+
+def find_duplicates(students, start: int = 0) -> list:
+    """Return a Duplicate for every student of 'students' that repeats an earlier one.  Students before position
+    'start' (students already saved, say) are matched against but not reported."""
+    finder = DuplicateFinder()
+    duplicates = [finder.add(student) for student in students]
+    return [duplicate for duplicate in duplicates[start:] if duplicate is not None]
+
+
+def merge_students(original, duplicate):
+    """Return 'original' with its empty fields filled from 'duplicate'"""
+    return dataclasses.replace(original, **{field: getattr(duplicate, field) for field in STUDENT_FIELDS
+                                            if getattr(original, field) in ("", None)})
+
+
+def resolve_duplicates(students: list, duplicates: list, merge: bool) -> list:
+    """Return 'students' without the 'duplicates', merged into their originals if 'merge' (skipped otherwise).
+    Students keep their order, and students before the first duplicate keep their position."""
+    students = list(students)
+    if merge:
+        for duplicate in duplicates:
+            students[duplicate.original] = merge_students(students[duplicate.original], students[duplicate.row])
+    dropped = {duplicate.row for duplicate in duplicates}
+    return [student for row, student in enumerate(students) if row not in dropped]
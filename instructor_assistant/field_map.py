@@ -0,0 +1,99 @@
+"""Table of which 'Record_and_Referral_Form' fields each row of the Main UI fills, loaded from
+'config/field_map.json'.
+
+Sections ("confined_water", "knowledge_development", "open_water") are lists of rows in Main UI order.  A row has
+    date         day, month and year fields, or
+    flex         a text field for an Open Water Flexible Skill dive number
+    initials     instructor initials field (optional)
+    padi_number  instructor PADI number field
+and Knowledge Development rows 0 - 5 also have the 'review' and 'video' checkboxes and the quiz/exam 'exam' field.
+"course_options" maps each course option to its checkbox and "instructors" holds the first and second instructor
+signature blocks.
+
+Every function takes plain values, not widgets, so the same mapping runs in the Main UI and headless batch jobs.
+"""
+
+import json
+
+from instructor_assistant.form_template import CHECKBOX_ON
+
+SECTIONS = ("confined_water", "knowledge_development", "open_water")
+
+# --- "instructors" block key -> 'instructor_data.json' key
+INSTRUCTOR_KEYS = {
+    "name": "PADI Instructor",
+    "padi_number": "PADI Number",
+    "dive_center": "Dive Center",
+    "phone": "Phone",
+    "email": "Email",
+}
+
+
+class FieldMap:
+    def __init__(self, table: dict):
+        self.table = table
+
+    @classmethod
+    def load(cls, path: str):
+        with open(path, "r") as data_file:
+            return cls(json.load(data_file))
+
+    def rows(self, section: str) -> list:
+        return self.table[section]
+
+    def set_dates(self, fields: dict, section: str, values):
+        """Fill the date of each row of 'section'.  values[i] is a date for a "date" row, the dive number text for
+        a "flex" row, or None to leave row i unchanged (its switch is off)."""
+        for row, value in zip(self.table[section], values):
+            if value is None:
+                continue
+            if "date" in row:
+                day, month, year = row["date"]
+                fields[day] = value.day
+                fields[month] = value.month
+                fields[year] = value.year
+            else:
+                fields[row["flex"]] = value
+
+    def set_initials(self, fields: dict, section: str, selected, instructor: dict):
+        """Fill the instructor initials and PADI number of each row of 'section' where selected[i] is true"""
+        for row, on in zip(self.table[section], selected):
+            if not on:
+                continue
+            if "initials" in row:
+                fields[row["initials"]] = instructor["Initials"]
+            fields[row["padi_number"]] = instructor["PADI Number"]
+
+    def set_instructor_details(self, fields: dict, instructor: dict, date):
+        """Fill the first instructor block if it is empty, otherwise the second one unless the instructor is
+        already the first instructor."""
+        first, second = self.table["instructors"]
+        if len(str(fields[first["name"]])) == 0:
+            block = first
+        elif fields[first["name"]] == instructor["PADI Instructor"]:
+            return
+        else:
+            block = second
+        for key, instructor_key in INSTRUCTOR_KEYS.items():
+            fields[block[key]] = instructor[instructor_key]
+        day, month, year = block["date"]
+        fields[day] = date.day
+        fields[month] = date.month
+        fields[year] = date.year
+
+    def set_course_options(self, fields: dict, options: dict):
+        """Check the box of each course option ("rdp", "erdpml", "computer") that is true in 'options'"""
+        for option, checkbox in self.table["course_options"].items():
+            if options.get(option):
+                fields[checkbox] = CHECKBOX_ON
+
+    def set_knowledge_checks(self, fields: dict, reviews, videos, exams):
+        """Check the knowledge review and video boxes of each Knowledge Development row and fill its quiz/exam
+        score.  reviews[i] and videos[i] are true to check row i, exams[i] is the score text."""
+        rows = [row for row in self.table["knowledge_development"] if "exam" in row]
+        for row, review, video, exam in zip(rows, reviews, videos, exams):
+            if review:
+                fields[row["review"]] = CHECKBOX_ON
+            if video:
+                fields[row["video"]] = CHECKBOX_ON
+            fields[row["exam"]] = exam
@@ -0,0 +1,264 @@
+"""'Record_and_Referral_Form' pdf parsed once and reused for every completed form.
+
+Two fill backends are available, chosen with '[pdf] backend' in 'config/config.ini':
+    fillpdf  - pdfrw, the same field updates as 'fillpdfs.write_fillable_pdf' (default)
+    pymupdf  - PyMuPDF (fitz), also draws the field appearance streams
+
+pdfrw, fillpdf and fitz are imported the first time a form is parsed or written, not when the app starts.
+"""
+
+import abc
+import hashlib
+import os
+import threading
+
+ANNOT_KEY = "/Annots"
+ANNOT_FIELD_KEY = "/T"
+ANNOT_FORM_TYPE = "/FT"
+ANNOT_FORM_BUTTON = "/Btn"
+ANNOT_FORM_TEXT = "/Tx"
+ANNOT_FIELD_KIDS_KEY = "/Kids"
+WIDGET_SUBTYPE = "/Widget"
+FILLED_KEYS = ("/V", "/AS", "/AP")
+CHECKBOX_ON = "Yes"
+
+DEFAULT_BACKEND = "fillpdf"
+
+
+class FormTemplate(abc.ABC):
+    """A fillable pdf kept in memory with its empty field skeleton.
+
+    The file is re-read if its mtime or size changes and its hash differs from the loaded copy.  Backends
+    implement 'parse' and 'write'.
+    """
+
+    backend = None
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self.load()
+
+    def load(self):
+        """(Re)load the pdf from disk"""
+        with open(self.path, "rb") as pdf_file:
+            data = pdf_file.read()
+        stat = os.stat(self.path)
+        self.mtime, self.size = stat.st_mtime_ns, stat.st_size
+        self.hash = hashlib.sha256(data).hexdigest()
+        self.skeleton = dict.fromkeys(self.parse(data), "")
+
+    @abc.abstractmethod
+    def parse(self, data: bytes) -> list:
+        """Parse the pdf bytes and return the field names in page order"""
+
+    def is_stale(self) -> bool:
+        """True if the pdf on disk no longer matches the loaded copy"""
+        stat = os.stat(self.path)
+        if (stat.st_mtime_ns, stat.st_size) == (self.mtime, self.size):
+            return False
+        with open(self.path, "rb") as pdf_file:
+            if hashlib.sha256(pdf_file.read()).hexdigest() != self.hash:
+                return True
+        # --- touched but unchanged
+        self.mtime, self.size = stat.st_mtime_ns, stat.st_size
+        return False
+
+    def refresh(self):
+        if self.is_stale():
+            self.load()
+
+    def fields(self) -> dict:
+        """Return a new, empty 'fields' dictionary for the form"""
+        self.refresh()
+        return dict(self.skeleton)
+
+    @abc.abstractmethod
+    def write(self, output, data: dict):
+        """Fill the form with 'data' and write it to 'output', a file path or a binary file object."""
+
+
+class FillpdfTemplate(FormTemplate):
+    """pdfrw backend.
+
+    Parsing the 2MB 'Record_and_Referral_Form' is most of the cost of a fillpdf fill, so the tree is parsed once.
+    Each 'write' fills the widgets of the shared tree, writes the pdf and puts the original widget values back, so
+    every fill starts from a clean copy of the form.
+    """
+
+    backend = "fillpdf"
+
+    def parse(self, data: bytes) -> list:
+        import pdfrw
+
+        self.pdf = pdfrw.PdfReader(fdata=data)
+        self.pdf.Root.AcroForm.update(pdfrw.PdfDict(NeedAppearances=pdfrw.PdfObject("true")))
+
+        # --- field name -> widget annotations, in page order
+        self.widgets = {}
+        for page in self.pdf.pages:
+            for annotation in page[ANNOT_KEY] or []:
+                if annotation.Subtype == WIDGET_SUBTYPE and annotation[ANNOT_FIELD_KEY]:
+                    name = annotation[ANNOT_FIELD_KEY].to_unicode()
+                    self.widgets.setdefault(name, []).append(annotation)
+        return list(self.widgets)
+
+    def write(self, output, data: dict):
+        import pdfrw
+
+        self.refresh()
+        with self._lock:
+            saved = self._fill(data)
+            try:
+                pdfrw.PdfWriter().write(output, self.pdf)
+            finally:
+                self._restore(saved)
+
+    def write_combined(self, output, field_dicts, progress=None):
+        """Write one pdf with a filled copy of the form for each 'fields' dictionary in 'field_dicts'.
+
+        Pages are built one at a time as 'field_dicts' is iterated, and share the form's content and resources so
+        the file grows by the filled widgets only.  Widgets on the n-th copy (from 1) are renamed 'p<n>_<field>'
+        so values do not collide.  'progress' is called with each page number once that page is built.
+        """
+        import pdfrw
+
+        self.refresh()
+        pages = []
+        fields = []
+        with self._lock:
+            for page_number, data in enumerate(field_dicts, start=1):
+                saved = self._fill(data)
+                try:
+                    for page in self.pdf.pages:
+                        new_page = pdfrw.PdfDict(page)
+                        new_page.indirect = True
+                        for key in ("Resources", "MediaBox", "CropBox", "Rotate"):
+                            setattr(new_page, key, getattr(page.inheritable, key))
+                        annotations = pdfrw.PdfArray()
+                        for annotation in page[ANNOT_KEY] or []:
+                            new_annotation = pdfrw.PdfDict(annotation)
+                            new_annotation.indirect = True
+                            new_annotation.P = new_page
+                            if annotation.Subtype == WIDGET_SUBTYPE and annotation[ANNOT_FIELD_KEY]:
+                                new_annotation.T = pdfrw.PdfString.encode(
+                                    f"p{page_number}_{annotation[ANNOT_FIELD_KEY].to_unicode()}")
+                                fields.append(new_annotation)
+                            annotations.append(new_annotation)
+                        new_page.Annots = annotations
+                        pages.append(new_page)
+                finally:
+                    self._restore(saved)
+                if progress is not None:
+                    progress(page_number)
+
+        acro_form = self.pdf.Root.AcroForm
+        page_tree = pdfrw.PdfDict(Type=pdfrw.PdfName.Pages, Kids=pdfrw.PdfArray(pages), Count=len(pages))
+        page_tree.indirect = True
+        for page in pages:
+            page.Parent = page_tree
+        root = pdfrw.PdfDict(Type=pdfrw.PdfName.Catalog, Pages=page_tree,
+                             AcroForm=pdfrw.PdfDict(Fields=pdfrw.PdfArray(fields), DA=acro_form.DA,
+                                                    DR=acro_form.DR, NeedAppearances=pdfrw.PdfObject("true")))
+        root.indirect = True
+        pdfrw.PdfWriter().write(output, pdfrw.PdfDict(Root=root))
+
+    def _fill(self, data: dict) -> list:
+        """Fill the shared widgets with 'data' and return their previous values for '_restore'"""
+        import pdfrw
+        from fillpdf.fillpdfs import convert_dict_values_to_string
+
+        saved = []
+        try:
+            for key, value in convert_dict_values_to_string(data).items():
+                for annotation in self.widgets.get(key, ()):
+                    targets = [annotation]
+                    if annotation[ANNOT_FIELD_KIDS_KEY]:
+                        targets.append(annotation[ANNOT_FIELD_KIDS_KEY][0])
+                    for target in targets:
+                        saved.append((target, {k: dict.get(target, k) for k in FILLED_KEYS}))
+                        if annotation[ANNOT_FORM_TYPE] == ANNOT_FORM_BUTTON:
+                            target.update(pdfrw.PdfDict(V=pdfrw.PdfName(value), AS=pdfrw.PdfName(value)))
+                        elif annotation[ANNOT_FORM_TYPE] == ANNOT_FORM_TEXT:
+                            target.update(pdfrw.PdfDict(V=value, AP=value))
+        except Exception:
+            self._restore(saved)
+            raise
+        return saved
+
+    @staticmethod
+    def _restore(saved: list):
+        for target, values in reversed(saved):
+            for k, value in values.items():
+                if value is None:
+                    dict.pop(target, k, None)
+                else:
+                    dict.__setitem__(target, k, value)
+
+
+class PyMuPDFTemplate(FormTemplate):
+    """PyMuPDF backend.
+
+    MuPDF opens a pdf from memory lazily, so each 'write' opens its own document from the cached bytes.  Only
+    widgets whose value changes are updated.  Checkboxes are checked for "Yes" and cleared for anything else.
+    """
+
+    backend = "pymupdf"
+
+    def parse(self, data: bytes) -> list:
+        import fitz
+
+        self.data = data
+        names = []
+        with fitz.open(stream=data, filetype="pdf") as doc:
+            for page in doc:
+                for widget in page.widgets():
+                    if widget.field_name not in names:
+                        names.append(widget.field_name)
+        return names
+
+    def write(self, output, data: dict):
+        import fitz
+        from fillpdf.fillpdfs import convert_dict_values_to_string
+
+        self.refresh()
+        data = convert_dict_values_to_string(data)
+        with fitz.open(stream=self.data, filetype="pdf") as doc:
+            for page in doc:
+                for widget in page.widgets():
+                    value = data.get(widget.field_name)
+                    if value is None:
+                        continue
+                    if widget.field_type == fitz.PDF_WIDGET_TYPE_CHECKBOX:
+                        checked = value == CHECKBOX_ON
+                        if checked != (widget.field_value not in ("", "Off", False)):
+                            widget.field_value = checked
+                            widget.update()
+                    elif widget.field_type == fitz.PDF_WIDGET_TYPE_TEXT and widget.field_value != value:
+                        widget.field_value = value
+                        widget.update()
+            if hasattr(output, "write"):
+                output.write(doc.tobytes())
+            else:
+                doc.save(output)
+
+
+BACKENDS = {
+    FillpdfTemplate.backend: FillpdfTemplate,
+    PyMuPDFTemplate.backend: PyMuPDFTemplate,
+}
+
+_templates = {}
+
+
+def get_form_template(path: str, backend: str = DEFAULT_BACKEND) -> FormTemplate:
+    """Return the FormTemplate for 'path', loading it only the first time it is used in this process."""
+    try:
+        template = _templates[path, backend]
+    except KeyError:
+        try:
+            template_class = BACKENDS[backend]
+        except KeyError:
+            raise ValueError(f"Unknown pdf backend '{backend}'. Choose from: {', '.join(BACKENDS)}") from None
+        template = _templates[path, backend] = template_class(path)
+    return template
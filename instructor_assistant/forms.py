@@ -0,0 +1,82 @@
+"""Mapping of Student Diver information onto the 'Record_and_Referral_Form' pdf fields."""
+
+import datetime
+import hashlib
+import json
+import re
+
+# --- 'Record_and_Referral_Form' fields filled from a Student Diver (everything else is course information)
+STUDENT_FIELDS = (
+    "Student Name",
+    "Birth Date",
+    "undefined",
+    "undefined_2",
+    "Check Box20",
+    "Check Box21",
+    "Mailing address 1",
+    "Mailing address 2",
+    "Mailing address 3",
+    "Mailing address 4",
+    "Mailing address 5",
+    "undefined_4",
+    "Email",
+)
+BIRTH_DATE_TEXT = re.compile(r"\s*(\d{1,2})/(\d{1,2})/(\d{2,4})\s*")
+
+
+def birth_date_parts(date_of_birth) -> tuple:
+    """Return (day, month, year) of a date of birth: a datetime.date (imported dates, see
+    'dates.normalize_birth_dates') or dd/mm/yyyy text.  Raises ValueError for anything else."""
+    if isinstance(date_of_birth, datetime.date):
+        return date_of_birth.day, date_of_birth.month, date_of_birth.year
+    match = BIRTH_DATE_TEXT.fullmatch(date_of_birth) if isinstance(date_of_birth, str) else None
+    if match is None:
+        raise ValueError(f"date of birth '{date_of_birth}' is not a dd/mm/yyyy date")
+    return match.groups()
+
+
+def student_fields(student) -> dict:
+    """Return the 'fields' dictionary entries for a single Student Diver.  Every key in STUDENT_FIELDS is
+    present so the result fully replaces the previous student's information."""
+    fields = dict.fromkeys(STUDENT_FIELDS, "")
+    fields["Student Name"] = f'{student.first_name} {student.last_name}'
+
+    # --- a date of birth that is not a date (imported anyway) leaves the day, month and year empty
+    try:
+        fields["Birth Date"], fields["undefined"], fields["undefined_2"] = birth_date_parts(student.date_of_birth)
+    except ValueError:
+        pass
+
+    if student.sex == "male":
+        fields["Check Box20"] = "Yes"
+        fields["Check Box21"] = "No"
+    elif student.sex == "female":
+        fields["Check Box21"] = "Yes"
+        fields["Check Box20"] = "No"
+
+    fields["Mailing address 1"] = student.street_address
+    fields["Mailing address 2"] = student.city
+    fields["Mailing address 3"] = student.province
+    fields["Mailing address 4"] = student.country
+    fields["Mailing address 5"] = student.postal
+    fields["undefined_4"] = student.phone
+    fields["Email"] = student.email
+    return fields
+
+
+def record_file_name(student_name: str, date: datetime.date) -> str:
+    """Return the file name of a completed 'Record_and_Referral_Form'"""
+    return f"{student_name}_Student_Record_Form_{date.day}_{date.month}_{date.year}.pdf"
+
+
+def combined_record_file_name(date: datetime.date, extension: str = "pdf") -> str:
+    """Return the file name of a pdf (or archive) holding the completed 'Record_and_Referral_Form' of every
+    student"""
+    return f"Student_Record_Forms_{date.day}_{date.month}_{date.year}.{extension}"
+
+
+def fields_hash(fields: dict) -> str:
+    """Return a stable sha256 hex digest of a 'fields' dictionary.  Values are compared as the text written to the
+    pdf, so 5 and "5" hash the same and key order does not matter."""
+    text = json.dumps({key: str(value) for key, value in fields.items()}, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(text.encode()).hexdigest()
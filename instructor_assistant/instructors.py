@@ -0,0 +1,193 @@
+"""Saved Instructor details ('config/instructor_data.json') and their password check."""
+
+import hashlib
+import hmac
+import json
+import os
+import secrets
+import time
+
+from instructor_assistant.persistence import atomic_write, json_text
+
+DEFAULT_UNLOCK_MINUTES = 30
+KDF_SCRYPT = "scrypt"
+KDF_PBKDF2 = "pbkdf2_sha256"
+KDF_LEGACY = "sha256"  # --- a single salted hash, only verified and upgraded on the next login
+# --- default costs: a password check takes about 75 ms (scrypt) or 300 ms (PBKDF2) on a laptop, see
+# --- 'python -m benchmarks.bench_password'
+KDF_DEFAULTS = {
+    KDF_SCRYPT: {"n": 2 ** 14, "r": 8, "p": 1},
+    KDF_PBKDF2: {"iterations": 600000},
+}
+# --- hashlib.scrypt needs Python built with OpenSSL 1.1 or later
+DEFAULT_KDF = KDF_SCRYPT if hasattr(hashlib, "scrypt") else KDF_PBKDF2
+
+
+def load_instructors(path: str) -> dict:
+    """Return the saved instructors, instructor name -> details"""
+    with open(path, "r") as data_file:
+        return json.load(data_file)
+
+
+class InstructorStore:
+    """The saved instructors of 'path', kept in memory.  The file is read again only when its size or modification
+    time change (another computer saved it to a shared drive, say), and every change is saved to it, through the
+    WriteBehind 'writer' if there is one."""
+
+    def __init__(self, path: str, writer=None, algorithm: str = DEFAULT_KDF, params: dict = None):
+        self.path = path
+        self.writer = writer
+        # --- the password KDF of new passwords, older hashes are upgraded to it when they are verified
+        self.algorithm, self.params = algorithm, kdf_params(algorithm, params)
+        self._instructors = {}
+        self._stamp = None  # --- (size, mtime) of the file when it was last read or written, None if there is no file
+        self.refresh()
+
+    def file_stamp(self):
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            return None
+        return stat.st_size, stat.st_mtime_ns
+
+    def refresh(self):
+        """Read the file again if it changed since it was last read or written"""
+        if self.writer is not None and self.writer.pending(self.path):
+            return  # --- the instructors in memory are newer than the file
+        stamp = self.file_stamp()
+        if stamp == self._stamp:
+            return
+        self._instructors = {} if stamp is None else load_instructors(self.path)
+        self._stamp = stamp
+
+    def names(self) -> list:
+        self.refresh()
+        return list(self._instructors)
+
+    def get(self, name: str):
+        """Return the details of the instructor 'name', or None if there is no such instructor"""
+        self.refresh()
+        return self._instructors.get(name)
+
+    def add(self, name: str, details: dict):
+        """Save the instructor 'name', replacing the saved details if there is one"""
+        self.refresh()
+        self._instructors[name] = details
+        self.save()
+
+    def hash_password(self, password: str) -> dict:
+        return hash_password(password, self.algorithm, self.params)
+
+    def upgrade_password(self, name: str, password: str) -> bool:
+        """Hash the instructor's password again with the store's KDF if it uses another (or a legacy hash), once
+        'password' is verified.  True if it was upgraded."""
+        instructor = self.get(name)
+        if instructor is None or not needs_rehash(instructor, self.algorithm, self.params):
+            return False
+        self.add(name, {**instructor, "Password": self.hash_password(password)})
+        return True
+
+    def remove(self, name: str):
+        self.refresh()
+        if self._instructors.pop(name, None) is not None:
+            self.save()
+
+    def save(self):
+        if self.writer is None:
+            atomic_write(self.path, json_text(self._instructors))
+            self.saved()
+        else:
+            self.writer.write(self.path, json_text(self._instructors), on_written=self.saved)
+
+    def saved(self):
+        """Remember the stamp of the file just written, so it is not read back"""
+        self._stamp = self.file_stamp()
+
+
+def kdf_params(algorithm: str, params: dict = None) -> dict:
+    """Return the parameters of the password KDF 'algorithm': its defaults, replaced by any of 'params'"""
+    if algorithm not in KDF_DEFAULTS:
+        raise ValueError(f"unknown password kdf '{algorithm}', choose from: {', '.join(KDF_DEFAULTS)}")
+    defaults = KDF_DEFAULTS[algorithm]
+    unknown = set(params or {}) - set(defaults)
+    if unknown:
+        raise ValueError(f"unknown {algorithm} parameters: {', '.join(sorted(unknown))}")
+    return {**defaults, **(params or {})}
+
+
+def derive_key(algorithm: str, params: dict, salt: str, password: str) -> str:
+    if algorithm == KDF_SCRYPT:
+        n, r, p = params["n"], params["r"], params["p"]
+        # --- scrypt needs about 128 * n * r bytes, more than hashlib allows by default for large n
+        return hashlib.scrypt(password.encode(), salt=salt.encode(), n=n, r=r, p=p,
+                              maxmem=128 * r * (n + p + 2) + 1024 ** 2).hex()
+    if algorithm == KDF_PBKDF2:
+        return hashlib.pbkdf2_hmac("sha256", password.encode(), salt.encode(), params["iterations"]).hex()
+    if algorithm == KDF_LEGACY:
+        return hashlib.sha256(salt.encode() + password.encode()).hexdigest()
+    raise ValueError(f"unknown password kdf '{algorithm}'")
+
+
+def hash_password(password: str, algorithm: str = DEFAULT_KDF, params: dict = None) -> dict:
+    """Save users password hash with salt. Return Password Dictionary"""
+
+    # --- Generate a random salt
+    salt = secrets.token_hex(16)
+
+    # --- Hash the password with the salt and the key derivation function, saved with its parameters
+    params = kdf_params(algorithm, params)
+    password_data = {
+        "Algorithm": algorithm,
+        "Params": params,
+        "Salt": salt,
+        "Hash": derive_key(algorithm, params, salt, password)
+    }
+    return password_data
+
+
+def verify_password(instructor: dict, password: str) -> bool:
+    """True if 'password' is the instructor's password"""
+    record = instructor["Password"]
+    # --- passwords saved before the KDF was configurable have no algorithm: sha256(salt + password)
+    hashed_password_entry = derive_key(record.get("Algorithm", KDF_LEGACY), record.get("Params", {}), record["Salt"],
+                                       password)
+    return hmac.compare_digest(hashed_password_entry, record["Hash"])
+
+
+def needs_rehash(instructor: dict, algorithm: str = DEFAULT_KDF, params: dict = None) -> bool:
+    """True if the instructor's password is not hashed with 'algorithm' and 'params' (a legacy sha256 hash, say)"""
+    record = instructor["Password"]
+    return record.get("Algorithm", KDF_LEGACY) != algorithm or record.get("Params") != kdf_params(algorithm, params)
+
+
+class UnlockSession:
+    """Instructors whose password was verified in this session, unlocked in memory for 'ttl' seconds after it was
+    verified, so setting the same instructor again does not ask for the password.  A 'ttl' of 0 unlocks nobody."""
+
+    def __init__(self, ttl: float, clock=time.monotonic):
+        self.ttl = ttl
+        self.clock = clock
+        self._unlocked = {}  # --- instructor name -> (details, when the password was verified)
+
+    def verify(self, name: str, instructor: dict, password: str) -> bool:
+        """'verify_password', and unlock the instructor if the password is right"""
+        if not verify_password(instructor, password):
+            return False
+        if self.ttl > 0:
+            self._unlocked[name] = (instructor, self.clock())
+        return True
+
+    def get(self, name: str):
+        """Return the details of the instructor 'name' if it is unlocked, otherwise None"""
+        instructor, verified = self._unlocked.get(name, (None, None))
+        if instructor is not None and self.clock() - verified >= self.ttl:
+            del self._unlocked[name]
+            return None
+        return instructor
+
+    def lock(self, name: str = None):
+        """Lock the instructor 'name' (its details changed, say), or every instructor"""
+        if name is None:
+            self._unlocked.clear()
+        else:
+            self._unlocked.pop(name, None)
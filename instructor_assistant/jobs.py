@@ -0,0 +1,110 @@
+"""Background job queue so long running work does not freeze the UI.
+
+Jobs run one at a time on a worker thread.  Progress, results and errors are queued as events and the callbacks are
+called by 'JobQueue.process_events' in the thread that calls it, the Tk main loop for the 'MainUI'.
+"""
+
+import queue
+import threading
+
+
+class Cancelled(Exception):
+    """Raised for work stopped by 'Job.cancel'"""
+
+    def __init__(self, message="Cancelled"):
+        super().__init__(message)
+
+
+class Job:
+    def __init__(self, name: str, function, on_done=None, on_error=None, on_progress=None):
+        self.name = name
+        self.function = function
+        self.on_done = on_done
+        self.on_error = on_error
+        self.on_progress = on_progress
+        self.cancel_event = threading.Event()
+        self._events = None
+
+    @property
+    def cancelled(self) -> bool:
+        return self.cancel_event.is_set()
+
+    def cancel(self):
+        self.cancel_event.set()
+
+    def progress(self, completed: int, total: int, message: str = ""):
+        """Report progress from the worker thread"""
+        self._events.put(("progress", self, (completed, total, message)))
+
+
+class JobQueue:
+    def __init__(self):
+        self._jobs = queue.Queue()
+        self._events = queue.Queue()
+        self._waiting = []
+        self._lock = threading.Lock()
+        self.current = None
+        self._thread = threading.Thread(target=self._run, name="instructor-assistant-jobs", daemon=True)
+        self._thread.start()
+
+    def submit(self, name: str, function, on_done=None, on_error=None, on_progress=None) -> Job:
+        """Queue function(job).  on_done(job, result), on_error(job, exception) and
+        on_progress(job, completed, total, message) are called from 'process_events'."""
+        job = Job(name, function, on_done, on_error, on_progress)
+        job._events = self._events
+        with self._lock:
+            self._waiting.append(job)
+        self._jobs.put(job)
+        return job
+
+    @property
+    def queued(self) -> int:
+        """Number of jobs waiting behind the running one"""
+        with self._lock:
+            return len(self._waiting)
+
+    @property
+    def busy(self) -> bool:
+        return self.current is not None or self.queued > 0
+
+    def cancel_all(self):
+        """Cancel the running job and every queued job"""
+        with self._lock:
+            jobs = list(self._waiting)
+        if self.current is not None:
+            self.current.cancel()
+        for job in jobs:
+            job.cancel()
+
+    def process_events(self) -> int:
+        """Call the callbacks of every queued event and return how many were handled"""
+        handled = 0
+        while True:
+            try:
+                kind, job, value = self._events.get_nowait()
+            except queue.Empty:
+                return handled
+            handled += 1
+            if kind == "progress" and job.on_progress is not None:
+                job.on_progress(job, *value)
+            elif kind == "done" and job.on_done is not None:
+                job.on_done(job, value)
+            elif kind == "error" and job.on_error is not None:
+                job.on_error(job, value)
+
+    def _run(self):
+        while True:
+            job = self._jobs.get()
+            with self._lock:
+                self._waiting.remove(job)
+                self.current = job
+            try:
+                if job.cancelled:
+                    raise Cancelled()
+                event = ("done", job, job.function(job))
+            except Exception as e:
+                event = ("error", job, e)
+            # --- the job is no longer current when its callbacks run, so they see the queue as idle
+            with self._lock:
+                self.current = None
+                self._events.put(event)
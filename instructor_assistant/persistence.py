@@ -0,0 +1,128 @@
+"""Atomic, coalesced saving of the JSON and INI files in 'config'.
+
+A file is saved by writing a temporary file next to it, flushing it to disk and renaming it over the old file, so a
+crash while saving leaves the old file or the new one, never a partly written file.  'WriteBehind' keeps the last
+content saved for each file and writes it once: at once, 'delay' seconds after the last save, or when a 'batch' of
+saves ends, so several edits in a row cost a single write.
+"""
+
+import configparser
+import contextlib
+import io
+import json
+import os
+import tempfile
+import threading
+
+
+def atomic_write(path: str, text):
+    """Replace the file 'path' with 'text' in one step, written in binary mode if 'text' is bytes"""
+    directory = os.path.dirname(os.path.abspath(path))
+    descriptor, temp_path = tempfile.mkstemp(dir=directory, prefix=f".{os.path.basename(path)}.", suffix=".tmp")
+    try:
+        with os.fdopen(descriptor, "wb" if isinstance(text, bytes) else "w") as temp_file:
+            temp_file.write(text)
+            temp_file.flush()
+            os.fsync(temp_file.fileno())
+        with contextlib.suppress(FileNotFoundError):
+            # --- keep the permissions of the file replaced, temporary files are private
+            os.chmod(temp_path, os.stat(path).st_mode)
+        os.replace(temp_path, path)
+    except BaseException:
+        with contextlib.suppress(FileNotFoundError):
+            os.remove(temp_path)
+        raise
+    fsync_directory(directory)
+
+
+def fsync_directory(directory: str):
+    """Flush the rename to disk as well.  Windows has no directory handles, 'os.replace' is enough there."""
+    if os.name == "nt":
+        return
+    descriptor = os.open(directory, os.O_RDONLY)
+    try:
+        os.fsync(descriptor)
+    finally:
+        os.close(descriptor)
+
+
+def json_text(data) -> str:
+    return json.dumps(data, indent=4)
+
+
+def config_text(config: configparser.ConfigParser) -> str:
+    text = io.StringIO()
+    config.write(text)
+    return text.getvalue()
+
+
+class WriteBehind:
+    """Files waiting to be saved, path -> the last text saved for it.  With a 'delay' the files are written by a
+    timer thread once no file was saved for 'delay' seconds; 'flush' writes them at once (call it before exiting)."""
+
+    def __init__(self, delay: float = 0.0):
+        self.delay = delay
+        self._pending = {}  # --- path -> (text, callbacks to run once it is written)
+        self._lock = threading.RLock()
+        self._timer = None
+        self._batches = 0
+
+    def write(self, path: str, text: str, on_written=None):
+        """Save 'text' to 'path', replacing any text still waiting for it.  'on_written()' is called once it is on
+        disk."""
+        with self._lock:
+            callbacks = self._pending.pop(path, (None, []))[1]
+            if on_written is not None:
+                callbacks.append(on_written)
+            self._pending[path] = (text, callbacks)
+            if not self._batches:
+                self._schedule()
+
+    def read(self, path: str) -> str:
+        """Return the text of 'path', the text waiting to be written if there is one"""
+        with self._lock:
+            if path in self._pending:
+                return self._pending[path][0]
+        with open(path, "r") as data_file:
+            return data_file.read()
+
+    def pending(self, path: str) -> bool:
+        with self._lock:
+            return path in self._pending
+
+    @contextlib.contextmanager
+    def batch(self):
+        """Write the files saved inside the 'with' block once it ends, with one write per file"""
+        with self._lock:
+            self._batches += 1
+        try:
+            yield self
+        finally:
+            with self._lock:
+                self._batches -= 1
+                if not self._batches and self._pending:
+                    self._schedule()
+
+    def _schedule(self):
+        if self.delay <= 0:
+            self.flush()
+            return
+        if self._timer is not None:
+            self._timer.cancel()
+        self._timer = threading.Timer(self.delay, self.flush)
+        self._timer.daemon = True
+        self._timer.start()
+
+    def flush(self):
+        """Write every file waiting to be saved"""
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            while self._pending:
+                path = next(iter(self._pending))
+                text, callbacks = self._pending[path]
+                atomic_write(path, text)  # --- a file that fails stays waiting, for the next flush
+                del self._pending[path]
+                for callback in callbacks:
+                    callback()
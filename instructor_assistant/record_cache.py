@@ -0,0 +1,47 @@
+"""Remember which completed forms are already up to date so they are not written again."""
+
+import hashlib
+import json
+import os
+
+from instructor_assistant.forms import fields_hash
+from instructor_assistant.persistence import atomic_write, json_text
+
+
+def record_digest(fields: dict, template_hash: str, backend: str) -> str:
+    """Return the digest of a completed form: its 'fields', the form template and the fill backend"""
+    return hashlib.sha256(f"{template_hash}:{backend}:{fields_hash(fields)}".encode()).hexdigest()
+
+
+class RecordCache:
+    """Persistent map of completed form path -> digest, size and mtime of the file when it was written.
+
+    A form is current if the file is still there, unmodified since it was written, and was written from the same
+    digest.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        try:
+            with open(path, "r") as data_file:
+                self.records = json.load(data_file)
+        except (FileNotFoundError, ValueError):
+            self.records = {}
+
+    def is_current(self, output_path: str, digest: str) -> bool:
+        record = self.records.get(os.path.abspath(output_path))
+        if record is None or record["digest"] != digest:
+            return False
+        try:
+            stat = os.stat(output_path)
+        except FileNotFoundError:
+            return False
+        return (stat.st_size, stat.st_mtime_ns) == (record["size"], record["mtime"])
+
+    def record(self, output_path: str, digest: str):
+        stat = os.stat(output_path)
+        self.records[os.path.abspath(output_path)] = {"digest": digest, "size": stat.st_size,
+                                                      "mtime": stat.st_mtime_ns}
+
+    def save(self):
+        atomic_write(self.path, json_text(self.records))
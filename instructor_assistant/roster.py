@@ -0,0 +1,172 @@
+"""Import Student Divers from a course roster file.
+
+Excel (.xlsx), CSV, JSON Lines and Parquet rosters are read one row at a time through the same path: each format
+reader yields a header and then rows, and the columns are matched to Student fields with a header-mapping profile
+from 'config/roster_profiles.json'.  The format is detected from the file content, not its extension.
+"""
+
+import csv
+import dataclasses
+import json
+import re
+import zipfile
+
+from instructor_assistant.students import Student
+
+# --- roster column headings, one per Student field
+STUDENT_COLUMNS = tuple(field.name for field in dataclasses.fields(Student))
+
+FORMAT_EXCEL = "excel"
+FORMAT_CSV = "csv"
+FORMAT_JSON_LINES = "jsonl"
+FORMAT_PARQUET = "parquet"
+
+DEFAULT_PROFILE = "default"
+SNIFF_BYTES = 64 * 1024
+
+
+def normalize_heading(heading) -> str:
+    """'First Name', 'first_name' and ' FIRST-NAME ' all become 'first name'"""
+    return re.sub(r"[\s_\-]+", " ", "" if heading is None else str(heading)).strip().lower()
+
+
+def load_roster_profile(path: str, name: str = DEFAULT_PROFILE) -> dict:
+    """Return the header-mapping profile 'name': Student field -> accepted column headings.  A field mapped to an
+    empty list is not in the roster and is left blank."""
+    with open(path, "r") as data_file:
+        profiles = json.load(data_file)
+    try:
+        return profiles[name]
+    except KeyError:
+        raise ValueError(f"Unknown roster profile '{name}'. Choose from: {', '.join(profiles)}") from None
+
+
+def detect_format(path: str) -> str:
+    """Return the roster format of 'path' from its first bytes"""
+    with open(path, "rb") as roster_file:
+        head = roster_file.read(SNIFF_BYTES)
+    if head.startswith(b"PK\x03\x04"):
+        return FORMAT_EXCEL
+    if head.startswith(b"PAR1"):
+        return FORMAT_PARQUET
+    if head.startswith(b"\xd0\xcf\x11\xe0"):
+        raise ValueError(f"'{path}' is an old .xls workbook. Save it as .xlsx or CSV")
+    try:
+        text = head.decode("utf-8-sig")
+    except UnicodeDecodeError as e:
+        # --- a multi-byte character cut by the sample
+        if e.start < len(head) - 3:
+            raise ValueError(f"'{path}' is not a roster file") from None
+        text = head[:e.start].decode("utf-8-sig")
+    if text.lstrip().startswith("{"):
+        return FORMAT_JSON_LINES
+    if "\x00" in text:
+        raise ValueError(f"'{path}' is not a roster file")
+    return FORMAT_CSV
+
+
+def excel_rows(path: str):
+    """Yield the header and then every row of the first sheet of an excel workbook, opened read-only"""
+    import openpyxl
+    from openpyxl.utils.exceptions import InvalidFileException
+
+    try:
+        workbook = openpyxl.load_workbook(path, read_only=True, data_only=True)
+    except (InvalidFileException, zipfile.BadZipFile, KeyError) as e:
+        raise ValueError(f"'{path}' is not an excel workbook") from e
+    try:
+        sheet = workbook.active
+        # --- some exporters save a wrong sheet size, read every row that is there instead
+        sheet.reset_dimensions()
+        yield from sheet.iter_rows(values_only=True)
+    finally:
+        workbook.close()
+
+
+def csv_rows(path: str):
+    """Yield the header and then every row of a CSV file.  The delimiter is detected from the first lines."""
+    with open(path, "r", newline="", encoding="utf-8-sig") as roster_file:
+        sample = roster_file.read(SNIFF_BYTES)
+        roster_file.seek(0)
+        try:
+            dialect = csv.Sniffer().sniff(sample, delimiters=",;\t|")
+        except csv.Error:
+            dialect = csv.excel
+        yield from csv.reader(roster_file, dialect)
+
+
+def json_lines_rows(path: str):
+    """Yield the keys of the first record and then the values of every record of a JSON Lines file"""
+    with open(path, "r", encoding="utf-8-sig") as roster_file:
+        header = None
+        for line_number, line in enumerate(roster_file, start=1):
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+            except ValueError as e:
+                raise ValueError(f"'{path}' line {line_number} is not JSON: {e}") from None
+            if header is None:
+                header = list(record)
+                yield header
+            yield [record.get(key) for key in header]
+
+
+def parquet_rows(path: str):
+    """Yield the column names and then every row of a Parquet file, one row group batch at a time"""
+    try:
+        import pyarrow.parquet
+    except ImportError:
+        raise ValueError("Parquet rosters need the 'pyarrow' package") from None
+
+    parquet_file = pyarrow.parquet.ParquetFile(path)
+    yield parquet_file.schema_arrow.names
+    for batch in parquet_file.iter_batches():
+        yield from zip(*(column.to_pylist() for column in batch.columns))
+
+
+ROW_READERS = {
+    FORMAT_EXCEL: excel_rows,
+    FORMAT_CSV: csv_rows,
+    FORMAT_JSON_LINES: json_lines_rows,
+    FORMAT_PARQUET: parquet_rows,
+}
+
+
+def iter_roster(path: str, profile: dict = None):
+    """Yield a Student for every row of the roster 'path', in any of the ROW_READERS formats.
+
+    Rows are read one at a time, so memory use does not grow with the roster and the first students are available
+    before the whole file is read.  'profile' maps Student fields to the accepted column headings (see
+    'load_roster_profile'); headings match ignoring case, spaces, '_' and '-', and the field name itself is always
+    accepted.  Empty cells are read as "" and blank rows are skipped.  Raises ValueError if the file is not a
+    roster and KeyError if a column is missing, before any Student is yielded.
+    """
+    rows = ROW_READERS[detect_format(path)](path)
+    header = [normalize_heading(heading) for heading in next(rows, ())]
+    profile = profile or {}
+
+    indexes = []
+    for column in STUDENT_COLUMNS:
+        headings = profile.get(column)
+        if headings == []:
+            indexes.append(None)
+            continue
+        for heading in [column] + list(headings or ()):
+            if normalize_heading(heading) in header:
+                indexes.append(header.index(normalize_heading(heading)))
+                break
+        else:
+            rows.close()
+            raise KeyError(column)
+
+    for row in rows:
+        if all(value is None or value == "" for value in row):
+            continue
+        values = [None if index is None or index >= len(row) else row[index] for index in indexes]
+        yield Student(*("" if value is None else value for value in values))
+
+
+def read_roster(path: str, profile: dict = None) -> list:
+    """Return a Student for every row of the roster 'path', see 'iter_roster'"""
+    return list(iter_roster(path, profile))
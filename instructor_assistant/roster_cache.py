@@ -0,0 +1,126 @@
+"""Parsed course rosters kept in a cache directory, so importing an unchanged roster again skips reading it.
+
+A roster is identified by its content hash (and the header-mapping profile it was read with).  The hash of a file is
+only computed again when its size or modification time change.  Parsed rosters are pickle files; the least recently
+used are removed when the cache grows past its size cap.
+"""
+
+import hashlib
+import json
+import os
+import pickle
+import time
+
+from instructor_assistant.persistence import atomic_write, json_text
+from instructor_assistant.roster import iter_roster
+
+DEFAULT_MAX_BYTES = 64 * 1024 ** 2
+INDEX_NAME = "index.json"
+HASH_CHUNK_BYTES = 1024 ** 2
+
+
+def content_hash(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as roster_file:
+        while chunk := roster_file.read(HASH_CHUNK_BYTES):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class RosterCache:
+    """Parsed rosters in 'directory', at most 'max_bytes' of them.
+
+    The index file holds:
+        files    roster path -> size, mtime and content hash when it was last hashed
+        entries  cache file name -> content hash, size of the cache file and when it was last used
+    """
+
+    def __init__(self, directory: str, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.index_path = os.path.join(directory, INDEX_NAME)
+        os.makedirs(directory, exist_ok=True)
+        try:
+            with open(self.index_path, "r") as index_file:
+                index = json.load(index_file)
+            self.files, self.entries = index["files"], index["entries"]
+        except (FileNotFoundError, ValueError, KeyError):
+            self.files, self.entries = {}, {}
+
+    def save(self):
+        atomic_write(self.index_path, json_text({"files": self.files, "entries": self.entries}))
+
+    def file_hash(self, path: str) -> str:
+        """Return the content hash of 'path', read again only if its size or mtime changed since it was hashed"""
+        path = os.path.abspath(path)
+        stat = os.stat(path)
+        record = self.files.get(path)
+        if record is not None and (record["size"], record["mtime"]) == (stat.st_size, stat.st_mtime_ns):
+            return record["hash"]
+        file_hash = content_hash(path)
+        self.files[path] = {"size": stat.st_size, "mtime": stat.st_mtime_ns, "hash": file_hash}
+        return file_hash
+
+    def entry_name(self, path: str, profile: dict = None) -> str:
+        profile_hash = hashlib.sha256(json.dumps(profile or {}, sort_keys=True).encode()).hexdigest()[:16]
+        return f"{self.file_hash(path)}-{profile_hash}.pickle"
+
+    def get(self, path: str, profile: dict = None):
+        """Return the Students of the roster 'path' if it is cached, otherwise None"""
+        name = self.entry_name(path, profile)
+        if name not in self.entries:
+            self.save()
+            return None
+        try:
+            with open(os.path.join(self.directory, name), "rb") as entry_file:
+                students = pickle.load(entry_file)
+        except (OSError, pickle.UnpicklingError, EOFError, AttributeError):
+            self.remove(name)
+            self.save()
+            return None
+        self.entries[name]["used"] = time.time()
+        self.save()
+        return students
+
+    def put(self, path: str, profile: dict, students: list):
+        """Cache the Students read from the roster 'path', then remove the least recently used rosters until the
+        cache is within its size cap"""
+        name = self.entry_name(path, profile)
+        entry_path = os.path.join(self.directory, name)
+        # --- a crash while caching leaves the old entry or the new one, never a truncated pickle
+        atomic_write(entry_path, pickle.dumps(students, protocol=pickle.HIGHEST_PROTOCOL))
+        self.entries[name] = {"hash": self.files[os.path.abspath(path)]["hash"],
+                              "bytes": os.path.getsize(entry_path), "used": time.time()}
+        self.evict()
+        self.save()
+
+    def remove(self, name: str):
+        self.entries.pop(name, None)
+        try:
+            os.remove(os.path.join(self.directory, name))
+        except FileNotFoundError:
+            pass
+
+    def evict(self):
+        total = sum(entry["bytes"] for entry in self.entries.values())
+        for name in sorted(self.entries, key=lambda entry_name: self.entries[entry_name]["used"]):
+            if total <= self.max_bytes:
+                break
+            total -= self.entries[name]["bytes"]
+            self.remove(name)
+        # --- forget the hashes of rosters that are no longer cached
+        hashes = {entry["hash"] for entry in self.entries.values()}
+        self.files = {path: record for path, record in self.files.items() if record["hash"] in hashes}
+
+    def iter_roster(self, path: str, profile: dict = None):
+        """'iter_roster' from the cache: the cached Students if the roster is unchanged, otherwise the roster is
+        read and cached once every Student has been yielded"""
+        students = self.get(path, profile)
+        if students is not None:
+            yield from students
+            return
+        students = []
+        for student in iter_roster(path, profile):
+            students.append(student)
+            yield student
+        self.put(path, profile, students)
@@ -0,0 +1,83 @@
+"""Import a course roster into the student store, without the Main UI.
+
+An import has two steps, both run on the background job queue with their own StudentStore connection:
+    read_roster_import  read the roster, normalize the dates of birth and find the duplicates, within the roster and
+                        against the students already saved in the course
+    save_roster_import  merge or skip the duplicates and save the students a batch at a time
+The app asks what to do about date of birth errors and duplicates between the two steps.
+"""
+
+import dataclasses
+
+from instructor_assistant.dates import normalize_birth_dates
+from instructor_assistant.duplicates import find_duplicates, resolve_duplicates
+from instructor_assistant.jobs import Cancelled
+from instructor_assistant.student_store import StudentStore
+
+BATCH_ROWS = 250  # --- roster rows per progress update and per saved batch
+
+
+@dataclasses.dataclass
+class RosterImport:
+    course: str
+    saved: list  # --- (ID, Student) already saved in the course, in course order
+    students: list  # --- the saved Students, then the roster's
+    date_errors: list  # --- DateError of the roster's students, rows counted from the first roster student
+    duplicates: list  # --- Duplicate of the roster's students, rows counted from the first saved student
+
+
+def read_roster_import(store_path: str, course: str, roster, progress=None, cancel=None,
+                       batch_rows: int = BATCH_ROWS) -> RosterImport:
+    """Read the Students of 'roster' (an iterable, 'iter_roster' or the roster cache) for the course 'course'.
+    progress(students read, 0) is called every 'batch_rows' students; raises Cancelled once 'cancel' (a
+    threading.Event) is set."""
+    students = []
+    for student in roster:
+        students.append(student)
+        if len(students) % batch_rows == 0:
+            if cancel is not None and cancel.is_set():
+                raise Cancelled()
+            if progress is not None:
+                progress(len(students), 0)
+    # --- every date of birth is checked now, not when its form is filled
+    date_errors = normalize_birth_dates(students)
+
+    # --- the same student imported again is not a duplicate, it updates the saved student
+    store = StudentStore(store_path)
+    try:
+        course_id = store.find_course(course)
+        saved = store.students(course_id) if course_id is not None else []
+    finally:
+        store.close()
+    students = [student for _, student in saved] + students
+    duplicates = [duplicate for duplicate in find_duplicates(students, start=len(saved))
+                  if not (duplicate.exact and duplicate.original < len(saved))]
+    return RosterImport(course, saved, students, date_errors, duplicates)
+
+
+def save_roster_import(store_path: str, roster_import: RosterImport, merge: bool = False, progress=None,
+                       cancel=None, batch_rows: int = BATCH_ROWS) -> tuple:
+    """Save the students of 'roster_import' in its course, the duplicates merged into their originals if 'merge'
+    (skipped otherwise).  Returns (inserted, updated).  progress(saved, total) is called after every batch of
+    'batch_rows' students; raises Cancelled once 'cancel' is set, the batches saved so far are kept."""
+    saved, students = roster_import.saved, roster_import.students
+    store = StudentStore(store_path)
+    try:
+        if roster_import.duplicates:
+            students = resolve_duplicates(students, roster_import.duplicates, merge)
+            for (student_id, saved_student), student in zip(saved, students):
+                if student != saved_student:
+                    store.update(student_id, student)
+        course_id = store.open_course(roster_import.course)
+        students = students[len(saved):]
+        inserted = updated = 0
+        for start in range(0, len(students), batch_rows):
+            if cancel is not None and cancel.is_set():
+                raise Cancelled()
+            _, batch_inserted, batch_updated = store.upsert(course_id, students[start:start + batch_rows])
+            inserted, updated = inserted + batch_inserted, updated + batch_updated
+            if progress is not None:
+                progress(min(start + batch_rows, len(students)), len(students))
+    finally:
+        store.close()
+    return inserted, updated
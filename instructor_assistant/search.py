@@ -0,0 +1,151 @@
+"""Search-as-you-type index over the Student Diver list: first name, last name, email and phone.
+
+Every word of a student (name words, the email and its parts, the phone digits) is indexed by its one and two letter
+prefixes and by all its trigrams (three letter substrings).  A search term of one or two letters matches the start of
+a word; a longer term matches anywhere in a word, found by intersecting the sets of its trigrams and checking the few
+students left.  Students are added and removed one at a time, without rebuilding the index.
+
+Typing usually adds to the last query, so a query that only adds to the terms of the last one checks the last
+results, when there are few of them.  Only results of terms of three letters or more are refined: a one or two letter
+term matches the start of a word, so its results can miss students a longer term matches inside a word.
+"""
+
+import re
+import unicodedata
+
+PREFIX_LENGTHS = (1, 2)
+PHONE_TERM = re.compile(r"[\d()+\-.]*\d[\d()+\-.]*")
+# --- last results checked one by one when the query grows, more than this and the index is faster
+REFINE_RESULTS = 5000
+
+
+def normalize(text) -> str:
+    """'Zoë' -> 'zoe', case and accents are ignored"""
+    text = unicodedata.normalize("NFKD", "" if text is None else str(text))
+    return "".join(character for character in text if not unicodedata.combining(character)).casefold()
+
+
+def search_words(student) -> set:
+    words = set(normalize(f"{student.first_name} {student.last_name}").split())
+    email = normalize(student.email).strip()
+    if email:
+        words.add(email)
+        words.update(part for part in re.split(r"[@._+\-]", email) if part)
+    phone = re.sub(r"\D", "", str(student.phone or ""))
+    if phone:
+        words.add(phone)
+    return words
+
+
+def trigrams(word: str) -> set:
+    return {word[start:start + 3] for start in range(len(word) - 2)}
+
+
+def prefix_keys(words) -> set:
+    return {word[:length] for word in words for length in PREFIX_LENGTHS}
+
+
+def trigram_keys(words) -> set:
+    return {word[start:start + 3] for word in words for start in range(len(word) - 2)}
+
+
+def refines(last_terms, terms) -> bool:
+    """True if every student matching 'terms' matches 'last_terms': each last term is found anywhere in a word (three
+    letters or more) and is part of the new term in its place"""
+    return bool(last_terms) and len(terms) >= len(last_terms) and \
+        all(len(last) > 2 and last in term for last, term in zip(last_terms, terms))
+
+
+def index_add(index: dict, keys, student_id: int):
+    for key in keys:
+        index.setdefault(key, set()).add(student_id)
+
+
+def index_discard(index: dict, keys, student_id: int):
+    for key in keys:
+        index[key].discard(student_id)
+        if not index[key]:
+            del index[key]
+
+
+class StudentSearch:
+    """Search index of the Student Divers of a course.  'search' returns the IDs of the students matching a query."""
+
+    def __init__(self):
+        # --- student ID -> "\n" and its search words joined by "\n": a term is in a word if 'term in text', and
+        # --- starts a word if '"\n" + term in text'
+        self.texts = {}
+        self.positions = {}  # --- student ID -> order added, results are listed in this order
+        self.prefixes = {}  # --- one or two letter prefix -> student IDs with a word starting with it
+        self.trigrams = {}  # --- trigram -> student IDs with a word containing it
+        self._next_position = 0
+        self._last = ((), None)  # --- terms of the last query and its results
+
+    def __len__(self):
+        return len(self.texts)
+
+    def add(self, student_id: int, student):
+        if student_id in self.texts:
+            self.remove(student_id)
+        words = search_words(student)
+        self.texts[student_id] = "\n" + "\n".join(words)
+        self._last = ((), None)
+        self.positions[student_id] = self._next_position
+        self._next_position += 1
+        index_add(self.prefixes, prefix_keys(words), student_id)
+        index_add(self.trigrams, trigram_keys(words), student_id)
+
+    def remove(self, student_id: int):
+        words = self.texts.pop(student_id).split("\n")[1:]
+        self._last = ((), None)
+        del self.positions[student_id]
+        index_discard(self.prefixes, prefix_keys(words), student_id)
+        index_discard(self.trigrams, trigram_keys(words), student_id)
+
+    def clear(self):
+        self.__init__()
+
+    def matches(self, term: str) -> set:
+        """Return the IDs of the students with a word starting with 'term' (one or two letters) or containing it"""
+        if len(term) < 3:
+            return set(self.prefixes.get(term, ()))
+        if len(term) == 3:
+            return set(self.trigrams.get(term, ()))
+        sets = sorted((self.trigrams.get(trigram, set()) for trigram in trigrams(term)), key=len)
+        candidates = sets[0].intersection(*sets[1:])
+        texts = self.texts
+        return {student_id for student_id in candidates if term in texts[student_id]}
+
+    def in_order(self, student_ids: set) -> list:
+        """Return 'student_ids' in the order the students were added"""
+        if len(student_ids) * 8 > len(self.texts):
+            # --- for a large share of the students, one pass in order beats sorting
+            return [student_id for student_id in self.texts if student_id in student_ids]
+        return sorted(student_ids, key=self.positions.__getitem__)
+
+    def search(self, query: str):
+        """Return the IDs of the students matching every word of 'query', in the order they were added, or None if
+        'query' is empty (every student matches)"""
+        query = normalize(query)
+        # --- '555-0101' and '(555) 0101' search the phone digits
+        terms = [re.sub(r"\D", "", term) if PHONE_TERM.fullmatch(term) else term for term in query.split()]
+        if not terms:
+            return None
+
+        last_terms, last_results = self._last
+        if last_results is not None and len(last_results) <= REFINE_RESULTS and refines(last_terms, terms):
+            texts = self.texts
+            results = last_results
+            for term in terms:
+                check = term if len(term) > 2 else f"\n{term}"
+                results = [student_id for student_id in results if check in texts[student_id]]
+        else:
+            result = None
+            for term in sorted(terms, key=len, reverse=True):
+                matches = self.matches(term)
+                result = matches if result is None else result & matches
+                if not result:
+                    break
+            results = self.in_order(result)
+        self._last = (terms, results)
+        return results
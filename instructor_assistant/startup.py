@@ -0,0 +1,80 @@
+"""Startup profiler, turned on with the INSTRUCTOR_ASSISTANT_PROFILE_STARTUP environment variable.
+
+    INSTRUCTOR_ASSISTANT_PROFILE_STARTUP=1        print the breakdown to stderr
+    INSTRUCTOR_ASSISTANT_PROFILE_STARTUP=<path>   write the breakdown to <path>
+
+The breakdown lists the time taken by each import statement run while the app starts (including everything it
+imports in turn) and the time between each 'mark', e.g. the sections of 'MainUI.__init__'.  Import this module
+before any other so every import is timed.  When the variable is not set, 'mark' and 'report' do nothing.
+"""
+
+import builtins
+import os
+import sys
+import time
+
+PROFILE_ENV = "INSTRUCTOR_ASSISTANT_PROFILE_STARTUP"
+
+
+class StartupProfiler:
+    def __init__(self, destination: str = None):
+        self.destination = destination
+        self.enabled = bool(destination)
+        self.start = self.last = time.perf_counter()
+        self.marks = []
+        self.imports = {}
+        self._import = None
+        self._depth = 0
+
+    def trace_imports(self):
+        """Time every import statement from now until 'report'.  Nested imports count towards the statement that
+        triggered them."""
+        if not self.enabled or self._import is not None:
+            return
+        original_import = self._import = builtins.__import__
+
+        def timed_import(name, *args, **kwargs):
+            if self._depth:
+                return original_import(name, *args, **kwargs)
+            self._depth += 1
+            start = time.perf_counter()
+            try:
+                return original_import(name, *args, **kwargs)
+            finally:
+                self._depth -= 1
+                self.imports[name] = self.imports.get(name, 0) + time.perf_counter() - start
+
+        builtins.__import__ = timed_import
+
+    def mark(self, name: str):
+        """Record the time since the previous mark as 'name'"""
+        if not self.enabled:
+            return
+        now = time.perf_counter()
+        self.marks.append((name, now - self.last))
+        self.last = now
+
+    def report(self):
+        """Stop timing imports and write the breakdown, up to the first time the Tk main loop is idle"""
+        if not self.enabled:
+            return
+        self.mark("until first idle")
+        if self._import is not None:
+            builtins.__import__ = self._import
+            self._import = None
+
+        lines = [f"Startup profile: {time.perf_counter() - self.start:.3f}s", "", "Imports:"]
+        lines += [f"  {seconds:8.3f}s  {name}" for name, seconds in
+                  sorted(self.imports.items(), key=lambda item: item[1], reverse=True) if seconds >= 0.001]
+        lines += ["", "Startup:"]
+        lines += [f"  {seconds:8.3f}s  {name}" for name, seconds in self.marks]
+        text = "\n".join(lines) + "\n"
+        if self.destination == "1":
+            sys.stderr.write(text)
+        else:
+            with open(self.destination, "w") as profile_file:
+                profile_file.write(text)
+
+
+profiler = StartupProfiler(os.environ.get(PROFILE_ENV))
+profiler.trace_imports()
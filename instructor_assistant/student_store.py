@@ -0,0 +1,206 @@
+"""Local SQLite store of courses, their Student Divers and which students have a completed form.
+
+The Student Diver list is kept between sessions: every course is saved in 'config/students.db', and the last course
+opened is loaded again when the app starts.  Re-importing a roster into a course only writes the students that are
+new or changed.
+"""
+
+import datetime
+import sqlite3
+
+from instructor_assistant.students import STUDENT_FIELDS, Student, student_key
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS courses (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE,
+    opened INTEGER NOT NULL  -- increases every time a course is opened, the last opened has the highest
+);
+CREATE TABLE IF NOT EXISTS students (
+    id INTEGER PRIMARY KEY,
+    course_id INTEGER NOT NULL REFERENCES courses (id) ON DELETE CASCADE,
+    student_key TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    first_name, last_name, date_of_birth, sex, phone, email, street_address, city, province, postal, country,
+    UNIQUE (course_id, student_key)
+);
+CREATE INDEX IF NOT EXISTS students_course ON students (course_id, position);
+CREATE INDEX IF NOT EXISTS students_name ON students (last_name COLLATE NOCASE, first_name COLLATE NOCASE);
+CREATE TABLE IF NOT EXISTS completions (
+    student_id INTEGER PRIMARY KEY REFERENCES students (id) ON DELETE CASCADE,
+    output_path TEXT NOT NULL,
+    completed TEXT NOT NULL
+);
+"""
+STUDENT_COLUMNS = ", ".join(STUDENT_FIELDS)
+KEYS_PER_QUERY = 500  # --- below the SQLite limit on query parameters
+# --- datetime and date dates of birth are saved as ISO text with these prefixes and read back as datetime and date
+DATETIME_PREFIX = "datetime:"
+DATE_PREFIX = "date:"
+
+
+def encode_value(value):
+    if isinstance(value, datetime.datetime):
+        return DATETIME_PREFIX + value.isoformat()
+    if isinstance(value, datetime.date):
+        return DATE_PREFIX + value.isoformat()
+    return value
+
+
+def decode_value(value):
+    if isinstance(value, str) and value.startswith(DATETIME_PREFIX):
+        return datetime.datetime.fromisoformat(value[len(DATETIME_PREFIX):])
+    if isinstance(value, str) and value.startswith(DATE_PREFIX):
+        return datetime.date.fromisoformat(value[len(DATE_PREFIX):])
+    return value
+
+
+def student_row(student: Student) -> tuple:
+    return tuple(encode_value(getattr(student, field)) for field in STUDENT_FIELDS)
+
+
+def row_student(row) -> Student:
+    return Student(*(decode_value(value) for value in row))
+
+
+def now() -> str:
+    return datetime.datetime.now().isoformat(timespec="seconds")
+
+
+class StudentStore:
+    """Courses, Student Divers and completed forms in the SQLite database 'path'.  Student IDs are the database row
+    IDs, so they stay the same between sessions."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.connection = sqlite3.connect(path)
+        self.connection.execute("PRAGMA foreign_keys = ON")
+        with self.connection:
+            self.connection.executescript(SCHEMA)
+
+    def close(self):
+        self.connection.close()
+
+    # --- courses
+    def open_course(self, name: str) -> int:
+        """Return the ID of the course 'name', added if it is new, and make it the last course opened"""
+        with self.connection:
+            self.connection.execute("INSERT INTO courses (name, opened) "
+                                    "VALUES (?, (SELECT COALESCE(MAX(opened), 0) + 1 FROM courses)) "
+                                    "ON CONFLICT (name) DO UPDATE SET opened = excluded.opened", (name,))
+        return self.connection.execute("SELECT id FROM courses WHERE name = ?", (name,)).fetchone()[0]
+
+    def find_course(self, name: str):
+        """Return the ID of the course 'name', or None if there is no such course"""
+        course = self.connection.execute("SELECT id FROM courses WHERE name = ?", (name,)).fetchone()
+        return None if course is None else course[0]
+
+    def courses(self) -> list:
+        """Return (ID, name) of every course, the last opened first"""
+        return self.connection.execute("SELECT id, name FROM courses ORDER BY opened DESC").fetchall()
+
+    def last_course(self):
+        """Return (ID, name) of the last course opened, or None if there are no courses"""
+        courses = self.connection.execute("SELECT id, name FROM courses ORDER BY opened DESC LIMIT 1")
+        return courses.fetchone()
+
+    def delete_course(self, course_id: int):
+        with self.connection:
+            self.connection.execute("DELETE FROM courses WHERE id = ?", (course_id,))
+
+    # --- students
+    def count(self, course_id: int) -> int:
+        return self.connection.execute("SELECT COUNT(*) FROM students WHERE course_id = ?", (course_id,)).fetchone()[0]
+
+    def students(self, course_id: int, offset: int = 0, limit: int = -1) -> list:
+        """Return (ID, Student) for 'limit' students of the course from position 'offset', in roster order, so a
+        long course can be listed one page at a time"""
+        rows = self.connection.execute(f"SELECT id, {STUDENT_COLUMNS} FROM students WHERE course_id = ? "
+                                       f"ORDER BY position LIMIT ? OFFSET ?", (course_id, limit, offset))
+        return [(row[0], row_student(row[1:])) for row in rows]
+
+    def student(self, student_id: int) -> Student:
+        row = self.connection.execute(f"SELECT {STUDENT_COLUMNS} FROM students WHERE id = ?", (student_id,)).fetchone()
+        if row is None:
+            raise KeyError(student_id)
+        return row_student(row)
+
+    def find(self, first_name: str, last_name: str, course_id: int = None) -> list:
+        """Return the IDs of the students named 'first_name' 'last_name', ignoring case, in one course or all"""
+        query = "SELECT id FROM students WHERE last_name = ? COLLATE NOCASE AND first_name = ? COLLATE NOCASE"
+        parameters = [last_name.strip(), first_name.strip()]
+        if course_id is not None:
+            query += " AND course_id = ?"
+            parameters.append(course_id)
+        return [row[0] for row in self.connection.execute(query + " ORDER BY id", parameters)]
+
+    def add(self, course_id: int, student: Student) -> int:
+        """Add 'student' to the end of the course, or update the student with the same name, date of birth and
+        email, and return its ID"""
+        return self.upsert(course_id, [student])[0][0]
+
+    def upsert(self, course_id: int, students) -> tuple:
+        """Add or update 'students' in the course, matched on name, date of birth and email ('student_key').
+        Returns ([ID of every student, in order], inserted, updated).  Students that are unchanged are not written,
+        and students of the course that are not in 'students' are kept."""
+        students = list(students)
+        keys = list({student_key(student) for student in students})
+        existing = {}
+        # --- only the saved students with the same keys are read, through the (course_id, student_key) index
+        for start in range(0, len(keys), KEYS_PER_QUERY):
+            chunk = keys[start:start + KEYS_PER_QUERY]
+            existing.update((key, (student_id, row)) for student_id, key, *row in self.connection.execute(
+                f"SELECT id, student_key, {STUDENT_COLUMNS} FROM students WHERE course_id = ? "
+                f"AND student_key IN ({', '.join('?' * len(chunk))})", [course_id] + chunk))
+        position = self.connection.execute("SELECT COALESCE(MAX(position), -1) FROM students WHERE course_id = ?",
+                                           (course_id,)).fetchone()[0]
+        ids, inserts, updates = [], [], []
+        with self.connection:
+            for student in students:
+                key, row = student_key(student), student_row(student)
+                if key in existing:
+                    student_id, saved_row = existing[key]
+                    if tuple(saved_row) != row:
+                        updates.append(row + (student_id,))
+                        existing[key] = (student_id, row)
+                    ids.append(student_id)
+                    continue
+                position += 1
+                cursor = self.connection.execute(
+                    f"INSERT INTO students (course_id, student_key, position, {STUDENT_COLUMNS}) "
+                    f"VALUES (?, ?, ?{', ?' * len(STUDENT_FIELDS)})", (course_id, key, position) + row)
+                existing[key] = (cursor.lastrowid, row)
+                inserts.append(cursor.lastrowid)
+                ids.append(cursor.lastrowid)
+            self.connection.executemany(
+                f"UPDATE students SET {', '.join(f'{field} = ?' for field in STUDENT_FIELDS)} WHERE id = ?", updates)
+        return ids, len(inserts), len(updates)
+
+    def update(self, student_id: int, student: Student):
+        """Save the new information of the student 'student_id', a student merged with a duplicate say"""
+        assignments = ", ".join(f"{field} = ?" for field in STUDENT_FIELDS)
+        with self.connection:
+            try:
+                self.connection.execute(f"UPDATE students SET student_key = ?, {assignments} WHERE id = ?",
+                                        (student_key(student),) + student_row(student) + (student_id,))
+            except sqlite3.IntegrityError:
+                # --- another student of the course already has the new key, keep the old one
+                self.connection.execute(f"UPDATE students SET {assignments} WHERE id = ?",
+                                        student_row(student) + (student_id,))
+
+    def remove(self, student_id: int):
+        with self.connection:
+            self.connection.execute("DELETE FROM students WHERE id = ?", (student_id,))
+
+    # --- completed forms
+    def mark_completed(self, student_id: int, output_path: str):
+        with self.connection:
+            self.connection.execute("INSERT OR REPLACE INTO completions (student_id, output_path, completed) "
+                                    "VALUES (?, ?, ?)", (student_id, output_path, now()))
+
+    def completed(self, course_id: int) -> dict:
+        """Return student ID -> (completed form path, when) for the students of the course with a completed form"""
+        rows = self.connection.execute("SELECT completions.student_id, output_path, completed FROM completions "
+                                       "JOIN students ON students.id = completions.student_id "
+                                       "WHERE course_id = ?", (course_id,))
+        return {student_id: (output_path, completed) for student_id, output_path, completed in rows}
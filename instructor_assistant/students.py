@@ -0,0 +1,102 @@
+"""Student Diver information."""
+
+import datetime
+import itertools
+from dataclasses import dataclass
+
+
+STUDENT_FIELDS = ("first_name", "last_name", "date_of_birth", "sex", "phone", "email", "street_address", "city",
+                  "province", "postal", "country")
+# --- fields with few distinct values in a roster, one string object is kept per value
+CATEGORY_FIELDS = ("sex", "city", "province", "country")
+
+
+@dataclass
+class Student:
+    # --- no per-student __dict__, a Student is about a third of the size
+    __slots__ = STUDENT_FIELDS
+
+    first_name: str
+    last_name: str
+    date_of_birth: str
+    sex: str
+    phone: str
+    email: str
+    street_address: str
+    city: str
+    province: str
+    postal: str
+    country: str
+
+
+def name_key(first_name: str, last_name: str) -> str:
+    """'Jane', ' DIVER ' -> 'jane diver', the key of the StudentGroup name index"""
+    return f"{str(first_name).strip()} {str(last_name).strip()}".casefold()
+
+
+def student_key(student) -> str:
+    """Name, date of birth and email of 'student' as one key, the same for the same student imported twice"""
+    date_of_birth = student.date_of_birth
+    if isinstance(date_of_birth, datetime.date):
+        date_of_birth = date_of_birth.strftime("%d/%m/%Y")
+    return f"{name_key(student.first_name, student.last_name)}|{str(date_of_birth).strip()}|" \
+           f"{str(student.email).strip().casefold()}"
+
+
+class StudentGroup:
+    """The Student Diver list.  Every student gets an ID when added that stays the same for as long as the group
+    exists, so two students with the same name are never mixed up.  Students are found by ID or by name in
+    constant time, however many there are."""
+
+    def __init__(self):
+        self._next_id = 1
+        self.students = {}  # --- ID -> Student, in the order added
+        self.name_index = {}  # --- name_key -> [ID, ...]
+        self._categories = {}  # --- CATEGORY_FIELDS value -> the one string kept for it
+
+    def __len__(self):
+        return len(self.students)
+
+    def __iter__(self):
+        return iter(self.students.values())
+
+    def add(self, student: Student, student_id: int = None) -> int:
+        """Add 'student' and return its ID, a new one unless 'student_id' is given (a StudentStore ID).  Its
+        CATEGORY_FIELDS values are replaced by equal strings shared with the other students."""
+        for field in CATEGORY_FIELDS:
+            value = getattr(student, field)
+            if isinstance(value, str):
+                setattr(student, field, self._categories.setdefault(value, value))
+        if student_id is None:
+            student_id = self._next_id
+        elif student_id in self.students:
+            raise ValueError(f"Student ID {student_id} is already in the group")
+        self._next_id = max(self._next_id, student_id + 1)
+        self.students[student_id] = student
+        self.name_index.setdefault(name_key(student.first_name, student.last_name), []).append(student_id)
+        return student_id
+
+    def clear(self):
+        self.students.clear()
+        self.name_index.clear()
+        self._categories.clear()
+
+    def remove(self, student_id: int) -> Student:
+        """Remove and return the student 'student_id'"""
+        student = self.students.pop(student_id)
+        key = name_key(student.first_name, student.last_name)
+        self.name_index[key].remove(student_id)
+        if not self.name_index[key]:
+            del self.name_index[key]
+        return student
+
+    def get(self, student_id: int) -> Student:
+        return self.students[student_id]
+
+    def rows(self, start: int = 0, stop: int = None) -> list:
+        """Return (ID, Student) for the students from position 'start' up to 'stop', in the order added"""
+        return list(itertools.islice(self.students.items(), start, stop))
+
+    def find(self, first_name: str, last_name: str) -> list:
+        """Return the IDs of every student named 'first_name' 'last_name', ignoring case and outer spaces"""
+        return list(self.name_index.get(name_key(first_name, last_name), ()))
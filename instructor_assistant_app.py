@@ -7,21 +7,36 @@ Created: May 6th, 2023
 
 __version__ = "1.0.0"
 
+from instructor_assistant.startup import profiler  # --- first, so the startup profiler can time every import
 import datetime
 import os
 import tkinter
 import json
-import hashlib
-import secrets
 import customtkinter
-import pandas
 import configparser
 import webbrowser
+import multiprocessing
 
 from tkcalendar import DateEntry
-from fillpdf import fillpdfs
 from tkinter import Toplevel, Menu, messagebox, filedialog
-from dataclasses import dataclass
+from instructor_assistant.students import Student, StudentGroup
+from instructor_assistant.forms import birth_date_parts, combined_record_file_name, record_file_name, student_fields
+from instructor_assistant.batch import (OUTPUT_COMBINED, OUTPUT_FILES, OUTPUT_MODES, OUTPUT_ZIP, generate_batch,
+                                        generate_combined, generate_zip)
+from instructor_assistant.form_template import DEFAULT_BACKEND, FormTemplate, get_form_template
+from instructor_assistant.record_cache import RecordCache, record_digest
+from instructor_assistant.jobs import Cancelled, JobQueue
+from instructor_assistant.field_map import FieldMap
+from instructor_assistant.instructors import DEFAULT_KDF, DEFAULT_UNLOCK_MINUTES, InstructorStore, UnlockSession
+from instructor_assistant.roster import DEFAULT_PROFILE, load_roster_profile
+from instructor_assistant.roster_cache import RosterCache
+from instructor_assistant.roster_import import read_roster_import, save_roster_import
+from instructor_assistant.dates import normalize_birth_dates, normalize_dates
+from instructor_assistant.student_store import StudentStore
+from instructor_assistant.search import StudentSearch
+from instructor_assistant.persistence import WriteBehind, config_text, json_text
+
+profiler.mark("imports")
 
 # Datetime
 today = datetime.datetime.today()
@@ -39,39 +54,34 @@ STUDENT_AND_REFERRAL_FORM = f"{path}\\assets\\Record_and_Referral_Form.pdf"
 STANDARD_FONT = ("roboto", "10")
 TITLE_HEADER_FONT = ("roboto", "14")
 
+CONFIG_INI = f"{path}\\config\\config.ini"
 INSTRUCTOR_DATA = f"{path}\\config\\instructor_data.json"
 DIVE_TEMPLATE_DATA = f"{path}\\config\\dive_template_data.json"
+GENERATED_RECORDS = f"{path}\\config\\generated_records.json"
+FIELD_MAP = f"{path}\\config\\field_map.json"
+ROSTER_PROFILES = f"{path}\\config\\roster_profiles.json"
+STUDENT_DB = f"{path}\\config\\students.db"
+ROSTER_CACHE = f"{path}\\config\\roster_cache"
+ROSTER_FILE_TYPES = [("Rosters", "*.xlsx *.csv *.txt *.jsonl *.json *.parquet"), ("All files", "*.*")]
+
+JOB_POLL_MS = 100
+ROSTER_REFRESH_ROWS = 250  # --- imported rows per progress update and per saved batch
+STUDENT_PAGE_ROWS = 1000  # --- students listed per 'after' callback when a course is opened
+DUPLICATES_LISTED = 10  # --- duplicates (and date of birth errors) named in an import question
+DEFAULT_COURSE = "My Students"  # --- course of students added by hand before any course is opened
+WRITE_DELAY = 1.0  # --- seconds after the last change the config files are saved, '[storage] write_delay'
 
 # Student Information Global Dictionary
 student_dict_global = {}
 
 
-@dataclass
-class Student:
-    first_name: str
-    last_name: str
-    date_of_birth: str
-    sex: str
-    phone: str
-    email: str
-    street_address: str
-    city: str
-    province: str
-    postal: str
-    country: str
-
-
-class StudentGroup:
-    def __init__(self):
-        self.student_list = []
-
-
 # --------------------------- THEME --------------------------------- #
 
 
 class Theme:
     def __init__(self, style: str, style_dict: dict):
         self.set_text_color = style_dict[style]["set_text_color"]
+        self.completed_text_color = style_dict[style]["completed_text_color"]
         self.reset_main_text_color = style_dict[style]["reset_main_text_color"]
         self.listbox_color = style_dict[style]["listbox_color"]
         self.text_color = style_dict[style]["text_color"]
@@ -90,6 +100,19 @@ class Theme:
         self.master_switch_hover_color = style_dict[style]["master_switch_hover_color"]
 
 
+def load_templates() -> dict:
+    """Return the saved dive templates, with changes not written to 'dive_template_data.json' yet"""
+    return json.loads(file_writer.read(DIVE_TEMPLATE_DATA))
+
+
+def save_templates(templates: dict):
+    file_writer.write(DIVE_TEMPLATE_DATA, json_text(templates))
+
+
+def save_config():
+    file_writer.write(CONFIG_INI, config_text(config))
+
+
 def or_elearning_select():
     """Toggle Checkboxes for Knowledge Development"""
     if main_ui.kd_switch_list[0].get() == 1:
@@ -508,12 +531,10 @@ def new_template(ui):
     template_right_frame.grid(row=1, column=2, sticky="nsew", padx=10, pady=10)
 
     def delete_template(nuked_rule):
-        with open(DIVE_TEMPLATE_DATA, "r") as data:
-            temp = json.load(data)
+        temp = load_templates()
 
         del temp[nuked_rule]
-        with open(DIVE_TEMPLATE_DATA, "w") as data:
-            json.dump(temp, data, indent=4)
+        save_templates(temp)
 
         date_rule_box_set_rule.configure(values=temp)
         date_rule_box_set_rule.set("")
@@ -525,8 +546,7 @@ def new_template(ui):
     delete_label.grid(row=0, column=0, pady=(20, 5))
 
     try:
-        with open(DIVE_TEMPLATE_DATA, "r") as data:
-            templates = json.load(data)
+        templates = load_templates()
     except FileNotFoundError:
         templates = {}
 
@@ -602,11 +622,9 @@ def new_template(ui):
         new_data[template_name]["course_option"].append(computer_switch_set_rule.get())
 
         try:
-            with open(DIVE_TEMPLATE_DATA, "r") as data_file:
-                data = json.load(data_file)
+            data = load_templates()
         except FileNotFoundError:
-            with open(DIVE_TEMPLATE_DATA, "w") as data_file:
-                json.dump(new_data, data_file, indent=4)
+            save_templates(new_data)
         else:
             data.update(new_data)
 
@@ -616,8 +634,7 @@ def new_template(ui):
 
             main_ui.date_rule_box.configure(values=new_key_list)
 
-            with open(DIVE_TEMPLATE_DATA, "w") as data_file:
-                json.dump(data, data_file, indent=4)
+            save_templates(data)
 
         new_template_window.destroy()
 
@@ -632,8 +649,7 @@ def new_template(ui):
 def execute_template():
     """Function to set Dates and Dives in main Window to users specs.'"""
 
-    with open(DIVE_TEMPLATE_DATA, "r") as datafile:  # --- Open Dictionary with Users Date/Dive Specs
-        date_dict = json.load(datafile)
+    date_dict = load_templates()  # --- Open Dictionary with Users Date/Dive Specs
 
     template_name = main_ui.date_rule_box.get()
     all_cal_entries_list = main_ui.cw_cal_list + main_ui.kd_cal_list + main_ui.ow_cal_list
@@ -686,11 +702,14 @@ def execute_template():
 
 
 def set_instructor(ui):
-    """Password Verification UI window for users to input their Instructor Password."""
-    with open(INSTRUCTOR_DATA, "r") as data_file:
-        instructor_list = json.load(data_file)
-    set_inst = main_ui.list_box.get()
+    """Password Verification UI window for users to input their Instructor Password.  The instructor is read from
+    'instructor_store' when the password is submitted.  An instructor unlocked in this session is set without the
+    password."""
     inst = main_ui.list_box.get()
+    unlocked = unlock_session.get(inst)
+    if unlocked is not None:
+        apply_instructor(inst, unlocked)
+        return
     pass_window = Toplevel(ui)
     pass_window.geometry("500x250")
     pass_window.title("Instructor Password")
@@ -710,8 +729,6 @@ def set_instructor(ui):
                                         border_color=theme.main_button_color)
 
     pass_entry.grid(column=0, row=0, pady=10, padx=10, sticky="ew")
-    salt = (instructor_list[inst]["Password"]["Salt"])
-    hashed_pass = (instructor_list[inst]["Password"]["Hash"])
 
     def show():
         if password_switch.get() == 0:
@@ -729,186 +746,15 @@ def set_instructor(ui):
 
     def password_verify():
         """Verify if password is correct.  If correct updates 'fields' dictionary if checkbox is selected."""
-        hash_object = hashlib.sha256(salt.encode() + pass_entry.get().encode())
-        hashed_password_entry = hash_object.hexdigest()
-        if hashed_password_entry == hashed_pass:
+        instructor = instructor_store.get(inst)
+        if instructor is None:
             pass_window.destroy()
-            if len(fields["PADI Instructor"]) == 0:  # --- check if first Instructor Info field is emtpy
-                fields["PADI Instructor"] = instructor_list[set_inst]["PADI Instructor"]
-                fields["PADI No"] = instructor_list[set_inst]["PADI Number"]
-                fields["Dive CenterResort No"] = instructor_list[set_inst]["Dive Center"]
-                fields["Date"] = today.day
-                fields["undefined_9"] = today.month
-                fields["undefined_10"] = today.year
-                fields["undefined_12"] = instructor_list[set_inst]["Phone"]
-                fields["Email_2"] = instructor_list[set_inst]["Email"]
-
-            if fields["PADI Instructor"] == instructor_list[set_inst]["PADI Instructor"]:
-                pass
-
-            else:  # --- If first Instructor field has info, update the second Instructor field
-                fields["PADI Instructor_2"] = instructor_list[set_inst]["PADI Instructor"]
-                fields["PADI No_2"] = instructor_list[set_inst]["PADI Number"]
-                fields["Dive CenterResort No_2"] = instructor_list[set_inst]["Dive Center"]
-                fields["Date_2"] = today.day
-                fields["undefined_15"] = today.month
-                fields["undefined_16"] = today.year
-                fields["undefined_18"] = instructor_list[set_inst]["Phone"]
-                fields["Email_3"] = instructor_list[set_inst]["Email"]
-
-            # --- Check if corresponding checkbox is True. If so update Instructor Initials and PADI Number
-            if main_ui.cw_switch_list[0].get() == 1:
-                main_ui.cw_set_instructor_list[0].config(text=inst, fg=theme.set_text_color)
-                fields["Initials 1"] = instructor_list[set_inst]["Initials"]
-                fields["undefined_29"] = instructor_list[set_inst]["PADI Number"]
-            if main_ui.cw_switch_list[1].get() == 1:
-                main_ui.cw_set_instructor_list[1].config(text=inst, fg=theme.set_text_color)
-                fields["Initials 2"] = instructor_list[set_inst]["Initials"]
-                fields["undefined_35"] = instructor_list[set_inst]["PADI Number"]
-            if main_ui.cw_switch_list[2].get() == 1:
-                main_ui.cw_set_instructor_list[2].config(text=inst, fg=theme.set_text_color)
-                fields["Initials 3"] = instructor_list[set_inst]["Initials"]
-                fields["undefined_41"] = instructor_list[set_inst]["PADI Number"]
-            if main_ui.cw_switch_list[3].get() == 1:
-                main_ui.cw_set_instructor_list[3].config(text=inst, fg=theme.set_text_color)
-                fields["Initials 4"] = instructor_list[set_inst]["Initials"]
-                fields["undefined_47"] = instructor_list[set_inst]["PADI Number"]
-            if main_ui.cw_switch_list[4].get() == 1:
-                main_ui.cw_set_instructor_list[4].config(text=inst, fg=theme.set_text_color)
-                fields["DSD with all CW Dive 1 skills  Open Water Diver CW Dive 1"] = instructor_list[set_inst][
-                    "Initials"]
-                fields["undefined_55"] = instructor_list[set_inst]["PADI Number"]
-            if main_ui.cw_switch_list[5].get() == 1:
-                main_ui.cw_set_instructor_list[5].config(text=inst, fg=theme.set_text_color)
-                fields["200 metreyard Swim OR 300 metreyard MaskSnorkelFin Swim"] = instructor_list[set_inst][
-                    "Initials"]
-                fields["undefined_68"] = instructor_list[set_inst]["PADI Number"]
-            if main_ui.cw_switch_list[6].get() == 1:
-                main_ui.cw_set_instructor_list[6].config(text=inst, fg=theme.set_text_color)
-                fields["undefined_73"] = instructor_list[set_inst]["Initials"]
-                fields["undefined_74"] = instructor_list[set_inst]["PADI Number"]
-            if main_ui.cw_switch_list[7].get() == 1:
-                main_ui.cw_set_instructor_list[7].config(text=inst, fg=theme.set_text_color)
-                fields["undefined_77"] = instructor_list[set_inst]["Initials"]
-                fields["undefined_78"] = instructor_list[set_inst]["PADI Number"]
-            if main_ui.cw_switch_list[8].get() == 1:
-                main_ui.cw_set_instructor_list[8].config(text=inst, fg=theme.set_text_color)
-                fields["undefined_93"] = instructor_list[set_inst]["Initials"]
-                fields["undefined_94"] = instructor_list[set_inst]["PADI Number"]
-            if main_ui.cw_switch_list[9].get() == 1:
-                main_ui.cw_set_instructor_list[9].config(text=inst, fg=theme.set_text_color)
-                fields["undefined_98"] = instructor_list[set_inst]["Initials"]
-                fields["undefined_99"] = instructor_list[set_inst]["PADI Number"]
-            if main_ui.cw_switch_list[10].get() == 1:
-                main_ui.cw_set_instructor_list[10].config(text=inst, fg=theme.set_text_color)
-                fields["undefined_104"] = instructor_list[set_inst]["Initials"]
-                fields["undefined_101"] = instructor_list[set_inst]["PADI Number"]
-            if main_ui.cw_switch_list[11].get() == 1:
-                main_ui.cw_set_instructor_list[11].config(text=inst, fg=theme.set_text_color)
-                fields["undefined_105"] = instructor_list[set_inst]["Initials"]
-                fields["undefined_106"] = instructor_list[set_inst]["PADI Number"]
-            if main_ui.cw_switch_list[12].get() == 1:
-                main_ui.cw_set_instructor_list[12].config(text=inst, fg=theme.set_text_color)
-                fields["undefined_119"] = instructor_list[set_inst]["Initials"]
-                fields["undefined_120"] = instructor_list[set_inst]["PADI Number"]
-            if main_ui.cw_switch_list[13].get() == 1:
-                main_ui.cw_set_instructor_list[13].config(text=inst, fg=theme.set_text_color)
-                fields["undefined_124"] = instructor_list[set_inst]["Initials"]
-                fields["undefined_125"] = instructor_list[set_inst]["PADI Number"]
-            if main_ui.cw_switch_list[14].get() == 1:
-                main_ui.cw_set_instructor_list[14].config(text=inst, fg=theme.set_text_color)
-                fields["PADI"] = instructor_list[set_inst]["PADI Number"]
-
-            if main_ui.kd_switch_list[0].get() == 1:
-                main_ui.kd_set_instructor_list[0].config(text=inst, fg=theme.set_text_color)
-                fields["undefined_33"] = instructor_list[set_inst]["Initials"]
-                fields["undefined_34"] = instructor_list[set_inst]["PADI Number"]
-            if main_ui.kd_switch_list[1].get() == 1:
-                main_ui.kd_set_instructor_list[1].config(text=inst, fg=theme.set_text_color)
-                fields["undefined_39"] = instructor_list[set_inst]["Initials"]
-                fields["undefined_40"] = instructor_list[set_inst]["PADI Number"]
-            if main_ui.kd_switch_list[2].get() == 1:
-                main_ui.kd_set_instructor_list[2].config(text=inst, fg=theme.set_text_color)
-                fields["undefined_45"] = instructor_list[set_inst]["Initials"]
-                fields["undefined_46"] = instructor_list[set_inst]["PADI Number"]
-            if main_ui.kd_switch_list[3].get() == 1:
-                main_ui.kd_set_instructor_list[3].config(text=inst, fg=theme.set_text_color)
-                fields["undefined_51"] = instructor_list[set_inst]["Initials"]
-                fields["undefined_52"] = instructor_list[set_inst]["PADI Number"]
-            if main_ui.kd_switch_list[4].get() == 1:
-                main_ui.kd_set_instructor_list[4].config(text=inst, fg=theme.set_text_color)
-                fields["undefined_59"] = instructor_list[set_inst]["Initials"]
-                fields["undefined_60"] = instructor_list[set_inst]["PADI Number"]
-            if main_ui.kd_switch_list[5].get() == 1:
-                main_ui.kd_set_instructor_list[5].config(text=inst, fg=theme.set_text_color)
-                fields["undefined_64"] = instructor_list[set_inst]["Initials"]
-                fields["undefined_65"] = instructor_list[set_inst]["PADI Number"]
-            if main_ui.kd_switch_list[6].get() == 1:
-                main_ui.kd_set_instructor_list[6].config(text=inst, fg=theme.set_text_color)
-                fields["undefined_69"] = instructor_list[set_inst]["PADI Number"]
-
-            if main_ui.ow_switch_list[0].get() == 1:
-                main_ui.ow_set_instructor_list[0].config(text=inst, fg=theme.set_text_color)
-                fields["Initials 1_2"] = instructor_list[set_inst]["Initials"]
-                fields["undefined_86"] = instructor_list[set_inst]["PADI Number"]
-            if main_ui.ow_switch_list[1].get() == 1:
-                main_ui.ow_set_instructor_list[1].config(text=inst, fg=theme.set_text_color)
-                fields["Initials 2_2"] = instructor_list[set_inst]["Initials"]
-                fields["undefined_81"] = instructor_list[set_inst]["PADI Number"]
-            if main_ui.ow_switch_list[2].get() == 1:
-                main_ui.ow_set_instructor_list[2].config(text=inst, fg=theme.set_text_color)
-                fields["Initials 1_3"] = instructor_list[set_inst]["Initials"]
-                fields["undefined_89"] = instructor_list[set_inst]["PADI Number"]
-            if main_ui.ow_switch_list[3].get() == 1:
-                main_ui.ow_set_instructor_list[3].config(text=inst, fg=theme.set_text_color)
-                fields["Initials 2_3"] = instructor_list[set_inst]["Initials"]
-                fields["undefined_90"] = instructor_list[set_inst]["PADI Number"]
-            if main_ui.ow_switch_list[4].get() == 1:
-                main_ui.ow_set_instructor_list[4].config(text=inst, fg=theme.set_text_color)
-                fields["Instructor Initials 1"] = instructor_list[set_inst]["Initials"]
-                fields["undefined_109"] = instructor_list[set_inst]["PADI Number"]
-            if main_ui.ow_switch_list[5].get() == 1:
-                main_ui.ow_set_instructor_list[5].config(text=inst, fg=theme.set_text_color)
-                fields["Instructor Initials 2"] = instructor_list[set_inst]["Initials"]
-                fields["undefined_110"] = instructor_list[set_inst]["PADI Number"]
-            if main_ui.ow_switch_list[6].get() == 1:
-                main_ui.ow_set_instructor_list[6].config(text=inst, fg=theme.set_text_color)
-                fields["Instructor Initials 3"] = instructor_list[set_inst]["Initials"]
-                fields["undefined_111"] = instructor_list[set_inst]["PADI Number"]
-            if main_ui.ow_switch_list[7].get() == 1:
-                main_ui.ow_set_instructor_list[7].config(text=inst, fg=theme.set_text_color)
-                fields["Instructor Initials 4"] = instructor_list[set_inst]["Initials"]
-                fields["undefined_112"] = instructor_list[set_inst]["PADI Number"]
-            if main_ui.ow_switch_list[8].get() == 1:
-                main_ui.ow_set_instructor_list[8].config(text=inst, fg=theme.set_text_color)
-                fields["Instructor Initials 5"] = instructor_list[set_inst]["Initials"]
-                fields["undefined_113"] = instructor_list[set_inst]["PADI Number"]
-            if main_ui.ow_switch_list[9].get() == 1:
-                main_ui.ow_set_instructor_list[9].config(text=inst, fg=theme.set_text_color)
-                fields["Instructor Initials 6"] = instructor_list[set_inst]["Initials"]
-                fields["undefined_114"] = instructor_list[set_inst]["PADI Number"]
-            if main_ui.ow_switch_list[10].get() == 1:
-                main_ui.ow_set_instructor_list[10].config(text=inst, fg=theme.set_text_color)
-                fields["Instructor Initials 7"] = instructor_list[set_inst]["Initials"]
-                fields["undefined_115"] = instructor_list[set_inst]["PADI Number"]
-            if main_ui.ow_switch_list[11].get() == 1:
-                main_ui.ow_set_instructor_list[11].config(text=inst, fg=theme.set_text_color)
-                fields["Instructor Initials 8"] = instructor_list[set_inst]["Initials"]
-                fields["undefined_116"] = instructor_list[set_inst]["PADI Number"]
-            if main_ui.ow_switch_list[12].get() == 1:
-                main_ui.ow_set_instructor_list[12].config(text=inst, fg=theme.set_text_color)
-                fields["Instructor Initials 9"] = instructor_list[set_inst]["Initials"]
-                fields["undefined_117"] = instructor_list[set_inst]["PADI Number"]
-            if main_ui.ow_switch_list[13].get() == 1:
-                main_ui.ow_set_instructor_list[13].config(text=inst, fg=theme.set_text_color)
-                fields["Instructor Initials 10"] = instructor_list[set_inst]["Initials"]
-                fields["undefined_121"] = instructor_list[set_inst]["PADI Number"]
-            if main_ui.ow_switch_list[14].get() == 1:
-                main_ui.ow_set_instructor_list[14].config(text=inst, fg=theme.set_text_color)
-                fields["undefined_126"] = instructor_list[set_inst]["PADI Number"]
-            if main_ui.ow_switch_list[15].get() == 1:
-                main_ui.ow_set_instructor_list[15].config(text=inst, fg=theme.set_text_color)
-                fields["undefined_137"] = instructor_list[set_inst]["PADI Number"]
+            messagebox.showinfo(message="Select a PADI Instructor first")
+        elif unlock_session.verify(inst, instructor, pass_entry.get()):
+            # --- a password saved with an older (or the legacy sha256) hash is saved again with the configured KDF
+            instructor_store.upgrade_password(inst, pass_entry.get())
+            pass_window.destroy()
+            apply_instructor(inst, instructor)
 
         else:  # --- User Enters Wrong Password
             pass_window.destroy()
@@ -923,278 +769,173 @@ def set_instructor(ui):
     pass_button.grid(column=1, row=1, pady=10, padx=10)
 
 
-def set_date():
-    """Add dates to 'field' dictionary and change 'Set Dive' Label to Calendar DateEntry"""
+def apply_instructor(inst: str, instructor: dict):
+    """Update 'fields' with the instructor details, and the initials of every row whose checkbox is selected"""
+    # --- first Instructor Info fields if they are empty, otherwise the second Instructor Info fields
+    field_map.set_instructor_details(fields, instructor, today)
 
-    # --- Confined Water Dives
-    if main_ui.cw_switch_list[0].get() == 1:
-        con_water_one_date = main_ui.cw_cal_list[0].get_date()
-        main_ui.cw_set_date_list[0].config(text=con_water_one_date, fg=theme.set_text_color)
-        fields["CW 1"] = con_water_one_date.day
-        fields["undefined_27"] = con_water_one_date.month
-        fields["undefined_28"] = con_water_one_date.year
-    if main_ui.cw_switch_list[1].get() == 1:
-        con_water_two_date = main_ui.cw_cal_list[1].get_date()
-        main_ui.cw_set_date_list[1].config(text=con_water_two_date, fg=theme.set_text_color)
-        fields["CW 2"] = con_water_two_date.day
-        fields["undefined_21"] = con_water_two_date.month
-        fields["undefined_22"] = con_water_two_date.year
-    if main_ui.cw_switch_list[2].get() == 1:
-        con_water_three_date = main_ui.cw_cal_list[2].get_date()
-        main_ui.cw_set_date_list[2].config(text=con_water_three_date, fg=theme.set_text_color)
-        fields["CW 3"] = con_water_three_date.day
-        fields["undefined_23"] = con_water_three_date.month
-        fields["undefined_24"] = con_water_three_date.year
-    if main_ui.cw_switch_list[3].get() == 1:
-        con_water_four_date = main_ui.cw_cal_list[3].get_date()
-        main_ui.cw_set_date_list[3].config(text=con_water_four_date, fg=theme.set_text_color)
-        fields["CW 4"] = con_water_four_date.day
-        fields["undefined_25"] = con_water_four_date.month
-        fields["undefined_26"] = con_water_four_date.year
-    if main_ui.cw_switch_list[4].get() == 1:
-        con_water_five_date = main_ui.cw_cal_list[4].get_date()
-        main_ui.cw_set_date_list[4].config(text=con_water_five_date, fg=theme.set_text_color)
-        fields["CW 5"] = con_water_five_date.day
-        fields["undefined_53"] = con_water_five_date.month
-        fields["undefined_54"] = con_water_five_date.year
-    if main_ui.cw_switch_list[5].get() == 1:  # Swim
-        swim_date = main_ui.cw_cal_list[5].get_date()
-        main_ui.cw_set_date_list[5].config(text=swim_date, fg=theme.set_text_color)
-        fields["10 Minute Survival Float"] = swim_date.day
-        fields["undefined_66"] = swim_date.month
-        fields["undefined_67"] = swim_date.year
-    if main_ui.cw_switch_list[6].get() == 1:  # Float
-        float_date = main_ui.cw_cal_list[6].get_date()
-        main_ui.cw_set_date_list[6].config(text=float_date, fg=theme.set_text_color)
-        fields["undefined_75"] = float_date.day
-        fields["undefined_76"] = float_date.month
-        fields["undefined_72"] = float_date.year
-    if main_ui.cw_switch_list[7].get() == 1:
-        equip_date = main_ui.cw_cal_list[7].get_date()
-        main_ui.cw_set_date_list[7].config(text=equip_date, fg=theme.set_text_color)
-        fields["Equipment Preparation and Care"] = equip_date.day
-        fields["undefined_91"] = equip_date.month
-        fields["undefined_92"] = equip_date.year
-    if main_ui.cw_switch_list[8].get() == 1:
-        disconnect_date = main_ui.cw_cal_list[8].get_date()
-        main_ui.cw_set_date_list[8].config(text=disconnect_date, fg=theme.set_text_color)
-        fields["Disconnect Low Pressure Inflator Hose"] = disconnect_date.day
-        fields["undefined_95"] = disconnect_date.month
-        fields["undefined_96"] = disconnect_date.year
-    if main_ui.cw_switch_list[9].get() == 1:
-        loose_date = main_ui.cw_cal_list[9].get_date()
-        main_ui.cw_set_date_list[9].config(text=loose_date, fg=theme.set_text_color)
-        fields["Loose Cylinder Band"] = loose_date.day
-        fields["undefined_100"] = loose_date.month
-        fields["undefined_97"] = loose_date.year
-    if main_ui.cw_switch_list[10].get() == 1:
-        weight_date = main_ui.cw_cal_list[10].get_date()
-        main_ui.cw_set_date_list[10].config(text=weight_date, fg=theme.set_text_color)
-        fields["Weight System Removal and Replacement surface"] = weight_date.day
-        fields["undefined_102"] = weight_date.month
-        fields["undefined_103"] = weight_date.year
-    if main_ui.cw_switch_list[11].get() == 1:
-        weight_drop_date = main_ui.cw_cal_list[11].get_date()
-        main_ui.cw_set_date_list[11].config(text=weight_drop_date, fg=theme.set_text_color)
-        fields["Emergency Weight Drop or in OW"] = weight_drop_date.day
-        fields["undefined_107"] = weight_drop_date.month
-        fields["undefined_108"] = weight_drop_date.year
-    if main_ui.cw_switch_list[12].get() == 1:
-        skin_diving_date = main_ui.cw_cal_list[12].get_date()
-        main_ui.cw_set_date_list[12].config(text=skin_diving_date, fg=theme.set_text_color)
-        fields["Skin Diving Skills"] = skin_diving_date.day
-        fields["undefined_122"] = skin_diving_date.month
-        fields["undefined_118"] = skin_diving_date.year
-    if main_ui.cw_switch_list[13].get() == 1:
-        drysuit_orientation_date = main_ui.cw_cal_list[13].get_date()
-        main_ui.cw_set_date_list[13].config(text=drysuit_orientation_date, fg=theme.set_text_color)
-        fields[
-            "Note If all Confined Water Dives Confined Water Dive Flexible Skills and Wa"] = drysuit_orientation_date.day
-        fields["undefined_129"] = drysuit_orientation_date.month
-        fields["undefined_123"] = drysuit_orientation_date.year
-    if main_ui.cw_switch_list[14].get() == 1:
-        confined_water_signoff_date = main_ui.cw_cal_list[14].get_date()
-        main_ui.cw_set_date_list[14].config(text=confined_water_signoff_date, fg=theme.set_text_color)
-        fields["Date_6"] = confined_water_signoff_date.day
-        fields["undefined_132"] = confined_water_signoff_date.month
-        fields["undefined_133"] = confined_water_signoff_date.year
-    # --- Knowledge Development
+    # --- Check if corresponding switch is on. If so update Instructor Initials and PADI Number
+    for section, switches, _, _, set_instructor_labels in section_inputs():
+        selected = [switch.get() == 1 for switch in switches]
+        field_map.set_initials(fields, section, selected, instructor)
+        for label, on in zip(set_instructor_labels, selected):
+            if on:
+                label.config(text=inst, fg=theme.set_text_color)
 
-    if main_ui.kd_switch_list[0].get() == 1:
-        kr1_date = main_ui.kd_cal_list[0].get_date()
-        main_ui.kd_set_date_list[0].config(text=kr1_date, fg=theme.set_text_color)
-        fields["Section 1"] = kr1_date.day
-        fields["undefined_30"] = kr1_date.month
-        fields["undefined_31"] = kr1_date.year
-    if main_ui.kd_switch_list[1].get() == 1:
-        kr2_date = main_ui.kd_cal_list[1].get_date()
-        main_ui.kd_set_date_list[1].config(text=kr2_date, fg=theme.set_text_color)
-        fields["Section 2"] = kr2_date.day
-        fields["undefined_36"] = kr2_date.month
-        fields["undefined_37"] = kr2_date.year
-    if main_ui.kd_switch_list[2].get() == 1:
-        kr3_date = main_ui.kd_cal_list[2].get_date()
-        main_ui.kd_set_date_list[2].config(text=kr3_date, fg=theme.set_text_color)
-        fields["Section 3"] = kr3_date.day
-        fields["undefined_42"] = kr3_date.month
-        fields["undefined_43"] = kr3_date.year
-    if main_ui.kd_switch_list[3].get() == 1:
-        kr4_date = main_ui.kd_cal_list[3].get_date()
-        main_ui.kd_set_date_list[3].config(text=kr4_date, fg=theme.set_text_color)
-        fields["Section 4"] = kr4_date.day
-        fields["undefined_48"] = kr4_date.month
-        fields["undefined_49"] = kr4_date.year
-    if main_ui.kd_switch_list[4].get() == 1:
-        kr5_date = main_ui.kd_cal_list[4].get_date()
-        main_ui.kd_set_date_list[4].config(text=kr5_date, fg=theme.set_text_color)
-        fields["Section 5"] = kr5_date.day
-        fields["undefined_56"] = kr5_date.month
-        fields["undefined_57"] = kr5_date.year
-    if main_ui.kd_switch_list[5].get() == 1:
-        or_elearning_date = main_ui.kd_cal_list[5].get_date()
-        main_ui.kd_set_date_list[5].config(text=or_elearning_date, fg=theme.set_text_color)
-        fields["Quick Review"] = or_elearning_date.day
-        fields["undefined_61"] = or_elearning_date.month
-        fields["undefined_62"] = or_elearning_date.year
-    if main_ui.kd_switch_list[6].get() == 1:
-        all_knowledge_date = main_ui.kd_cal_list[5].get_date()
-        main_ui.kd_set_date_list[6].config(text=all_knowledge_date, fg=theme.set_text_color)
-        fields["Date_3"] = all_knowledge_date.day
-        fields["undefined_70"] = all_knowledge_date.month
-        fields["undefined_71"] = all_knowledge_date.year
-
-    # --- Open Water Dives
-    if main_ui.ow_switch_list[0].get() == 1:
-        ow1_date = main_ui.ow_cal_list[0].get_date()
-        main_ui.ow_set_date_list[0].config(text=ow1_date, fg=theme.set_text_color)
-        fields["Dive 1"] = ow1_date.day
-        fields["undefined_84"] = ow1_date.month
-        fields["undefined_85"] = ow1_date.year
-    if main_ui.ow_switch_list[1].get() == 1:
-        ow2_date = main_ui.ow_cal_list[1].get_date()
-        main_ui.ow_set_date_list[1].config(text=ow2_date, fg=theme.set_text_color)
-        fields["Dive 2"] = ow2_date.day
-        fields["undefined_79"] = ow2_date.month
-        fields["undefined_80"] = ow2_date.year
-    if main_ui.ow_switch_list[2].get() == 1:
-        ow3_date = main_ui.ow_cal_list[2].get_date()
-        main_ui.ow_set_date_list[2].config(text=ow3_date, fg=theme.set_text_color)
-        fields["Dive 3"] = ow3_date.day
-        fields["undefined_87"] = ow3_date.month
-        fields["undefined_88"] = ow3_date.year
-    if main_ui.ow_switch_list[3].get() == 1:
-        ow4_date = main_ui.ow_cal_list[3].get_date()
-        main_ui.ow_set_date_list[3].config(text=ow4_date, fg=theme.set_text_color)
-        fields["Dive 4"] = ow4_date.day
-        fields["undefined_82"] = ow4_date.month
-        fields["undefined_83"] = ow4_date.year
-
-    # --- Open Water Flexible Skills
+
+def section_inputs() -> tuple:
+    """Return (section, switches, date/dive inputs, set date labels, set instructor labels) for each Main UI
+    section, in 'field_map' row order."""
+    return (
+        ("confined_water", main_ui.cw_switch_list, main_ui.cw_cal_list, main_ui.cw_set_date_list,
+         main_ui.cw_set_instructor_list),
+        ("knowledge_development", main_ui.kd_switch_list, main_ui.kd_cal_list, main_ui.kd_set_date_list,
+         main_ui.kd_set_instructor_list),
+        # --- Open Water Dives 1-4, Flexible Skill dive numbers, then the two sign off dates
+        ("open_water", main_ui.ow_switch_list,
+         main_ui.ow_cal_list[:4] + main_ui.ow_flex_dive_list + main_ui.ow_cal_list[4:], main_ui.ow_set_date_list,
+         main_ui.ow_set_instructor_list),
+    )
+
+
+def set_date():
+    """Add dates to 'field' dictionary and change 'Set Dive' Label to Calendar DateEntry"""
     for entry_box_num in range(len(main_ui.ow_flex_dive_list)):  # this is a fix to get placeholder text
         main_ui.ow_flex_dive_list[entry_box_num]._placeholder_text_active = False
 
-    if main_ui.ow_switch_list[4].get() == 1:
-        main_ui.ow_set_date_list[4].config(text=main_ui.ow_flex_dive_list[0].get(), fg=theme.set_text_color)
-        fields["Dive_9"] = main_ui.ow_flex_dive_list[0].get()
-    if main_ui.ow_switch_list[5].get() == 1:
-        main_ui.ow_set_date_list[5].config(text=main_ui.ow_flex_dive_list[1].get(), fg=theme.set_text_color)
-        fields["Dive"] = main_ui.ow_flex_dive_list[1].get()
-    if main_ui.ow_switch_list[6].get() == 1:
-        main_ui.ow_set_date_list[6].config(text=main_ui.ow_flex_dive_list[2].get(), fg=theme.set_text_color)
-        fields["Dive_2"] = main_ui.ow_flex_dive_list[2].get()
-    if main_ui.ow_switch_list[7].get() == 1:
-        main_ui.ow_set_date_list[7].config(text=main_ui.ow_flex_dive_list[3].get(), fg=theme.set_text_color)
-        fields["Dive_3"] = main_ui.ow_flex_dive_list[3].get()
-    if main_ui.ow_switch_list[8].get() == 1:
-        main_ui.ow_set_date_list[8].config(text=main_ui.ow_flex_dive_list[4].get(), fg=theme.set_text_color)
-        fields["Dive_4"] = main_ui.ow_flex_dive_list[4].get()
-    if main_ui.ow_switch_list[9].get() == 1:
-        main_ui.ow_set_date_list[9].config(text=main_ui.ow_flex_dive_list[5].get(), fg=theme.set_text_color)
-        fields["Dive_5"] = main_ui.ow_flex_dive_list[5].get()
-    if main_ui.ow_switch_list[10].get() == 1:
-        main_ui.ow_set_date_list[10].config(text=main_ui.ow_flex_dive_list[6].get(), fg=theme.set_text_color)
-        fields["Dive_6"] = main_ui.ow_flex_dive_list[6].get()
-    if main_ui.ow_switch_list[11].get() == 1:
-        main_ui.ow_set_date_list[11].config(text=main_ui.ow_flex_dive_list[7].get(), fg=theme.set_text_color)
-        fields["Dive_7"] = main_ui.ow_flex_dive_list[7].get()
-    if main_ui.ow_switch_list[12].get() == 1:
-        main_ui.ow_set_date_list[12].config(text=main_ui.ow_flex_dive_list[8].get(), fg=theme.set_text_color)
-        fields["Dive_8"] = main_ui.ow_flex_dive_list[8].get()
-    if main_ui.ow_switch_list[13].get() == 1:
-        main_ui.ow_set_date_list[13].config(text=main_ui.ow_flex_dive_list[9].get(), fg=theme.set_text_color)
-        fields["Dive_10"] = main_ui.ow_flex_dive_list[9].get()
-    if main_ui.ow_switch_list[14].get() == 1:
-        all_ow_flex_dives_date = main_ui.ow_cal_list[4].get_date()
-        main_ui.ow_set_date_list[14].config(text=all_ow_flex_dives_date, fg=theme.set_text_color)
-        fields["Date_4"] = all_ow_flex_dives_date.day
-        fields["undefined_127"] = all_ow_flex_dives_date.month
-        fields["undefined_128"] = all_ow_flex_dives_date.year
-    if main_ui.ow_switch_list[15].get() == 1:
-        all_cert_requirements_date = main_ui.ow_cal_list[5].get_date()
-        main_ui.ow_set_date_list[15].config(text=all_cert_requirements_date, fg=theme.set_text_color)
-        fields["Date_8"] = all_cert_requirements_date.day
-        fields["undefined_138"] = all_cert_requirements_date.month
-        fields["undefined_139"] = all_cert_requirements_date.year
-
-
-def generate_pdf(input_path: str):
-    """Functions to write 'fields' dictionary to fill 'Record_and_Referral_form' pdf."""
-    # input_path = "Record_and_Referral_Form.pdf"
-    student_file_name = fields["Student Name"]
+    for section, switches, inputs, set_date_labels, _ in section_inputs():
+        values = [None if switch.get() == 0 else widget.get_date() if isinstance(widget, DateEntry) else widget.get()
+                  for switch, widget in zip(switches, inputs)]
+        field_map.set_dates(fields, section, values)
+        for label, value in zip(set_date_labels, values):
+            if value is not None:
+                label.config(text=value, fg=theme.set_text_color)
+
 
+def update_course_options():
+    """Update 'fields' dictionary with the course option, knowledge review, video and quiz/exam inputs."""
     # --- if checkbox are True update 'fields' dictionary
-    if main_ui.rdp_check.get() == 1:
-        fields["Check Box24"] = "Yes"
-    if main_ui.erdpml_check.get() == 1:
-        fields["Check Box23"] = "Yes"
-    if main_ui.computer_check.get() == 1:
-        fields["Check Box22"] = "Yes"
-    if main_ui.kr_checkbox_list[0].get() == 1:
-        fields["Check Box25"] = "Yes"
-    if main_ui.kr_checkbox_list[1].get() == 1:
-        fields["Check Box27"] = "Yes"
-    if main_ui.kr_checkbox_list[2].get() == 1:
-        fields["Check Box29"] = "Yes"
-    if main_ui.kr_checkbox_list[3].get() == 1:
-        fields["Check Box31"] = "Yes"
-    if main_ui.kr_checkbox_list[4].get() == 1:
-        fields["Check Box33"] = "Yes"
-    if main_ui.kr_checkbox_list[5].get() == 1:
-        fields["Check Box35"] = "Yes"
-    if main_ui.kd_video_checkbox_list[0].get() == 1:
-        fields["Check Box26"] = "Yes"
-    if main_ui.kd_video_checkbox_list[0].get() == 1:
-        fields["Check Box28"] = "Yes"
-    if main_ui.kd_video_checkbox_list[0].get() == 1:
-        fields["Check Box30"] = "Yes"
-    if main_ui.kd_video_checkbox_list[0].get() == 1:
-        fields["Check Box32"] = "Yes"
-    if main_ui.kd_video_checkbox_list[0].get() == 1:
-        fields["Check Box34"] = "Yes"
-    if main_ui.kd_video_checkbox_list[0].get() == 1:
-        fields["Check Box36"] = "Yes"
+    field_map.set_course_options(fields, {"rdp": main_ui.rdp_check.get() == 1,
+                                          "erdpml": main_ui.erdpml_check.get() == 1,
+                                          "computer": main_ui.computer_check.get() == 1})
 
     # --- Get string inputs from Knowledge Development Entries and update 'fields' dictionary
 
     for entry_box_num in range(len(main_ui.kd_exam_entry_list)):  # this is a fix to get placeholder text
         main_ui.kd_exam_entry_list[entry_box_num]._placeholder_text_active = False
 
-    fields["undefined_32"] = main_ui.kd_exam_entry_list[0].get()
-    fields["undefined_38"] = main_ui.kd_exam_entry_list[1].get()
-    fields["undefined_44"] = main_ui.kd_exam_entry_list[2].get()
-    fields["undefined_50"] = main_ui.kd_exam_entry_list[3].get()
-    fields["undefined_58"] = main_ui.kd_exam_entry_list[4].get()
-    fields["undefined_63"] = main_ui.kd_exam_entry_list[5].get()
+    field_map.set_knowledge_checks(fields,
+                                   [checkbox.get() == 1 for checkbox in main_ui.kr_checkbox_list],
+                                   [checkbox.get() == 1 for checkbox in main_ui.kd_video_checkbox_list],
+                                   [entry.get() for entry in main_ui.kd_exam_entry_list])
+
+
+def generate_pdf(template: FormTemplate):
+    """Functions to write 'fields' dictionary to fill 'Record_and_Referral_form' pdf.  The pdf is written on the
+    background job queue so the UI stays responsive."""
+    student_file_name = fields["Student Name"]
+
+    update_course_options()
 
     # --- Save pdf file name
 
     save_path = config["save path"]["student_record_path"]
-    output_path = f"{save_path}/{student_file_name}_Student_Record_Form_{today.day}_{today.month}_{today.year}.pdf"
-    # --- Write pdf
-    try:
-        fillpdfs.write_fillable_pdf(input_path, output_path, fields)
-    except FileNotFoundError:
-        messagebox.showerror(message="File path not found. Choose new file path")
+    output_path = f"{save_path}/{record_file_name(student_file_name, today)}"
+
+    # --- the job works on a copy, 'fields' can change before it runs
+    record_fields = dict(fields)
+    force = main_ui.force_check.get() == 1
+    student_id = main_ui.selected_student_id  # --- None if no student is set, the form is not marked completed
+
+    def write_pdf(job):
+        # --- Skip if the saved pdf already holds these fields
+        digest = record_digest(record_fields, template.hash, template.backend)
+        if not force and record_cache.is_current(output_path, digest):
+            return False
+
+        # --- Write pdf
+        template.write(output_path, record_fields)
+        record_cache.record(output_path, digest)
+        record_cache.save()
+        return True
+
+    def done(job, written):
+        main_ui.update_status(f"Saved {os.path.basename(output_path)}" if written else "Form unchanged, not saved")
+        if student_id is not None:
+            main_ui.mark_completed({student_id: output_path})
+
+    def error(job, e):
+        if isinstance(e, Cancelled):
+            main_ui.update_status("Cancelled")
+        elif isinstance(e, FileNotFoundError):
+            main_ui.update_status()
+            messagebox.showerror(message="File path not found. Choose new file path")
+        else:
+            main_ui.update_status()
+            messagebox.showerror(message=f"Could not generate {student_file_name}: {e}")
+
+    main_ui.submit_job(f"Generating {student_file_name}", write_pdf, on_done=done, on_error=error)
+
+
+def generate_all_pdf(input_path: str):
+    """Write a 'Record_and_Referral_form' pdf for every student in the Student Diver list, as separate files, a
+    single pdf or a ZIP archive depending on the output option.  The current Date/Dive, Instructor and course option
+    selections apply to every student.  The forms are generated on the background job queue and can be cancelled."""
+    if not student_group:
+        messagebox.showinfo(message="No students to generate. Add or import students first")
+        return
+
+    update_course_options()
+
+    # --- the job works on copies, the UI can change before it finishes
+    course_fields = dict(fields)
+    student_ids, students = list(student_group.students), list(student_group)
+    save_path = config["save path"]["student_record_path"]
+    processes = config.getint("batch", "processes", fallback=0) or None
+    output_mode = main_ui.output_mode_box.get()
+    force = main_ui.force_check.get() == 1
+
+    def generate_all(job):
+        def progress(completed, total, result):
+            job.progress(completed, total)
+
+        if output_mode == OUTPUT_COMBINED:
+            return generate_combined(input_path, course_fields, students,
+                                     os.path.join(save_path, combined_record_file_name(today)), progress=progress,
+                                     cancel=job.cancel_event)
+        elif output_mode == OUTPUT_ZIP:
+            return generate_zip(input_path, course_fields, students,
+                                os.path.join(save_path, combined_record_file_name(today, "zip")), today,
+                                processes=processes, progress=progress, backend=pdf_backend,
+                                cancel=job.cancel_event)
+        return generate_batch(input_path, course_fields, students, save_path, today,
+                              processes=processes, progress=progress, backend=pdf_backend,
+                              cache=record_cache, force=force, cancel=job.cancel_event)
+
+    def done(job, results):
+        cancelled = sum(result.cancelled for result in results)
+        failed = [result for result in results if not result.success and not result.cancelled]
+        skipped = sum(result.skipped for result in results)
+        summary = f"{len(results) - len(failed) - cancelled} of {len(results)} forms generated."
+        if skipped:
+            summary += f" {skipped} unchanged forms skipped."
+        if cancelled:
+            summary += f" Cancelled, {cancelled} forms not generated."
+        main_ui.update_status(summary)
+        main_ui.mark_completed({student_id: result.output_path for student_id, result in zip(student_ids, results)
+                                if result.success})
+        if failed:
+            failed_report = "\n".join(f"{result.student_name}: {result.error}" for result in failed)
+            messagebox.showwarning(title="Generate All", message=f"{summary}\n\nFailed:\n{failed_report}")
+        else:
+            messagebox.showinfo(title="Generate All", message=summary)
+
+    def error(job, e):
+        main_ui.update_status("Cancelled" if isinstance(e, Cancelled) else "Generate All failed")
+        if not isinstance(e, Cancelled):
+            messagebox.showerror(title="Generate All", message=str(e))
+
+    main_ui.submit_job(f"Generate All ({output_mode})", generate_all, on_done=done, on_error=error)
 
 
 def new_student(ui: object):
@@ -1314,6 +1055,12 @@ def new_student(ui: object):
         else:
             sex = ""
 
+        if dob_entry.get().strip():
+            _, errors = normalize_dates([dob_entry.get()])
+            if errors:
+                messagebox.showerror(message=f"Date of birth: {errors[0].message}", parent=student_window)
+                return
+
         add_new_student = Student(
             first_name=student_f_name_entry.get(),
             last_name=student_l_name_entry.get(),
@@ -1328,9 +1075,9 @@ def new_student(ui: object):
             postal=postal_entry.get(),
 
         )
+        normalize_birth_dates([add_new_student])
         # main_ui.list_box_student.insert("end", f"{student_f_name_entry.get()} {student_l_name_entry.get()}")
-        main_ui.list_box_student.insert("end", f"{add_new_student.first_name} {add_new_student.last_name}")
-        student_group.student_list.append(add_new_student)
+        main_ui.add_to_course(add_new_student)
 
         # student_dict_global.update(new_student_data)
         student_window.destroy()
@@ -1347,14 +1094,7 @@ def new_student(ui: object):
 
 def update_instructor_menu():
     """update instructor option menu"""
-    with open(INSTRUCTOR_DATA, "r") as inst:
-        instructor_info = json.load(inst)
-    instructor_list_menu = []
-
-    for instructor in instructor_info.keys():
-        instructor_list_menu.append(instructor)
-
-    main_ui.list_box.configure(values=instructor_list_menu)
+    main_ui.list_box.configure(values=instructor_store.names())
 
 
 # @speed_calc_decorator
@@ -1434,36 +1174,19 @@ def new_instructor(ui):
 
     def update_instructor():
         """Save Instructor Information to 'instructor.json' for future use"""
-        # --- Instructor Dictionary
-        new_data = {
-            instructor_name_entry.get(): {
-                "PADI Instructor": instructor_name_entry.get(),
-                "Initials": initials_entry.get(),
-                "PADI Number": padi_number_entry.get(),
-                "Dive Center": store_number_entry.get(),
-                "Phone": phone_entry.get(),
-                "Email": instructor_email_entry.get(),
-                "Password": hash_password(instructor_password_entry.get()),
-            }
-        }
-        try:
-            with open(INSTRUCTOR_DATA, "r") as data_file:
-                data = json.load(data_file)
-        except FileNotFoundError:
-            with open(INSTRUCTOR_DATA, "w") as data_file:
-                json.dump(new_data, data_file, indent=4)
-        else:
-            data.update(new_data)
-            with open(INSTRUCTOR_DATA, "w") as data_file:
-                json.dump(data, data_file, indent=4)
+        # --- Instructor Dictionary, an instructor saved again needs its (new) password
+        unlock_session.lock(instructor_name_entry.get())
+        instructor_store.add(instructor_name_entry.get(), {
+            "PADI Instructor": instructor_name_entry.get(),
+            "Initials": initials_entry.get(),
+            "PADI Number": padi_number_entry.get(),
+            "Dive Center": store_number_entry.get(),
+            "Phone": phone_entry.get(),
+            "Email": instructor_email_entry.get(),
+            "Password": instructor_store.hash_password(instructor_password_entry.get()),
+        })
 
         # --- Refresher Instructor Listbox
-        try:
-            with open(INSTRUCTOR_DATA, "r") as data_file:
-                Instructor_list = json.load(data_file)
-        except FileNotFoundError:
-            print("Instructor File not found")
-
         update_instructor_menu()
         instructor_window.destroy()
 
@@ -1495,68 +1218,39 @@ def new_instructor(ui):
 
 def remove_inst(deleted_instructor):
     """delete selected instructor"""
-    with open(INSTRUCTOR_DATA, "r") as data:
-        inst_info = json.load(data)
-        del inst_info[deleted_instructor]
-
-    with open(INSTRUCTOR_DATA, "w") as data:
-        json.dump(inst_info, data, indent=4)
+    instructor_store.remove(deleted_instructor)
+    unlock_session.lock(deleted_instructor)
 
     main_ui.list_box.set("")
     update_instructor_menu()
 
 
+def lock_instructors():
+    """Ask for the password again the next time any instructor is set"""
+    unlock_session.lock()
+    main_ui.update_status("Instructors locked")
+
+
 def set_student():
     """Update 'fields' dictionary and "Set Instructor" label with student info."""
 
     index = main_ui.list_box_student.curselection()
-    user_student = main_ui.list_box_student.get(index)
-    main_ui.student_set_label.configure(text=user_student, fg=theme.set_text_color)
-
-    student = ''
-    # find selected student from listbox
-    for select_student in student_group.student_list:
-        f_name = select_student.first_name
-        l_name = select_student.last_name
-        if f'{f_name} {l_name}' == user_student:
-            print(select_student)
-            student = select_student
-
-    fields["Student Name"] = f'{student.first_name} {student.last_name}'
-
+    if not index:
+        messagebox.showinfo(message="Select a student from the Student Diver list first")
+        return
+    # --- the listbox row gives the student ID, students with the same name stay apart
+    student_id = main_ui.student_ids[index[0]]
+    student = student_group.get(student_id)
     try:
-        if isinstance(student.date_of_birth, str):
-            date_of_birth = student.date_of_birth.split("/")
-            fields["Birth Date"] = date_of_birth[0]
-            fields["undefined"] = date_of_birth[1]
-            fields["undefined_2"] = date_of_birth[2]
-
-        elif isinstance(student.date_of_birth, datetime.datetime):
-            date_of_birth = student.date_of_birth
-            fields["Birth Date"] = date_of_birth.day
-            fields["undefined"] = date_of_birth.month
-            fields["undefined_2"] = date_of_birth.year
-
-    except KeyError:
-        print("No Birth Date")
-
-    if student.sex == "male":
-        fields["Check Box20"] = "Yes"
-        fields["Check Box21"] = "No"
-    elif student.sex == "female":
-        fields["Check Box21"] = "Yes"
-        fields["Check Box20"] = "No"
-
-    fields["Mailing address 1"] = student.street_address
-    fields["Mailing address 2"] = student.city
-    fields["Mailing address 3"] = student.province
-    try:
-        fields["Mailing address 4"] = student.country
-    except IndexError:
-        print("No Country")
-    fields["Mailing address 5"] = student.postal
-    fields["undefined_4"] = student.phone
-    fields["Email"] = student.email
+        birth_date_parts(student.date_of_birth)
+    except ValueError as e:
+        messagebox.showerror(message=f"{student.first_name} {student.last_name}: {e}. Fix it in the roster and "
+                                     f"import it again")
+        return
+    main_ui.selected_student_id = student_id
+    main_ui.student_set_label.configure(text=main_ui.list_box_student.get(index[0]), fg=theme.set_text_color)
+
+    fields.update(student_fields(student))
 
 
 def select_all_cw():
@@ -1618,36 +1312,16 @@ def select_all():
         main_ui.computer_check.deselect()
 
 
-def hash_password(password):
-    """Save users password hash with salt. Return Password Dictionary"""
-
-    # --- Generate a random salt
-    salt = secrets.token_hex(10)
-
-    # --- Hash the password using the salt and SHA-256 algorithm
-    hash_object = hashlib.sha256(salt.encode() + password.encode())
-    hashed_password = hash_object.hexdigest()
-
-    # --- Create a dictionary to store the salt and hashed password
-    password_data = {
-        "Salt": salt,
-        "Hash": hashed_password
-    }
-    return password_data
-
-
 def choose_save_path():
     """User chooses save path for completed pdf"""
     file_path = filedialog.askdirectory()
     if file_path:
         config["save path"]["student_record_path"] = file_path
-        with open("/config/config.ini", "w") as path:
-            config.write(path)
+        save_config()
 
 
 def refresher_main_combobox():
-    with open(DIVE_TEMPLATE_DATA, "r") as data:
-        template = json.load(data)
+    template = load_templates()
 
     key_list = []
 
@@ -1657,10 +1331,16 @@ def refresher_main_combobox():
     main_ui.date_rule_box.configure(values=key_list)
 
 
+def load_form_template() -> FormTemplate:
+    """Return the 'Record_and_Referral_Form' template.  The pdf is parsed the first time a form is generated or
+    reset, not at startup."""
+    return get_form_template(STUDENT_AND_REFERRAL_FORM, pdf_backend)
+
+
 def clear_dict_values():
     """clears dictionary fields for pdf form"""
     global fields
-    fields = fillpdfs.get_form_fields("assets/Record_and_Referral_Form.pdf")
+    fields = load_form_template().fields()
 
 
 def reset_all():
@@ -1693,6 +1373,8 @@ def reset_all():
     [ow_dates.set_date(today) for ow_dates in main_ui.ow_cal_list]
     main_ui.student_set_label.config(text="Set Student", font=TITLE_HEADER_FONT, background=theme.frame_color,
                                      fg=theme.reset_main_text_color)
+    # --- forms generated after a reset belong to no student, none is marked completed
+    main_ui.selected_student_id = None
     clear_dict_values()
 
 
@@ -1733,9 +1415,32 @@ class MainUI(customtkinter.CTk):
         self.student_set_label = tkinter.Label(self.student_lb_frame, text="Set Student", bg=theme.frame_color,
                                                font=TITLE_HEADER_FONT)
         self.student_set_label.grid(row=0, column=0, columnspan=2, padx=(80, 0), pady=(5, 0))
+        # --- Student Search, the list shows the students matching every word typed
+        self.student_search = StudentSearch()
+        self.search_entry = customtkinter.CTkEntry(self.student_lb_frame, placeholder_text="Search students",
+                                                   text_color=theme.text_color,
+                                                   fg_color=theme.listbox_color,
+                                                   border_color=theme.main_button_color)
+        self.search_entry.grid(row=1, column=0, columnspan=2, padx=(20, 30), pady=(10, 0), sticky="ew")
+        self.search_entry.bind("<KeyRelease>", self.search_changed)
+        self.search_query = ""
         self.list_box_student = tkinter.Listbox(self.student_lb_frame, bg=theme.listbox_color,
                                                 font=STANDARD_FONT)
-        self.list_box_student.grid(row=1, column=0, rowspan=3, columnspan=2, padx=(20, 30), pady=(10, 0), sticky="ew")
+        self.list_box_student.grid(row=2, column=0, rowspan=3, columnspan=2, padx=(20, 30), pady=(10, 0), sticky="ew")
+        # --- StudentGroup (and StudentStore) ID of every list_box_student row, and the other way round
+        self.student_ids = []
+        self.student_rows = {}
+        self.selected_student_id = None
+        self.completed_ids = set()
+        # --- Course Option Menu, the saved courses with the last opened first
+        self.course_id = None
+        self.course_menu = customtkinter.CTkOptionMenu(self.student_lb_frame, values=[DEFAULT_COURSE],
+                                                       command=self.open_course,
+                                                       fg_color=theme.main_button_color,
+                                                       button_color=theme.main_button_color,
+                                                       button_hover_color=theme.main_button_color_hover,
+                                                       text_color=theme.main_button_text_color)
+        self.course_menu.grid(row=0, column=2, padx=(0, 30), pady=(5, 0))
         self.add_student = customtkinter.CTkButton(self.student_lb_frame, text="Add Student",
                                                    command=lambda: new_student(self),
                                                    fg_color=theme.main_button_color,
@@ -1765,14 +1470,7 @@ class MainUI(customtkinter.CTk):
         self.instructor_label.grid(row=0, column=0, sticky="w", padx=(20, 0))
 
         # --- Import Instructor information from .json
-        self.instructor_list_menu = []
-        try:
-            with open(INSTRUCTOR_DATA, "r") as data_file:
-                instructor_info = json.load(data_file)
-                for instructor in instructor_info.keys():  # update list box
-                    self.instructor_list_menu.append(instructor)
-        except FileNotFoundError:
-            print("No Instructor File Found")
+        self.instructor_list_menu = instructor_store.names()
 
         self.list_box = customtkinter.CTkOptionMenu(self.instructor_lb_frame, values=self.instructor_list_menu,
                                                     width=155,
@@ -1804,6 +1502,8 @@ class MainUI(customtkinter.CTk):
                                                        hover_color=theme.main_button_color_hover)
         self.del_inst_button.grid(row=1, column=2, padx=(0, 30))
 
+        profiler.mark("MainUI student and instructor lists")
+
         # --------------------------- CONFINED WATER ------------------------ #
 
         self.confined_water_frame = customtkinter.CTkFrame(self, fg_color=theme.frame_color, corner_radius=8,
@@ -1871,6 +1571,8 @@ class MainUI(customtkinter.CTk):
             cw_main_switch.select()
             self.cw_switch_list.append(cw_main_switch)
 
+        profiler.mark("MainUI confined water")
+
         # --------------------------- KNOWLEDGE DEVELOPMENT ----------------- #
 
         self.knowledge_development_frame = customtkinter.CTkFrame(self, fg_color=theme.frame_color,
@@ -2024,6 +1726,8 @@ class MainUI(customtkinter.CTk):
             kd_exam_entry.grid(row=kd_exam + 3, column=5, columnspan=2, padx=(25, 5))
             self.kd_exam_entry_list.append(kd_exam_entry)
 
+        profiler.mark("MainUI knowledge development")
+
         # --------------------------- OPEN WATER FLEX ENTRY ----------------- #
 
         self.open_water_frame = customtkinter.CTkFrame(self, fg_color=theme.frame_color,
@@ -2105,6 +1809,8 @@ class MainUI(customtkinter.CTk):
                 flex_cal.grid(row=flex_c + 1, column=1, padx=5)
                 self.ow_flex_dive_list.append(flex_cal)
 
+        profiler.mark("MainUI open water")
+
         # --------------------------- RIGHT BUTTON MENU ------------------------- #
 
         self.right_frame = customtkinter.CTkFrame(self, fg_color=theme.frame_color, corner_radius=8,
@@ -2117,10 +1823,9 @@ class MainUI(customtkinter.CTk):
 
         key_list = []
         try:
-            with open(DIVE_TEMPLATE_DATA, "r") as data_file:
-                data = json.load(data_file)
-                for keys in data.keys():
-                    key_list.append(keys)
+            data = load_templates()
+            for keys in data.keys():
+                key_list.append(keys)
 
         except FileNotFoundError:
             print("template file no found")
@@ -2179,12 +1884,66 @@ class MainUI(customtkinter.CTk):
         self.select_elearning_button.grid(row=7, column=0, pady=(0, 70))
 
         self.gen_pfd_button = customtkinter.CTkButton(self.right_frame, text="Generate PDF",
-                                                      command=lambda: generate_pdf(STUDENT_AND_REFERRAL_FORM),
+                                                      command=lambda: generate_pdf(load_form_template()),
                                                       fg_color=theme.main_button_color,
                                                       text_color=theme.main_button_text_color,
                                                       hover_color=theme.main_button_color_hover)
         self.gen_pfd_button.grid(row=8, column=0)
 
+        self.gen_all_pdf_button = customtkinter.CTkButton(self.right_frame, text="Generate All",
+                                                          command=lambda: generate_all_pdf(STUDENT_AND_REFERRAL_FORM),
+                                                          fg_color=theme.main_button_color,
+                                                          text_color=theme.main_button_text_color,
+                                                          hover_color=theme.main_button_color_hover)
+        self.gen_all_pdf_button.grid(row=9, column=0, pady=(10, 0))
+
+        self.output_mode_box = customtkinter.CTkOptionMenu(self.right_frame, values=list(OUTPUT_MODES), width=155,
+                                                           fg_color=theme.background_color,
+                                                           text_color=theme.text_color,
+                                                           button_color=theme.main_button_color,
+                                                           button_hover_color=theme.main_button_color_hover,
+                                                           dropdown_fg_color=theme.background_color,
+                                                           dropdown_text_color=theme.text_color,
+                                                           dropdown_hover_color=theme.frame_color
+                                                           )
+        self.output_mode_box.set(OUTPUT_FILES)
+        self.output_mode_box.grid(row=10, column=0, padx=20, pady=(10, 0), sticky="ew")
+
+        self.force_check = customtkinter.CTkCheckBox(self.right_frame, text="Force Regenerate", checkbox_width=20,
+                                                     checkbox_height=20,
+                                                     fg_color=theme.switch_on_color,
+                                                     hover_color=theme.switch_hover_color,
+                                                     border_color=theme.switch_on_color,
+                                                     text_color=theme.text_color
+                                                     )
+        self.force_check.grid(row=11, column=0, pady=(10, 0))
+
+        profiler.mark("MainUI right button menu")
+
+        # --------------------------- STATUS BAR ---------------------------- #
+
+        self.status_frame = customtkinter.CTkFrame(self, fg_color=theme.frame_color, corner_radius=8,
+                                                   bg_color=theme.background_color)
+        self.status_frame.grid(row=3, column=0, columnspan=3, sticky="ew", padx=(10, 20), pady=(0, 10))
+        self.status_frame.grid_columnconfigure(0, weight=1)
+
+        self.status_label = tkinter.Label(self.status_frame, text="Ready", font=STANDARD_FONT, bg=theme.frame_color,
+                                          anchor="w")
+        self.status_label.grid(row=0, column=0, sticky="ew", padx=(20, 10), pady=5)
+
+        self.status_progress = customtkinter.CTkProgressBar(self.status_frame, width=250,
+                                                            progress_color=theme.main_button_color)
+        self.status_progress.set(0)
+        self.status_progress.grid(row=0, column=1, padx=10, pady=5)
+
+        self.cancel_button = customtkinter.CTkButton(self.status_frame, text="Cancel", width=100,
+                                                     command=self.cancel_jobs,
+                                                     state="disabled",
+                                                     fg_color=theme.main_button_color,
+                                                     text_color=theme.main_button_text_color,
+                                                     hover_color=theme.main_button_color_hover)
+        self.cancel_button.grid(row=0, column=2, padx=(10, 20), pady=5)
+
         # --------------------------- FILE MENU ----------------------------- #
 
         self.menubar = Menu(self)
@@ -2195,13 +1954,14 @@ class MainUI(customtkinter.CTk):
                               command=reset_all
                               )
         self.file.add_separator()
-        self.file.add_command(label='Exit', command=self.destroy)
+        self.file.add_command(label='Exit', command=self.close)
         # --- Adding Edit Menu and commands
         self.edit = Menu(self.menubar, tearoff=0)
         self.menubar.add_cascade(label='Edit', menu=self.edit)
         self.edit.add_command(label='Choose PDF Save Path',
                               command=choose_save_path
                               )
+        self.edit.add_command(label='Lock Instructors', command=lock_instructors)
         # self.edit.add_command(label='New Template',
         #                       command=new_template
         #                       )
@@ -2224,76 +1984,302 @@ class MainUI(customtkinter.CTk):
         # --- Display Menu
         self.config(menu=self.menubar)
 
-    def import_student(self):
-        """read excel file and import student data"""
-        student_path = filedialog.askopenfilename()
-        try:
-            student_data = pandas.read_excel(student_path)
-        except ValueError:
-            messagebox.showerror(message="wrong file type. Support for excel files only")
-
-        student_dict = student_data.to_dict(orient="records")
+        self.protocol("WM_DELETE_WINDOW", self.close)
+        self.after(JOB_POLL_MS, self.poll_jobs)
+        profiler.mark("MainUI status bar and menus")
+
+    # --------------------------- BACKGROUND JOBS --------------------------- #
+
+    def submit_job(self, name: str, function, on_done=None, on_error=None):
+        """Queue function(job) on the background job queue and follow it on the status bar"""
+        def finished(callback):
+            def handler(job, value):
+                if callback is not None:
+                    callback(job, value)
+                if job_queue.busy:
+                    self.update_status()
+            return handler
+
+        job = job_queue.submit(name, function, on_done=finished(on_done), on_error=finished(on_error),
+                               on_progress=self.show_progress)
+        self.update_status()
+        return job
+
+    def poll_jobs(self):
+        """Run the callbacks of finished background work in the Tk main loop"""
+        job_queue.process_events()
+        self.after(JOB_POLL_MS, self.poll_jobs)
+
+    def update_status(self, message: str = "Ready"):
+        """Show the running job on the status bar, or 'message' when no job is running"""
+        if job_queue.busy:
+            current = job_queue.current
+            queued = job_queue.queued
+            text = current.name if current is not None else "Starting"
+            if queued:
+                text += f"  ({queued} queued)"
+            self.cancel_button.configure(state="normal")
+        else:
+            text = message
+            self.status_progress.set(0)
+            self.cancel_button.configure(state="disabled")
+        self.status_label.configure(text=text)
+
+    def show_progress(self, job, completed: int, total: int, message: str = ""):
+        queued = job_queue.queued
+        text = f"{job.name}: {completed}/{total}" if total else f"{job.name}: {completed}"
+        if queued:
+            text += f"  ({queued} queued)"
+        self.status_label.configure(text=text)
+        self.status_progress.set(completed / total if total else 0)
+
+    def cancel_jobs(self):
+        job_queue.cancel_all()
+        self.status_label.configure(text="Cancelling...")
+        self.cancel_button.configure(state="disabled")
+
+    def close(self):
+        job_queue.cancel_all()
+        student_store.close()
+        self.destroy()
+
+    def list_student(self, student_id: int, student):
+        """Add a row for 'student' to the end of the Student Diver list"""
+        self.list_students([(student_id, student)])
+
+    def list_students(self, students: list):
+        """Add a row for every (ID, Student) of 'students' to the end of the Student Diver list, in one Tk call.
+        While a search is typed only the matching students are shown."""
+        for student_id, student in students:
+            self.student_search.add(student_id, student)
+        if self.search_entry.get().strip():
+            self.filter_students()
+            return
+        names = []
+        for student_id, student in students:
+            self.student_rows[student_id] = len(self.student_ids)
+            self.student_ids.append(student_id)
+            names.append(f"{student.first_name} {student.last_name}")
+        if names:
+            self.list_box_student.insert("end", *names)
+
+    def search_changed(self, event=None):
+        """Filter the list when the search text changed, not for arrow, Shift or Tab key releases"""
+        if self.search_entry.get() != self.search_query:
+            self.filter_students()
+
+    def filter_students(self):
+        """Show the students matching the search box, every student if it is empty"""
+        self.search_query = self.search_entry.get()
+        student_ids = self.student_search.search(self.search_query)
+        if student_ids is None:
+            student_ids = list(self.student_group_list.students)
+        # --- the listbox is only rebuilt if the rows change
+        if student_ids != self.student_ids:
+            self.show_students(student_ids)
+
+    def show_students(self, student_ids: list):
+        """Replace the rows of the Student Diver list with the students 'student_ids'"""
+        self.list_box_student.delete(0, "end")
+        self.student_ids = student_ids
+        self.student_rows = {student_id: row for row, student_id in enumerate(student_ids)}
+        if student_ids:
+            students = [self.student_group_list.get(student_id) for student_id in student_ids]
+            self.list_box_student.insert("end", *(f"{student.first_name} {student.last_name}" for student in students))
+        for student_id in self.completed_ids & self.student_rows.keys():
+            self.list_box_student.itemconfig(self.student_rows[student_id], fg=theme.completed_text_color)
+
+    def update_course_menu(self):
+        courses = [name for _, name in student_store.courses()] or [DEFAULT_COURSE]
+        self.course_menu.configure(values=courses)
+
+    def open_last_course(self):
+        """Open the course of the last session, its students are listed a page at a time"""
+        last_course = student_store.last_course()
+        self.update_course_menu()
+        if last_course is not None:
+            self.open_course(last_course[1])
+
+    def open_course(self, name: str):
+        """Clear the Student Diver list and list the students saved in the course 'name'"""
+        self.course_id = student_store.open_course(name)
+        self.course_menu.set(name)
+        self.student_group_list.clear()
+        self.list_box_student.delete(0, "end")
+        self.student_ids, self.student_rows, self.selected_student_id = [], {}, None
+        self.student_search.clear()
+        self.completed_ids = set()
+        self.update_status(f"Opening {name}")
+        completed = {student_id: output_path for student_id, (output_path, _) in
+                     student_store.completed(self.course_id).items()}
+        self.list_course_page(self.course_id, 0, completed)
+
+    def list_course_page(self, course_id: int, offset: int, completed: dict):
+        """List STUDENT_PAGE_ROWS students of the course from 'offset' and schedule the next page, so the window
+        stays responsive while a long course is listed"""
+        if course_id != self.course_id:
+            return  # --- another course was opened since
+        page = student_store.students(course_id, offset, STUDENT_PAGE_ROWS)
+        for student_id, student in page:
+            self.student_group_list.add(student, student_id)
+        self.list_students(page)
+        self.mark_completed({student_id: completed[student_id] for student_id, _ in page if student_id in completed},
+                            save=False)
+        if len(page) == STUDENT_PAGE_ROWS:
+            self.after(1, self.list_course_page, course_id, offset + STUDENT_PAGE_ROWS, completed)
+        else:
+            self.update_status(f"{len(self.student_group_list)} students in {self.course_menu.get()}")
+
+    def add_to_course(self, student) -> int:
+        """Save 'student' in the open course and list it, unless the course already has it"""
+        if self.course_id is None:
+            self.open_course(DEFAULT_COURSE)
+            self.update_course_menu()
+        student_id = student_store.add(self.course_id, student)
+        if student_id not in self.student_group_list.students:
+            self.student_group_list.add(student, student_id)
+            self.list_student(student_id, student)
+        return student_id
+
+    def mark_completed(self, completed: dict, save: bool = True):
+        """Show the students of 'completed' (student ID -> completed form) as completed, and save them"""
+        for student_id, output_path in completed.items():
+            if save:
+                student_store.mark_completed(student_id, output_path)
+            self.completed_ids.add(student_id)
+            if student_id in self.student_rows:
+                self.list_box_student.itemconfig(self.student_rows[student_id], fg=theme.completed_text_color)
+
+    def ask_import_date_errors(self, course: str, students: list, date_errors: list) -> bool:
+        """Report the students with a date of birth that is not a date, and ask whether to import them anyway"""
+        listed = "\n".join(f"entry {error.row + 1}, {students[error.row].first_name} {students[error.row].last_name}: "
+                           f"{error.message}" for error in date_errors[:DUPLICATES_LISTED])
+        if len(date_errors) > DUPLICATES_LISTED:
+            listed += f"\n... and {len(date_errors) - DUPLICATES_LISTED} more"
+        return messagebox.askyesno(
+            title="Dates of Birth",
+            message=f"{len(date_errors)} students in {course} have no valid date of birth:\n\n{listed}\n\n"
+                    f"Import them anyway? Correct their date of birth before generating their forms.")
+
+    def ask_merge_duplicates(self, course: str, students: list, duplicates: list, saved: int):
+        """Ask whether to merge or skip the duplicate students of an import, None to stop the import"""
+        def describe(position):
+            student = students[position]
+            where = "saved" if position < saved else f"entry {position - saved + 1}"
+            return f"{student.first_name} {student.last_name} ({where})"
+
+        listed = "\n".join(f"{describe(duplicate.row)} = {describe(duplicate.original)}: {duplicate.reason}"
+                           for duplicate in duplicates[:DUPLICATES_LISTED])
+        if len(duplicates) > DUPLICATES_LISTED:
+            listed += f"\n... and {len(duplicates) - DUPLICATES_LISTED} more"
+        return messagebox.askyesnocancel(
+            title="Duplicate Divers",
+            message=f"{len(duplicates)} students in {course} look like divers already listed:\n\n{listed}\n\n"
+                    f"Yes: merge each into the first entry, filling in its empty information\n"
+                    f"No: skip the duplicates\nCancel: stop the import")
 
+    def import_student(self):
+        """read a roster file (excel, CSV, JSON Lines or Parquet) and import student data into the course named after
+        the file.  Importing the same roster again only saves the students that are new or changed.  The roster is
+        read and saved on the background job queue, the Student Diver list is filled once it is saved."""
+        student_path = filedialog.askopenfilename(filetypes=ROSTER_FILE_TYPES)
+        if not student_path:
+            return
+        course = os.path.splitext(os.path.basename(student_path))[0]
         try:
-            for info in student_dict:
-                imported_student_data = Student(
-                    first_name=info['first_name'],
-                    last_name=info['last_name'],
-                    date_of_birth=info["date_of_birth"],
-                    sex=info['sex'],
-                    phone=info['phone'],
-                    email=info['email'],
-                    street_address=info['street_address'],
-                    city=info['city'],
-                    province=info['province'],
-                    postal=info['postal'],
-                    country=info['country'],
-                )
-                self.student_group_list.student_list.append(imported_student_data)
-
-                main_ui.list_box_student.insert("end", f"{imported_student_data.first_name} "
-                                                       f"{imported_student_data.last_name}")
-
-            # for students in self.student_group_list.student_list:
-            #     print(students.first_name)
-            #     print(students.last_name)
-            #     print(students.date_of_birth)
-            #     print(students.sex)
-            #     print(students.phone)
-            #     print(students.email)
-            #     print(students.street_address)
-            #     print(students.city)
-            #     print(students.province)
-            #     print(students.postal)
-            #     print(students.country)
-
-        except Exception as e:
-            print(e)
-
+            profile = load_roster_profile(ROSTER_PROFILES, config.get("roster", "profile", fallback=DEFAULT_PROFILE))
+        except ValueError as e:
+            messagebox.showerror(message=str(e))
+            return
+
+        def read_roster(job):
+            # --- an unchanged roster is read from the roster cache instead
+            return read_roster_import(STUDENT_DB, course, roster_cache.iter_roster(student_path, profile),
+                                      progress=job.progress, cancel=job.cancel_event, batch_rows=ROSTER_REFRESH_ROWS)
+
+        def read_done(job, roster_import):
+            saved, students = roster_import.saved, roster_import.students
+            if roster_import.date_errors and not self.ask_import_date_errors(course, students[len(saved):],
+                                                                             roster_import.date_errors):
+                self.update_status(f"Import of {course} cancelled")
+                return
+            merge = None
+            if roster_import.duplicates:
+                merge = self.ask_merge_duplicates(course, students, roster_import.duplicates, len(saved))
+                if merge is None:
+                    self.update_status(f"Import of {course} cancelled")
+                    return
+            self.submit_job(f"Saving {course}",
+                            lambda save_job: save_roster_import(STUDENT_DB, roster_import, merge,
+                                                                progress=save_job.progress,
+                                                                cancel=save_job.cancel_event,
+                                                                batch_rows=ROSTER_REFRESH_ROWS),
+                            on_done=lambda save_job, counts: save_done(counts, roster_import.duplicates, merge),
+                            on_error=error)
+
+        def save_done(counts, duplicates, merge):
+            inserted, updated = counts
+            self.update_course_menu()
+            self.open_course(course)
+            summary = f"Imported {course}: {inserted} new, {updated} updated students"
+            if duplicates:
+                summary += f", {len(duplicates)} duplicates {'merged' if merge else 'skipped'}"
+            self.update_status(summary)
+
+        def error(job, e):
+            self.update_status("Cancelled" if isinstance(e, Cancelled) else "Import failed")
+            if isinstance(e, ValueError):
+                messagebox.showerror(message=f"{e}. Supported rosters: excel (.xlsx), CSV, JSON Lines and Parquet")
+            elif isinstance(e, KeyError):
+                messagebox.showerror(message=f"The roster has no {e} column. Add it to the roster or to a profile in "
+                                             f"config/roster_profiles.json")
+            elif not isinstance(e, Cancelled):
+                messagebox.showerror(message=f"Could not import {course}: {e}")
+
+        self.submit_job(f"Reading {course}", read_roster, on_done=read_done, on_error=error)
 
 if __name__ == "__main__":
+    multiprocessing.freeze_support()  # --- worker processes for 'Generate All' in the frozen Windows app
     with open("config/themes.json", "r") as file:
         theme_dict = json.load(file)
     # Configure file path for completed pdf
 
     config = configparser.ConfigParser()
-    config.read("config/config.ini")
+    config.read(CONFIG_INI)
     config_theme = config["style"]["theme"]
+    # --- config, instructor and dive template changes are saved together, 'write_delay' seconds after the last one
+    file_writer = WriteBehind(config.getfloat("storage", "write_delay", fallback=WRITE_DELAY))
 
     if config["new_user"].getboolean("new_user"):
         default_desktop_save_path = os.path.join(os.path.join(os.environ["USERPROFILE"]), "Desktop")
         config["save path"]["student_record_path"] = default_desktop_save_path
         config["new_user"]["new_user"] = "False"
-
-    with open("config/config.ini", "w") as configfile:
-        config.write(configfile)
+        save_config()
 
     # pdf fields
     with open("config/pdf_form_fields.json") as data:
         fields = json.load(data)
 
+    pdf_backend = config.get("pdf", "backend", fallback=DEFAULT_BACKEND)
+    record_cache = RecordCache(GENERATED_RECORDS)
+    # --- '[password] kdf' is scrypt or pbkdf2_sha256, the other keys of the section are its parameters (n, r, p or
+    # --- iterations)
+    password_params = {key: int(value) for key, value in config.items("password") if key != "kdf"} \
+        if config.has_section("password") else {}
+    instructor_store = InstructorStore(INSTRUCTOR_DATA, file_writer,
+                                       config.get("password", "kdf", fallback=DEFAULT_KDF), password_params)
+    unlock_session = UnlockSession(config.getfloat("instructors", "unlock_minutes",
+                                                   fallback=DEFAULT_UNLOCK_MINUTES) * 60)
+    field_map = FieldMap.load(FIELD_MAP)
+    job_queue = JobQueue()
     student_group = StudentGroup()
+    student_store = StudentStore(STUDENT_DB)
+    roster_cache = RosterCache(ROSTER_CACHE, config.getint("roster", "cache_mb", fallback=64) * 1024 ** 2)
     theme = Theme(config_theme, theme_dict)
+    profiler.mark("config")
     main_ui = MainUI(CONFINED_WATER_LABELS, KNOWLEDGE_DEVELOPMENT_LABELS, OPEN_WATER_LABELS, theme, student_group)
 
+    main_ui.after_idle(main_ui.open_last_course)
+    main_ui.after_idle(profiler.report)
     main_ui.mainloop()
+    file_writer.flush()
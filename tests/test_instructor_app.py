@@ -0,0 +1,886 @@
+import dataclasses
+import datetime
+import importlib.util
+import io
+import json
+import os
+import shutil
+import subprocess
+import sys
+import threading
+import time
+import zipfile
+
+import pytest
+from fillpdf import fillpdfs
+
+from instructor_assistant.batch import MANIFEST_NAME, generate_batch, generate_combined, generate_zip
+from instructor_assistant.dates import normalize_birth_dates, normalize_dates
+from instructor_assistant.duplicates import find_duplicates, resolve_duplicates
+from instructor_assistant.dive_template import load_dive_templates, template_fields
+from instructor_assistant.field_map import SECTIONS, FieldMap
+from instructor_assistant.form_template import FillpdfTemplate, FormTemplate, PyMuPDFTemplate
+from instructor_assistant.forms import birth_date_parts, fields_hash, student_fields
+from instructor_assistant.instructors import (KDF_PBKDF2, KDF_SCRYPT, InstructorStore, UnlockSession, hash_password,
+                                              needs_rehash, verify_password)
+from instructor_assistant.jobs import Cancelled, JobQueue
+from instructor_assistant import persistence
+from instructor_assistant.persistence import WriteBehind, atomic_write
+from instructor_assistant.record_cache import RecordCache
+from instructor_assistant.roster_cache import RosterCache
+from instructor_assistant.roster_import import read_roster_import, save_roster_import
+from instructor_assistant.search import StudentSearch
+from instructor_assistant.roster import (FORMAT_CSV, FORMAT_EXCEL, FORMAT_JSON_LINES, STUDENT_COLUMNS, detect_format,
+                                         iter_roster, load_roster_profile, read_roster)
+from instructor_assistant.student_store import StudentStore
+from instructor_assistant.students import Student, StudentGroup
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+STUDENT_AND_REFERRAL_FORM = os.path.join(ROOT, "assets", "Record_and_Referral_Form.pdf")
+PDF_FORM_FIELDS = os.path.join(ROOT, "config", "pdf_form_fields.json")
+FIELD_MAP = os.path.join(ROOT, "config", "field_map.json")
+ROSTER_PROFILES = os.path.join(ROOT, "config", "roster_profiles.json")
+EXAMPLE_ROSTER = os.path.join(ROOT, "assets", "openwater_diver_course_example_import.xlsx")
+# --- seconds allowed for everything 'instructor_assistant_app' imports, in a new interpreter
+COLD_START_BUDGET = 1.5
+APP_IMPORTS = ("datetime", "os", "tkinter", "json", "customtkinter", "configparser", "webbrowser", "multiprocessing",
+               "tkcalendar", "tkinter.messagebox", "tkinter.filedialog")
+APP_MODULES = ("startup", "students", "forms", "batch", "form_template", "record_cache", "jobs", "field_map",
+               "instructors", "roster", "roster_cache", "student_store", "duplicates", "dates",
+               "search", "persistence", "roster_import")
+DATE = datetime.date(2023, 6, 1)
+
+
+def make_student(first_name="Jane", last_name="Diver", date_of_birth="21/04/1990", sex="female"):
+    return Student(first_name=first_name, last_name=last_name, date_of_birth=date_of_birth, sex=sex,
+                   phone="555-555-5555", email="jane@email.com", street_address="1 Reef Road", city="Victoria",
+                   province="BC", postal="V8V 1A1", country="Canada")
+
+
+def course_fields():
+    with open(PDF_FORM_FIELDS) as data:
+        fields = json.load(data)
+    fields["CW 1"] = 1
+    fields["undefined_27"] = 6
+    fields["undefined_28"] = 2023
+    return fields
+
+
+def test_student_fields():
+    fields = student_fields(make_student())
+    assert fields["Student Name"] == "Jane Diver"
+    assert (fields["Birth Date"], fields["undefined"], fields["undefined_2"]) == ("21", "04", "1990")
+    assert (fields["Check Box20"], fields["Check Box21"]) == ("No", "Yes")
+
+    fields = student_fields(make_student(date_of_birth=datetime.datetime(1990, 4, 21), sex=""))
+    assert (fields["Birth Date"], fields["undefined"], fields["undefined_2"]) == (21, 4, 1990)
+    assert (fields["Check Box20"], fields["Check Box21"]) == ("", "")
+
+    # --- a date of birth imported anyway leaves the date empty instead of failing, every other field is filled
+    fields = student_fields(make_student(date_of_birth="1990"))
+    assert (fields["Birth Date"], fields["undefined"], fields["undefined_2"]) == ("", "", "")
+    assert fields["Student Name"] == "Jane Diver" and fields["Email"] == "jane@email.com"
+    with pytest.raises(ValueError, match="1990"):
+        birth_date_parts("1990")
+
+
+def test_student_group_keeps_students_with_the_same_name_apart():
+    group = StudentGroup()
+    first, second = make_student(), dataclasses.replace(make_student(), phone="555-000-0002")
+    first_id, second_id = group.add(first), group.add(second)
+    sam_id = group.add(make_student(first_name="Sam"))
+
+    assert first_id != second_id
+    assert group.get(first_id) is first and group.get(second_id) is second
+    assert group.find(" JANE", "diver ") == [first_id, second_id]
+    assert group.remove(first_id) is first
+    assert group.find("Jane", "Diver") == [second_id]
+    assert list(group) == [second, group.get(sam_id)] and len(group) == 2
+    assert group.add(first) not in (first_id, second_id, sam_id)
+    assert group.add(make_student(), student_id=10) == 10 and group.add(make_student()) == 11
+    with pytest.raises(ValueError):
+        group.add(make_student(), student_id=10)
+
+
+def test_student_group_storage_is_compact():
+    group = StudentGroup()
+    students = [Student(*(f"{value} "[:-1] for value in dataclasses.astuple(make_student()))) for _ in range(2)]
+    for student in students:
+        group.add(student)
+    assert not hasattr(students[0], "__dict__")
+    assert students[0].city is students[1].city and students[0].country is students[1].country
+    assert students[0].email is not students[1].email
+    assert [student_id for student_id, _ in group.rows(1)] == [2]
+    assert [student for _, student in group.rows()] == students
+    group.clear()
+    assert len(group) == 0 and not group._categories
+
+
+def test_student_store_keeps_courses_between_sessions(tmp_path):
+    store = StudentStore(str(tmp_path / "students.db"))
+    jane = make_student(date_of_birth=datetime.datetime(1990, 4, 21))
+    sam = make_student(first_name="Sam")
+    course_id = store.open_course("June Open Water")
+    ids, inserted, updated = store.upsert(course_id, [jane, sam])
+    assert (inserted, updated) == (2, 0)
+    store.mark_completed(ids[0], "forms/jane.pdf")
+    store.open_course("July Open Water")
+    store.open_course("June Open Water")
+    store.close()
+
+    store = StudentStore(str(tmp_path / "students.db"))
+    assert store.last_course() == (course_id, "June Open Water")
+    assert store.students(course_id) == [(ids[0], jane), (ids[1], sam)]
+    assert store.students(course_id, offset=1, limit=1) == [(ids[1], sam)]
+    assert store.find("jane", "DIVER", course_id) == [ids[0]]
+    assert store.completed(course_id)[ids[0]][0] == "forms/jane.pdf"
+
+    # --- re-import: unchanged students are not written, changed ones keep their ID, new ones are added at the end
+    moved = dataclasses.replace(sam, city="Tofino")
+    alex = make_student(first_name="Alex")
+    new_ids, inserted, updated = store.upsert(course_id, [jane, moved, alex])
+    assert (inserted, updated) == (1, 1) and new_ids[:2] == ids
+    assert [student for _, student in store.students(course_id)] == [jane, moved, alex]
+    store.remove(ids[0])
+    assert store.completed(course_id) == {} and store.count(course_id) == 2
+
+
+def test_generate_batch(tmp_path):
+    students = [make_student(first_name=f"Diver{n}") for n in range(3)]
+    progress = []
+    results = generate_batch(STUDENT_AND_REFERRAL_FORM, course_fields(), students, str(tmp_path), DATE,
+                             processes=2, progress=lambda completed, total, result: progress.append(completed))
+
+    assert [result.student_name for result in results] == ["Diver0 Diver", "Diver1 Diver", "Diver2 Diver"]
+    assert all(result.success for result in results)
+    assert sorted(progress) == [1, 2, 3]
+    filled = fillpdfs.get_form_fields(results[1].output_path)
+    assert filled["Student Name"] == "Diver1 Diver"
+    assert filled["CW 1"] == "1"
+
+
+def test_generate_batch_reports_failures(tmp_path):
+    results = generate_batch(STUDENT_AND_REFERRAL_FORM, course_fields(), [make_student()],
+                             str(tmp_path / "missing"), DATE, processes=1)
+    assert not results[0].success
+    assert results[0].error
+
+    results = generate_batch(STUDENT_AND_REFERRAL_FORM, course_fields(),
+                             [make_student(date_of_birth="1990"), make_student()], str(tmp_path), DATE, processes=1)
+    assert [result.success for result in results] == [False, True]
+
+
+def test_generate_batch_skips_unchanged_forms(tmp_path):
+    cache_path = str(tmp_path / "generated_records.json")
+    save_path = tmp_path / "forms"
+    save_path.mkdir()
+    students = [make_student(first_name="Ann"), make_student(first_name="Bo")]
+
+    def generate(force=False):
+        results = generate_batch(STUDENT_AND_REFERRAL_FORM, course_fields(), students, str(save_path), DATE,
+                                 processes=1, cache=RecordCache(cache_path), force=force)
+        assert all(result.success for result in results)
+        return [result.skipped for result in results]
+
+    assert generate() == [False, False]
+    assert generate() == [True, True]
+    students[1].phone = "555-000-0000"
+    assert generate() == [True, False]
+    os.remove(save_path / "Ann Diver_Student_Record_Form_1_6_2023.pdf")
+    assert generate() == [False, True]
+    assert generate(force=True) == [False, False]
+
+
+def test_generate_combined(tmp_path):
+    students = [make_student(first_name="Ann"), make_student(date_of_birth="1990"), make_student(first_name="Bo")]
+    output_path = str(tmp_path / "course.pdf")
+    results = generate_combined(STUDENT_AND_REFERRAL_FORM, course_fields(), students, output_path)
+
+    assert [result.success for result in results] == [True, False, True]
+    assert os.listdir(tmp_path) == ["course.pdf"]
+    filled = fillpdfs.get_form_fields(output_path)
+    assert len(filled) == 2 * len(course_fields())
+    assert (filled["p1_Student Name"], filled["p2_Student Name"]) == ("Ann Diver", "Bo Diver")
+    assert filled["p1_CW 1"] == filled["p2_CW 1"] == "1"
+
+
+def test_generate_zip(tmp_path):
+    students = [make_student(), make_student(), make_student(first_name="Bo")]
+    output_path = str(tmp_path / "course.zip")
+    results = generate_zip(STUDENT_AND_REFERRAL_FORM, course_fields(), students, output_path, DATE, processes=2)
+
+    assert all(result.success for result in results)
+    assert os.listdir(tmp_path) == ["course.zip"]
+    with zipfile.ZipFile(output_path) as archive:
+        manifest = json.loads(archive.read(MANIFEST_NAME))
+        assert sorted(entry["file"] for entry in manifest) == [
+            "Bo Diver_Student_Record_Form_1_6_2023.pdf",
+            "Jane Diver_Student_Record_Form_1_6_2023 (2).pdf",
+            "Jane Diver_Student_Record_Form_1_6_2023.pdf",
+        ]
+        bo = next(entry for entry in manifest if entry["student_name"] == "Bo Diver")
+        assert bo["fields_hash"] == fields_hash(dict(course_fields(), **student_fields(students[2])))
+        (tmp_path / "bo.pdf").write_bytes(archive.read(bo["file"]))
+    assert fillpdfs.get_form_fields(str(tmp_path / "bo.pdf"))["Student Name"] == "Bo Diver"
+
+
+def test_form_template_matches_fillpdf(tmp_path):
+    template = FillpdfTemplate(STUDENT_AND_REFERRAL_FORM)
+    assert template.fields() == dict.fromkeys(course_fields(), "")
+
+    fields = dict(course_fields(), **student_fields(make_student()))
+    fillpdfs.write_fillable_pdf(STUDENT_AND_REFERRAL_FORM, str(tmp_path / "fillpdf.pdf"), fields)
+    template.write(io.BytesIO(), dict(fields, **{"Student Name": "Someone Else"}))
+    template.write(str(tmp_path / "template.pdf"), fields)
+    assert (tmp_path / "fillpdf.pdf").read_bytes() == (tmp_path / "template.pdf").read_bytes()
+
+
+def test_form_template_backends_implement_parse_and_write():
+    class ParseOnlyTemplate(FormTemplate):
+        def parse(self, data: bytes) -> list:
+            return []
+
+    # --- a backend without 'write' fails when it is created, not part way through a batch
+    with pytest.raises(TypeError):
+        ParseOnlyTemplate(STUDENT_AND_REFERRAL_FORM)
+
+
+def test_form_template_reloads_changed_file(tmp_path):
+    pdf_path = tmp_path / "form.pdf"
+    shutil.copy(STUDENT_AND_REFERRAL_FORM, pdf_path)
+    template = FillpdfTemplate(str(pdf_path))
+    parsed = template.pdf
+
+    os.utime(pdf_path, ns=(0, 0))
+    assert not template.is_stale()
+
+    with open(pdf_path, "ab") as pdf_file:
+        pdf_file.write(b"\n")
+    template.fields()
+    assert template.pdf is not parsed
+
+
+def test_pdf_backends_fill_equivalent_values(tmp_path):
+    fields = dict(course_fields(), **student_fields(make_student()))
+    fields["Check Box24"] = "Yes"
+
+    filled = {}
+    for template_class in (FillpdfTemplate, PyMuPDFTemplate):
+        template = template_class(STUDENT_AND_REFERRAL_FORM)
+        assert template.fields() == dict.fromkeys(fields, "")
+        output_path = str(tmp_path / f"{template.backend}.pdf")
+        template.write(output_path, fields)
+        filled[template.backend] = {key: value == "Yes" if key.startswith("Check Box") else value
+                                    for key, value in fillpdfs.get_form_fields(output_path).items()}
+
+    assert filled["fillpdf"] == filled["pymupdf"]
+    assert filled["pymupdf"]["Student Name"] == "Jane Diver"
+    assert filled["pymupdf"]["Check Box21"] and not filled["pymupdf"]["Check Box20"]
+
+
+def wait_for_events(job_queue, events, count, timeout=30):
+    deadline = time.monotonic() + timeout
+    while len(events) < count and time.monotonic() < deadline:
+        job_queue.process_events()
+        time.sleep(0.01)
+
+
+def test_job_queue_runs_jobs_in_order_off_the_calling_thread():
+    job_queue = JobQueue()
+    events = []
+
+    def work(job):
+        job.progress(1, 1)
+        return threading.current_thread() is not threading.main_thread()
+
+    def fail(job):
+        raise ValueError("bad roster")
+
+    job_queue.submit("first", work, on_done=lambda job, result: events.append((job.name, result)),
+                     on_progress=lambda job, completed, total, message: events.append((job.name, completed, total)))
+    job_queue.submit("second", fail, on_error=lambda job, e: events.append((job.name, str(e))))
+    wait_for_events(job_queue, events, 3)
+
+    assert events == [("first", 1, 1), ("first", True), ("second", "bad roster")]
+    assert not job_queue.busy
+
+    # --- a job's callbacks see it finished, the status bar can go idle
+    job_queue.submit("third", lambda job: None, on_done=lambda job, result: events.append(job_queue.busy))
+    wait_for_events(job_queue, events, 4)
+    assert events[-1] is False
+
+
+def test_job_queue_cancel_all():
+    job_queue = JobQueue()
+    started = threading.Event()
+    events = []
+
+    def work(job):
+        started.set()
+        while not job.cancelled:
+            time.sleep(0.01)
+        raise Cancelled()
+
+    job_queue.submit("running", work, on_error=lambda job, e: events.append((job.name, type(e))))
+    job_queue.submit("queued", work, on_error=lambda job, e: events.append((job.name, type(e))))
+    assert started.wait(10)
+    job_queue.cancel_all()
+    wait_for_events(job_queue, events, 2)
+
+    assert events == [("running", Cancelled), ("queued", Cancelled)]
+
+
+def test_generate_batch_cancel(tmp_path):
+    students = [make_student(first_name=f"Diver{n}") for n in range(3)]
+    cancel = threading.Event()
+
+    def progress(completed, total, result):
+        cancel.set()
+
+    results = generate_batch(STUDENT_AND_REFERRAL_FORM, course_fields(), students, str(tmp_path), DATE,
+                             processes=1, progress=progress, cancel=cancel)
+
+    assert [result.success for result in results] == [True, False, False]
+    assert [result.cancelled for result in results] == [False, True, True]
+    assert os.listdir(tmp_path) == [os.path.basename(results[0].output_path)]
+
+
+def test_generate_combined_cancel(tmp_path):
+    cancel = threading.Event()
+    cancel.set()
+    output_path = str(tmp_path / "combined.pdf")
+    results = generate_combined(STUDENT_AND_REFERRAL_FORM, course_fields(), [make_student()], output_path,
+                                cancel=cancel)
+
+    assert results[0].cancelled and not results[0].success
+    assert not os.path.exists(output_path)
+
+
+# --- (date or flex fields, initials and PADI number fields) of every row, as 'set_date' and 'set_instructor' filled
+# them before the field map table
+LEGACY_ROWS = {
+    "confined_water": [
+        (("CW 1", "undefined_27", "undefined_28"), ("Initials 1", "undefined_29")),
+        (("CW 2", "undefined_21", "undefined_22"), ("Initials 2", "undefined_35")),
+        (("CW 3", "undefined_23", "undefined_24"), ("Initials 3", "undefined_41")),
+        (("CW 4", "undefined_25", "undefined_26"), ("Initials 4", "undefined_47")),
+        (("CW 5", "undefined_53", "undefined_54"),
+         ("DSD with all CW Dive 1 skills  Open Water Diver CW Dive 1", "undefined_55")),
+        (("10 Minute Survival Float", "undefined_66", "undefined_67"),
+         ("200 metreyard Swim OR 300 metreyard MaskSnorkelFin Swim", "undefined_68")),
+        (("undefined_75", "undefined_76", "undefined_72"), ("undefined_73", "undefined_74")),
+        (("Equipment Preparation and Care", "undefined_91", "undefined_92"), ("undefined_77", "undefined_78")),
+        (("Disconnect Low Pressure Inflator Hose", "undefined_95", "undefined_96"), ("undefined_93", "undefined_94")),
+        (("Loose Cylinder Band", "undefined_100", "undefined_97"), ("undefined_98", "undefined_99")),
+        (("Weight System Removal and Replacement surface", "undefined_102", "undefined_103"),
+         ("undefined_104", "undefined_101")),
+        (("Emergency Weight Drop or in OW", "undefined_107", "undefined_108"), ("undefined_105", "undefined_106")),
+        (("Skin Diving Skills", "undefined_122", "undefined_118"), ("undefined_119", "undefined_120")),
+        (("Note If all Confined Water Dives Confined Water Dive Flexible Skills and Wa", "undefined_129",
+          "undefined_123"), ("undefined_124", "undefined_125")),
+        (("Date_6", "undefined_132", "undefined_133"), ("PADI",)),
+    ],
+    "knowledge_development": [
+        (("Section 1", "undefined_30", "undefined_31"), ("undefined_33", "undefined_34")),
+        (("Section 2", "undefined_36", "undefined_37"), ("undefined_39", "undefined_40")),
+        (("Section 3", "undefined_42", "undefined_43"), ("undefined_45", "undefined_46")),
+        (("Section 4", "undefined_48", "undefined_49"), ("undefined_51", "undefined_52")),
+        (("Section 5", "undefined_56", "undefined_57"), ("undefined_59", "undefined_60")),
+        (("Quick Review", "undefined_61", "undefined_62"), ("undefined_64", "undefined_65")),
+        (("Date_3", "undefined_70", "undefined_71"), ("undefined_69",)),
+    ],
+    "open_water": [
+        (("Dive 1", "undefined_84", "undefined_85"), ("Initials 1_2", "undefined_86")),
+        (("Dive 2", "undefined_79", "undefined_80"), ("Initials 2_2", "undefined_81")),
+        (("Dive 3", "undefined_87", "undefined_88"), ("Initials 1_3", "undefined_89")),
+        (("Dive 4", "undefined_82", "undefined_83"), ("Initials 2_3", "undefined_90")),
+        (("Dive_9",), ("Instructor Initials 1", "undefined_109")),
+        (("Dive",), ("Instructor Initials 2", "undefined_110")),
+        (("Dive_2",), ("Instructor Initials 3", "undefined_111")),
+        (("Dive_3",), ("Instructor Initials 4", "undefined_112")),
+        (("Dive_4",), ("Instructor Initials 5", "undefined_113")),
+        (("Dive_5",), ("Instructor Initials 6", "undefined_114")),
+        (("Dive_6",), ("Instructor Initials 7", "undefined_115")),
+        (("Dive_7",), ("Instructor Initials 8", "undefined_116")),
+        (("Dive_8",), ("Instructor Initials 9", "undefined_117")),
+        (("Dive_10",), ("Instructor Initials 10", "undefined_121")),
+        (("Date_4", "undefined_127", "undefined_128"), ("undefined_126",)),
+        (("Date_8", "undefined_138", "undefined_139"), ("undefined_137",)),
+    ],
+}
+INSTRUCTOR = {"PADI Instructor": "Sam Reef", "PADI Number": "12345", "Dive Center": "S-100", "Phone": "555-0100",
+              "Email": "sam@email.com", "Initials": "SR"}
+
+
+def test_field_map_matches_legacy_mapping():
+    field_map = FieldMap.load(FIELD_MAP)
+    with open(PDF_FORM_FIELDS) as data:
+        form_fields = set(json.load(data))
+
+    for section in SECTIONS:
+        legacy = LEGACY_ROWS[section]
+        assert len(field_map.rows(section)) == len(legacy)
+        for index, (date_fields, instructor_fields) in enumerate(legacy):
+            # --- only row 'index' is switched on
+            selected = [row == index for row in range(len(legacy))]
+            value = DATE if len(date_fields) == 3 else "7"
+            fields = {}
+            field_map.set_dates(fields, section, [value if on else None for on in selected])
+            expected = dict(zip(date_fields, (DATE.day, DATE.month, DATE.year))) if value is DATE \
+                else {date_fields[0]: "7"}
+            assert fields == expected
+
+            fields = {}
+            field_map.set_initials(fields, section, selected, INSTRUCTOR)
+            expected = {instructor_fields[-1]: "12345"}
+            if len(instructor_fields) == 2:
+                expected[instructor_fields[0]] = "SR"
+            assert fields == expected
+            assert set(fields) <= form_fields
+
+
+def test_field_map_knowledge_checks_use_each_video_checkbox():
+    field_map = FieldMap.load(FIELD_MAP)
+    fields = {}
+    field_map.set_course_options(fields, {"rdp": True, "erdpml": False, "computer": True})
+    # --- only the 4th video is watched; the if-chain checked every video box off the 1st video checkbox
+    field_map.set_knowledge_checks(fields, [True] * 7, [False, False, False, True, False, False, False],
+                                   ["90", "85", "", "", "", "", ""])
+
+    assert fields["Check Box24"] == fields["Check Box22"] == "Yes" and "Check Box23" not in fields
+    assert [fields.get(f"Check Box{n}") for n in (25, 27, 29, 31, 33, 35)] == ["Yes"] * 6
+    assert [fields.get(f"Check Box{n}") for n in (26, 28, 30, 32, 34, 36)] == [None, None, None, "Yes", None, None]
+    assert (fields["undefined_32"], fields["undefined_38"], fields["undefined_63"]) == ("90", "85", "")
+
+
+def test_field_map_instructor_details():
+    field_map = FieldMap.load(FIELD_MAP)
+    fields = course_fields()
+    field_map.set_instructor_details(fields, INSTRUCTOR, DATE)
+    assert (fields["PADI Instructor"], fields["PADI No"], fields["Date"], fields["Email_2"]) == \
+           ("Sam Reef", "12345", 1, "sam@email.com")
+
+    # --- the same instructor again changes nothing, a second instructor fills the second block
+    field_map.set_instructor_details(fields, INSTRUCTOR, DATE)
+    assert fields["PADI Instructor_2"] == ""
+    field_map.set_instructor_details(fields, dict(INSTRUCTOR, **{"PADI Instructor": "Alex Kelp"}), DATE)
+    assert (fields["PADI Instructor"], fields["PADI Instructor_2"], fields["undefined_16"]) == \
+           ("Sam Reef", "Alex Kelp", 2023)
+
+
+def test_instructor_store_reads_the_file_again_only_when_it_changes(tmp_path, monkeypatch):
+    path = str(tmp_path / "instructor_data.json")
+    store = InstructorStore(path)
+    assert store.names() == []
+    store.add("Jane Instructor", {"Initials": "JI", "Password": hash_password("reef")})
+    assert verify_password(store.get("Jane Instructor"), "reef")
+
+    reads = []
+    load = json.load
+    monkeypatch.setattr(json, "load", lambda data_file: reads.append(data_file.name) or load(data_file))
+    assert store.names() == ["Jane Instructor"] and store.get("Nobody") is None
+    assert reads == []  # --- its own save is not read back
+
+    # --- another computer adds an instructor to the shared file
+    with open(path, "w") as data_file:
+        json.dump({"Jane Instructor": {"Initials": "JI"}, "Sam Instructor": {"Initials": "SI"}}, data_file)
+    assert store.names() == ["Jane Instructor", "Sam Instructor"]
+    assert store.get("Sam Instructor") == {"Initials": "SI"}
+    assert reads == [path]
+
+    store.remove("Jane Instructor")
+    assert InstructorStore(path).names() == ["Sam Instructor"]
+
+
+def test_password_kdfs_and_legacy_hash_upgrade(tmp_path):
+    for algorithm, params in ((KDF_SCRYPT, {"n": 2 ** 10}), (KDF_PBKDF2, {"iterations": 1000})):
+        instructor = {"Password": hash_password("reef", algorithm, params)}
+        assert instructor["Password"]["Algorithm"] == algorithm
+        assert verify_password(instructor, "reef") and not verify_password(instructor, "Reef")
+        assert not needs_rehash(instructor, algorithm, params) and needs_rehash(instructor, algorithm)
+    with pytest.raises(ValueError):
+        hash_password("reef", "md5")
+
+    # --- the example instructor was saved with the legacy sha256(salt + password) hash
+    path = str(tmp_path / "instructor_data.json")
+    shutil.copy(os.path.join(ROOT, "config", "instructor_data.json"), path)
+    store = InstructorStore(path, algorithm=KDF_PBKDF2, params={"iterations": 1000})
+    name = store.names()[0]
+    assert "Algorithm" not in store.get(name)["Password"] and verify_password(store.get(name), "1234")
+    assert store.upgrade_password(name, "1234")
+    upgraded = InstructorStore(path).get(name)
+    assert upgraded["Password"]["Algorithm"] == KDF_PBKDF2 and verify_password(upgraded, "1234")
+    assert not store.upgrade_password(name, "1234")  # --- already upgraded
+
+
+def test_unlock_session_expires_after_its_ttl():
+    now = [0.0]
+    session = UnlockSession(ttl=60, clock=lambda: now[0])
+    instructor = {"Initials": "JI", "Password": hash_password("reef")}
+    assert not session.verify("Jane Instructor", instructor, "wrong") and session.get("Jane Instructor") is None
+    assert session.verify("Jane Instructor", instructor, "reef")
+    now[0] = 59
+    assert session.get("Jane Instructor") is instructor
+    now[0] = 60
+    assert session.get("Jane Instructor") is None
+
+    session.verify("Jane Instructor", instructor, "reef")
+    session.lock()
+    assert session.get("Jane Instructor") is None
+    no_session = UnlockSession(ttl=0)
+    assert no_session.verify("Jane Instructor", instructor, "reef") and no_session.get("Jane Instructor") is None
+
+
+def test_atomic_write_keeps_the_old_file_if_saving_fails(tmp_path, monkeypatch):
+    path = str(tmp_path / "dive_template_data.json")
+    atomic_write(path, '{"old": 1}')
+
+    def crash(source, destination):
+        raise OSError("power cut")
+    monkeypatch.setattr(persistence.os, "replace", crash)
+    with pytest.raises(OSError):
+        atomic_write(path, '{"new": 2}')
+    with open(path) as data_file:
+        assert json.load(data_file) == {"old": 1}
+    assert os.listdir(tmp_path) == ["dive_template_data.json"]  # --- no temporary file left behind
+
+
+def test_write_behind_coalesces_saves(tmp_path, monkeypatch):
+    writes = []
+    monkeypatch.setattr(persistence, "atomic_write", lambda path, text: writes.append((path, text)))
+    instructors, templates = str(tmp_path / "instructor_data.json"), str(tmp_path / "dive_template_data.json")
+
+    writer = WriteBehind()
+    with writer.batch():
+        for n in range(5):
+            writer.write(instructors, f"instructors {n}")
+        writer.write(templates, "templates")
+        assert writer.read(instructors) == "instructors 4" and writes == []
+    assert writes == [(instructors, "instructors 4"), (templates, "templates")]
+
+    writes.clear()
+    written = threading.Event()
+    writer = WriteBehind(delay=0.05)
+    writer.write(instructors, "first")
+    writer.write(instructors, "second", on_written=written.set)
+    assert writer.pending(instructors)
+    assert written.wait(5)
+    assert writes == [(instructors, "second")] and not writer.pending(instructors)
+
+
+def test_instructor_store_saves_through_the_writer(tmp_path):
+    path = str(tmp_path / "instructor_data.json")
+    writer = WriteBehind(delay=60)
+    store = InstructorStore(path, writer)
+    store.add("Jane Instructor", {"Initials": "JI"})
+    store.add("Sam Instructor", {"Initials": "SI"})
+    assert not os.path.exists(path) and store.names() == ["Jane Instructor", "Sam Instructor"]
+    writer.flush()
+    assert InstructorStore(path).names() == ["Jane Instructor", "Sam Instructor"]
+
+
+def test_read_roster():
+    students = read_roster(EXAMPLE_ROSTER)
+    assert [(student.first_name, student.sex) for student in students[:2]] == \
+           [("Ariel", "female"), ("Ursula", "female")]
+    assert student_fields(students[0])["undefined_2"] == 1990
+
+
+def test_iter_roster_streams_rows(tmp_path):
+    import openpyxl
+
+    workbook = openpyxl.Workbook()
+    sheet = workbook.active
+    sheet.append(("notes",) + STUDENT_COLUMNS)
+    sheet.append(("", "Jane", "Diver", datetime.datetime(1990, 4, 21), "female", None, "jane@email.com"))
+    sheet.append(())
+    sheet.append(("", "Sam", "Reef", "21/04/1991", "male"))
+    workbook.save(tmp_path / "roster.xlsx")
+
+    students = iter_roster(str(tmp_path / "roster.xlsx"))
+    first = next(students)
+    assert (first.first_name, first.date_of_birth, first.phone, first.country) == \
+           ("Jane", datetime.datetime(1990, 4, 21), "", "")
+    assert [student.last_name for student in students] == ["Reef"]
+
+    sheet.delete_cols(3)
+    workbook.save(tmp_path / "missing_column.xlsx")
+    with pytest.raises(KeyError, match="last_name"):
+        next(iter_roster(str(tmp_path / "missing_column.xlsx")))
+
+
+def test_roster_formats_use_the_header_profile(tmp_path):
+    profile = load_roster_profile(ROSTER_PROFILES)
+    # --- another spreadsheet's export: different headings and order, ';' delimiter, a .txt extension
+    (tmp_path / "roster.txt").write_text(
+        "Surname;Given Name;DOB;Gender;Mobile;E-mail;Street;Town;State;Zip;Country;Notes\n"
+        "Diver;Jane;21/04/1990;female;555-555-5555;jane@email.com;1 Reef Road;Victoria;BC;V8V 1A1;Canada;\n"
+        "Reef;Sam;21/04/1991;male;;;;;;;;\n", encoding="utf-8")
+    (tmp_path / "roster.xlsx").write_text("\n".join(json.dumps(dataclasses.asdict(make_student(first_name=name)))
+                                                      for name in ("Jane", "Sam")), encoding="utf-8")
+    assert detect_format(str(tmp_path / "roster.txt")) == FORMAT_CSV
+    assert detect_format(str(tmp_path / "roster.xlsx")) == FORMAT_JSON_LINES
+    assert detect_format(EXAMPLE_ROSTER) == FORMAT_EXCEL
+
+    csv_students = read_roster(str(tmp_path / "roster.txt"), profile)
+    assert csv_students[0] == make_student()
+    assert (csv_students[1].first_name, csv_students[1].phone) == ("Sam", "")
+    assert [student.first_name for student in read_roster(str(tmp_path / "roster.xlsx"))] == ["Jane", "Sam"]
+    with pytest.raises(KeyError, match="first_name"):
+        read_roster(str(tmp_path / "roster.txt"))
+    with pytest.raises(ValueError, match="Unknown roster profile"):
+        load_roster_profile(ROSTER_PROFILES, "missing")
+
+
+def test_parquet_roster(tmp_path):
+    pyarrow = pytest.importorskip("pyarrow")
+    import pyarrow.parquet
+
+    student = make_student()
+    pyarrow.parquet.write_table(pyarrow.table({column: [getattr(student, column)] for column in STUDENT_COLUMNS}),
+                                tmp_path / "roster.parquet")
+    assert read_roster(str(tmp_path / "roster.parquet")) == [student]
+
+
+def test_roster_cache_skips_reading_unchanged_rosters(tmp_path, monkeypatch):
+    roster = tmp_path / "roster.xlsx"
+    shutil.copy(EXAMPLE_ROSTER, roster)
+    cache = RosterCache(str(tmp_path / "cache"))
+    students = list(cache.iter_roster(str(roster)))
+
+    # --- a new session: the roster is not read, even if only its mtime changed
+    import instructor_assistant.roster_cache
+    monkeypatch.setattr(instructor_assistant.roster_cache, "iter_roster", None)
+    os.utime(roster, (time.time() + 10, time.time() + 10))
+    assert list(RosterCache(str(tmp_path / "cache")).iter_roster(str(roster))) == students
+    assert cache.get(str(roster), {"first_name": ["Given Name"]}) is None
+
+    # --- least recently used rosters are removed past the size cap
+    other = tmp_path / "other.csv"
+    other.write_text(",".join(STUDENT_COLUMNS) + "\n" + ",".join(STUDENT_COLUMNS) + "\n")
+    cache = RosterCache(str(tmp_path / "cache"), max_bytes=os.path.getsize(next((tmp_path / "cache").glob("*.pickle"))))
+    cache.put(str(other), None, read_roster(str(other)))
+    assert cache.get(str(roster)) is None and cache.get(str(other)) is not None
+    assert len(list((tmp_path / "cache").glob("*.pickle"))) == 1
+
+    # --- a crash while caching keeps the old entry whole, and it is not recorded as the new one
+    def crash(source, destination):
+        raise OSError("power cut")
+    monkeypatch.setattr(persistence.os, "replace", crash)
+    with pytest.raises(OSError):
+        cache.put(str(other), None, [])
+    monkeypatch.undo()
+    assert cache.get(str(other)) == read_roster(str(other))
+    assert [entry.name for entry in (tmp_path / "cache").iterdir() if entry.suffix == ".tmp"] == []
+
+
+def test_normalize_dates_accepts_mixed_formats_and_reports_errors():
+    april_21 = datetime.date(1990, 4, 21)
+    values = [datetime.datetime(1990, 4, 21), "21/04/1990", " 21-4-1990", "21.04.90", "1990-04-21 00:00:00",
+              32984, "32984", "21 Apr 1990", "April 21, 1990", "21/04/1990",
+              "", "31/02/1990", "04/21/1990", "21/04/2090", "soon"]
+    dates, errors = normalize_dates(values, today=DATE)
+    assert dates[:10] == [april_21] * 10
+    assert dates[10:] == values[10:]
+    assert [(error.row, error.message) for error in errors] == [
+        (10, "no date of birth"),
+        (11, "'31/02/1990' is not a real date, dates are dd/mm/yyyy"),
+        (12, "'04/21/1990' is not a real date, dates are dd/mm/yyyy"),
+        (13, "date of birth is in the future"),
+        (14, "'soon' is not a dd/mm/yyyy date"),
+    ]
+
+    students = [make_student(), make_student(date_of_birth="1990")]
+    assert [error.row for error in normalize_birth_dates(students)] == [1]
+    assert students[0].date_of_birth == april_21 and student_fields(students[0])["Birth Date"] == 21
+
+
+def test_roster_import_saves_new_students_and_resolves_duplicates(tmp_path):
+    store_path = str(tmp_path / "students.db")
+    ann, bo = make_student(first_name="Ann"), make_student(first_name="Bo", date_of_birth="1990")
+    progress = []
+    roster_import = read_roster_import(store_path, "Open Water", [ann, bo, dataclasses.replace(ann, phone="")],
+                                       progress=lambda done, total: progress.append(done), batch_rows=2)
+    assert progress == [2]
+    assert [(error.row, error.value) for error in roster_import.date_errors] == [(1, "1990")]
+    assert [(duplicate.row, duplicate.original, duplicate.exact) for duplicate in roster_import.duplicates] == \
+           [(2, 0, True)]
+    assert save_roster_import(store_path, roster_import, merge=False, batch_rows=2) == (2, 0)
+
+    # --- imported again with a new student, a changed one and a near duplicate (names swapped) of a saved one
+    cy = make_student(first_name="Cy")
+    roster = [cy, dataclasses.replace(ann, city="Tofino"), dataclasses.replace(bo, first_name="Diver", last_name="Bo")]
+    roster_import = read_roster_import(store_path, "Open Water", roster)
+    assert [student.first_name for _, student in roster_import.saved] == ["Ann", "Bo"]
+    assert [(duplicate.row, duplicate.original) for duplicate in roster_import.duplicates] == [(4, 1)]
+    assert save_roster_import(store_path, roster_import, merge=True) == (1, 1)
+
+    store = StudentStore(store_path)
+    try:
+        course_id = store.find_course("Open Water")
+        # --- saved students keep their place, new students follow in roster order
+        assert [(student.first_name, student.city) for _, student in store.students(course_id)] == \
+               [("Ann", "Tofino"), ("Bo", "Victoria"), ("Cy", "Victoria")]
+    finally:
+        store.close()
+
+    cancel = threading.Event()
+    cancel.set()
+    with pytest.raises(Cancelled):
+        read_roster_import(store_path, "Open Water", [ann] * 4, cancel=cancel, batch_rows=2)
+
+
+def test_find_duplicates_exact_and_near():
+    jane = make_student()
+    students = [
+        jane,
+        make_student(first_name="Sam"),  # --- same family email, another diver
+        dataclasses.replace(jane, email="JANE@email.com ", phone=""),  # --- exact
+        dataclasses.replace(jane, first_name="Diver", last_name="Jane", email=""),  # --- names swapped
+        dataclasses.replace(jane, date_of_birth="1/1/2000", city=""),  # --- email and first name
+        make_student(first_name="Alex"),
+    ]
+    duplicates = find_duplicates(students)
+    assert [(duplicate.row, duplicate.original, duplicate.exact) for duplicate in duplicates] == \
+           [(2, 0, True), (3, 0, False), (4, 0, False)]
+    assert find_duplicates(students, start=3)[0].row == 3
+
+    incomplete = dataclasses.replace(jane, phone="", country="")
+    merged = resolve_duplicates([incomplete, make_student(first_name="Sam"), jane], find_duplicates(
+        [incomplete, make_student(first_name="Sam"), jane]), merge=True)
+    assert merged == [jane, make_student(first_name="Sam")]
+    assert resolve_duplicates(students, duplicates, merge=False) == [students[0], students[1], students[5]]
+
+
+def test_student_search_prefix_substring_and_phone():
+    search = StudentSearch()
+    search.add(10, make_student("Zoë", "Ocean"))
+    search.add(11, dataclasses.replace(make_student("Mark", "Reef"), email="mark.reef@dive.org",
+                                       phone="(250) 555-0101"))
+    search.add(12, dataclasses.replace(make_student("Anna", "Marker"), phone="604 555 0199"))
+
+    assert search.search("") is None
+    assert search.search("m") == [11, 12]  # --- one letter matches the start of a word, 'Ocean' has no word 'm...'
+    assert search.search("zoe") == [10]
+    assert search.search("ark") == [11, 12]  # --- three letters and more match anywhere in a word
+    assert search.search("arke") == [12]
+    assert search.search("dive.org") == [11]
+    assert search.search("555-0101") == [11]
+    assert search.search("0199") == [12]
+    assert search.search("ma re") == [11]  # --- every word of the query has to match
+    assert search.search("ma ree") == [11]
+    assert search.search("ma reef xyz") == []
+
+    search.remove(11)
+    assert search.search("ma") == [12]
+    search.add(11, make_student("Mark", "Reef"))
+    assert search.search("ma") == [12, 11]  # --- in the order the students were added
+
+
+def test_student_search_typing_matches_a_fresh_search():
+    search = StudentSearch()
+    search.add(1, dataclasses.replace(make_student("Ana", "Bajohn"), email="ana@email.com", phone="604 555 0199"))
+    search.add(2, dataclasses.replace(make_student("John", "Reef"), email="john@reef.org", phone="250 555 0101"))
+    search.add(3, dataclasses.replace(make_student("Ann", "Jones"), email="ann@dive.org", phone="555 5012"))
+    for query in ("john", "ana bajohn", "jo reef", "5-501", "555-0199", "ann dive.org"):
+        for length in range(1, len(query) + 1):
+            typed = search.search(query[:length])
+            assert typed == copy_search(search).search(query[:length]), query[:length]
+    search.search("j")
+    search.search("jo")
+    assert search.search("joh") == [1, 2]  # --- 'Bajohn' contains 'joh' but no word starts with 'jo'
+
+
+def copy_search(search: StudentSearch) -> StudentSearch:
+    """The same index without the last query, so its search starts from scratch"""
+    fresh = StudentSearch()
+    fresh.__dict__.update(search.__dict__, _last=((), None))
+    return fresh
+
+
+def test_template_fields_follow_the_dive_template():
+    template = load_dive_templates(os.path.join(ROOT, "config", "dive_template_data.json"))["Example Template"]
+    with open(PDF_FORM_FIELDS) as data:
+        form_fields = json.load(data)
+    # --- Confined Water 2 on its own day; the template copies it to calendar 8 (Disconnect LP Hose)
+    fields = template_fields(form_fields, FieldMap.load(FIELD_MAP), template, DATE,
+                             {1: datetime.date(2023, 6, 2)}, INSTRUCTOR, DATE)
+
+    assert (fields["CW 1"], fields["CW 2"], fields["Disconnect Low Pressure Inflator Hose"]) == (1, 2, 2)
+    # --- switched off rows are left empty
+    assert fields["Note If all Confined Water Dives Confined Water Dive Flexible Skills and Wa"] == ""
+    assert fields["undefined_124"] == "" and fields["Initials 1"] == "SR"
+    # --- Knowledge Development OR Elearning is off in the template, Section 5 is on
+    assert (fields["Section 5"], fields["Quick Review"], fields["undefined_64"]) == (1, "", "")
+    assert (fields["Dive_9"], fields["Dive_10"], fields["undefined_32"]) == ("1", "4", "pass")
+    assert (fields["Check Box24"], fields["Check Box23"], fields["Check Box26"]) == ("Yes", "", "Yes")
+    assert fields["PADI Instructor"] == "Sam Reef"
+
+
+def test_template_fields_switch_each_section_row():
+    template = load_dive_templates(os.path.join(ROOT, "config", "dive_template_data.json"))["Example Template"]
+    template = dict(template, switches=[n % 3 != 0 for n in range(len(template["switches"]))])
+    with open(PDF_FORM_FIELDS) as data:
+        form_fields = json.load(data)
+    field_map = FieldMap.load(FIELD_MAP)
+    fields = template_fields(form_fields, field_map, template, DATE, None, INSTRUCTOR, DATE)
+
+    # --- every section reads its own switches from the template, none is shifted into the next section
+    switches = iter(template["switches"])
+    for section in SECTIONS:
+        rows = field_map.rows(section)
+        expected = [next(switches) for _ in rows]
+        assert [fields[row["padi_number"]] == INSTRUCTOR["PADI Number"] for row in rows] == expected, section
+    assert next(switches, None) is None
+
+
+def test_cli_generate_without_tk(tmp_path):
+    config = tmp_path / "config"
+    shutil.copytree(os.path.join(ROOT, "config"), config,
+                    ignore=shutil.ignore_patterns("config.ini", "generated_records.json", "students.db",
+                                                  "roster_cache"))
+    out = tmp_path / "out"
+    script = ("import sys; from instructor_assistant.cli import main; code = main(sys.argv[1:]); "
+              "assert 'tkinter' not in sys.modules; sys.exit(code)")
+    completed = subprocess.run(
+        [sys.executable, "-c", script, "generate", "--roster", EXAMPLE_ROSTER, "--template", "Example Template",
+         "--instructor", "Example (pass:1234)", "--out", str(out), "--date", "2023-06-01", "--processes", "1",
+         "--config", str(config), "--form", STUDENT_AND_REFERRAL_FORM],
+        cwd=ROOT, env=dict(os.environ, INSTRUCTOR_ASSISTANT_PASSWORD="1234"), capture_output=True, text=True)
+
+    assert completed.returncode == 0, completed.stderr
+    assert "6 generated" in completed.stdout
+    filled = fillpdfs.get_form_fields(str(out / "Ariel A_Student_Record_Form_1_6_2023.pdf"))
+    assert (filled["Student Name"], filled["CW 1"], filled["PADI Instructor"]) == ("Ariel A", "1", "Example Instructor")
+
+
+def test_cold_start_budget_and_lazy_imports():
+    """Times the imports of 'instructor_assistant_app', customtkinter and tkcalendar included, and checks none of
+    them loads a heavy dependency.  Building MainUI needs a display and the app's Windows config paths, so that part
+    of startup is measured with INSTRUCTOR_ASSISTANT_PROFILE_STARTUP."""
+    for module in ("customtkinter", "tkcalendar"):
+        if importlib.util.find_spec(module) is None:
+            pytest.skip(f"'{module}' is not installed")
+    script = ("import sys, time; start = time.perf_counter(); "
+              + "; ".join(f"import {module}" for module in APP_IMPORTS) + "; "
+              + "; ".join(f"import instructor_assistant.{module}" for module in APP_MODULES)
+              + "; print(time.perf_counter() - start); "
+              "print(' '.join(sorted({'pandas', 'numpy', 'pdfrw', 'fillpdf', 'fitz'} & set(sys.modules))))")
+    completed = subprocess.run([sys.executable, "-c", script], cwd=ROOT, capture_output=True, text=True, check=True)
+    seconds, heavy_modules = completed.stdout.split("\n")[:2]
+
+    assert heavy_modules == ""
+    assert float(seconds) < COLD_START_BUDGET
+
+
+def test_startup_profiler_report(tmp_path):
+    profile = tmp_path / "startup.txt"
+    script = ("from instructor_assistant.startup import profiler; import json; import instructor_assistant.roster; "
+              "profiler.mark('MainUI'); profiler.report()")
+    subprocess.run([sys.executable, "-c", script], cwd=ROOT, check=True,
+                   env=dict(os.environ, INSTRUCTOR_ASSISTANT_PROFILE_STARTUP=str(profile)))
+
+    report = profile.read_text()
+    assert report.startswith("Startup profile: ")
+    assert "instructor_assistant.roster" in report
+    assert "s  MainUI" in report and "s  until first idle" in report